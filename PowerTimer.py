@@ -2,7 +2,6 @@ import os
 from boxbranding import getMachineBrand, getMachineName
 import xml.etree.cElementTree
 from time import ctime, time
-from bisect import insort
 
 from enigma import eActionMap, quitMainloop
 
@@ -469,14 +468,14 @@ class PowerTimer(timer.Timer):
 				w.state += 1
 
 		try:
-			self.timer_list.remove(w)
+			timer.removeTimer(self.timer_list, w)
 		except:
 			print '[PowerManager]: Remove list failed'
 
 		# Did this timer reach the final state?
 		if w.state < PowerTimerEntry.StateEnded:
 			# No, sort it into active list
-			insort(self.timer_list, w)
+			timer.insortTimer(self.timer_list, w)
 		else:
 			# Yes. Process repeat if necessary, and re-add.
 			if w.repeated:
@@ -497,7 +496,7 @@ class PowerTimer(timer.Timer):
 				w.end = w.origend
 				# Remove old timers as set in config
 				self.cleanupDaily(config.recording.keep_timers.value)
-				insort(self.processed_timers, w)
+				timer.insortTimer(self.processed_timers, w)
 		self.stateChanged(w)
 
 	def loadTimer(self):
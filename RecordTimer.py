@@ -1,10 +1,11 @@
 from boxbranding import getMachineBrand, getMachineName
 import xml.etree.cElementTree
 from time import localtime, strftime, ctime, time
-from bisect import insort
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
 from sys import maxint
 import os
-from enigma import eEPGCache, getBestPlayableServiceReference, eServiceReferenceDVB, eServiceReference, eServiceCenter, iRecordableService, quitMainloop, eActionMap, setPreferredTuner, eStreamServer
+from enigma import eEPGCache, eTimer, getBestPlayableServiceReference, eServiceReferenceDVB, eServiceReference, eServiceCenter, iRecordableService, quitMainloop, eActionMap, setPreferredTuner, eStreamServer
 
 from Components.config import config
 from Components import Harddisk
@@ -255,6 +256,8 @@ class RecordTimerEntry(timer.TimerEntry, object):
 		self.wasInStandby = False
 
 		self.log_entries = []
+		self.log_id = None  # Identifies the timer in the separate timer log file
+		self.log_saved = (None, 0)  # Log entries already written to the timer log file
 		self.resetState()
 
 	def __repr__(self):
@@ -1008,6 +1011,8 @@ def createTimer(xml):
 	return entry
 
 class RecordTimer(timer.Timer):
+	SaveTimerDelay = 1000  # ms
+
 	def __init__(self):
 		timer.Timer.__init__(self)
 
@@ -1015,7 +1020,19 @@ class RecordTimer(timer.Timer):
 		self.onTimerRemoved = []
 		self.onTimerChanged = []
 
+		# Per-service index of timer_list for isInTimer(), rebuilt on demand
+		self.timer_index = None
+		self.onTimerAdded.append(self.invalidateTimerIndex)
+		self.onTimerRemoved.append(self.invalidateTimerIndex)
+		self.onTimerChanged.append(self.invalidateTimerIndex)
+		self.on_state_change.append(self.invalidateTimerIndex)
+
 		self.Filename = Directories.resolveFilename(Directories.SCOPE_CONFIG, "timers.xml")
+		self.LogFilename = Directories.resolveFilename(Directories.SCOPE_CONFIG, "timers.log")
+		self.log_id_count = 0
+		self.savedTimers = None
+		self.saveTimerDelay = eTimer()
+		self.saveTimerDelay.callback.append(self.writeTimers)
 
 		try:
 			self.loadTimer()
@@ -1049,14 +1066,14 @@ class RecordTimer(timer.Timer):
 				w.state += 1
 
 		try:
-			self.timer_list.remove(w)
+			timer.removeTimer(self.timer_list, w)
 		except:
 			print '[RecordTimer] Remove list failed'
 
 		# Did this timer reach the final state?
 		if w.state < RecordTimerEntry.StateEnded:
 			# No, sort it into active list
-			insort(self.timer_list, w)
+			timer.insortTimer(self.timer_list, w)
 		else:
 			# Yes. Process repeat if necessary, and re-add.
 			if w.repeated:
@@ -1069,24 +1086,38 @@ class RecordTimer(timer.Timer):
 				self.cleanupDisabled()
 				# Remove old timers as set in config
 				self.cleanupDaily(config.recording.keep_timers.value)
-				insort(self.processed_timers, w)
+				timer.insortTimer(self.processed_timers, w)
 		self.stateChanged(w)
 
 	def isRecTimerWakeup(self):
 		return wasRecTimerWakeup
 
 	def isRecording(self):
-		isRunning = False
 		for timer in self.timer_list:
 			if timer.isRunning() and not timer.justplay:
-				isRunning = True
-		return isRunning
+				return True
+		return False
 
 	def loadTimer(self):
+		logs = self.loadTimerLogs()
+		entries = []
 		try:
 			f = open(self.Filename, 'r')
-			doc = xml.etree.cElementTree.parse(f)
-			f.close()
+			try:
+				# Parse the file as a stream, dropping each timer element once it has been created
+				for event, elem in xml.etree.cElementTree.iterparse(f):
+					if elem.tag == "timer":
+						entry = createTimer(elem)
+						log_id = elem.get("log_id")
+						if log_id:
+							entry.log_id = log_id.encode("utf-8")
+							entry.log_entries.extend(logs.get(entry.log_id, []))
+						entry.timeChanged()
+						entry.Timer = self
+						entries.append(entry)
+						elem.clear()
+			finally:
+				f.close()
 		except SyntaxError:
 			from Tools.Notifications import AddPopup
 			from Screens.MessageBox import MessageBox
@@ -1103,62 +1134,101 @@ class RecordTimer(timer.Timer):
 			print "[RecordTimer] timers.xml not found!"
 			return
 
-		root = doc.getroot()
+		entries = self.removeDoubleTimers(entries)
+		self.addTimerEntries(entries)
+		if logs:
+			# Drop the log lines of timers which no longer exist
+			self.compactTimerLogs(entries)
+		print "[RecordTimer] Loaded %d timers" % len(entries)
 
-		# Post a message if there are timer overlaps in the timer file
-		checkit = True
-		for timer in root.findall("timer"):
-			newTimer = createTimer(timer)
-			if (self.record(newTimer, True, dosave=False) is not None) and (checkit is True):
-				from Tools.Notifications import AddPopup
-				from Screens.MessageBox import MessageBox
-				AddPopup(_("Timer overlap in timers.xml detected!\nPlease recheck it!"), type=MessageBox.TYPE_ERROR, timeout=0, id="TimerLoadFailed")
-				checkit = False  # The message only needs to be displayed once
-
-	def saveTimer(self):
-		list = ['<?xml version="1.0" ?>\n', '<timers>\n']
+		# Trigger onTimerAdded callbacks
+		for entry in entries:
+			for f in self.onTimerAdded:
+				f(entry)
 
-		for timer in self.timer_list + self.processed_timers:
-			if timer.dontSave:
+		# Post a message if there are timer overlaps in the timer file.
+		# One check over the whole list replaces a check per loaded timer.
+		if not TimerSanityCheck(self.timer_list).check():
+			from Tools.Notifications import AddPopup
+			from Screens.MessageBox import MessageBox
+			AddPopup(_("Timer overlap in timers.xml detected!\nPlease recheck it!"), type=MessageBox.TYPE_ERROR, timeout=0, id="TimerLoadFailed")
+
+	# Drop timers that lie within an earlier timer on the same service,
+	# as TimerSanityCheck.doubleCheck() does when adding a single timer.
+	# Only timers that are still to run are compared, ended and disabled
+	# ones are kept as they are.
+	def removeDoubleTimers(self, entries):
+		services = {}
+		for idx, entry in enumerate(entries):
+			ref = entry.service_ref.ref
+			if entry.disabled or entry.state == RecordTimerEntry.StateEnded or not ref.valid():
 				continue
-			list.append('<timer')
-			list.append(' begin="' + str(int(timer.begin)) + '"')
-			list.append(' end="' + str(int(timer.end)) + '"')
-			list.append(' serviceref="' + stringToXML(str(timer.service_ref)) + '"')
-			list.append(' repeated="' + str(int(timer.repeated)) + '"')
-			list.append(' rename_repeat="' + str(int(timer.rename_repeat)) + '"')
-			list.append(' name="' + str(stringToXML(timer.name)) + '"')
-			list.append(' description="' + str(stringToXML(timer.description)) + '"')
-			list.append(' afterevent="' + str(stringToXML({
-				AFTEREVENT.NONE: "nothing",
-				AFTEREVENT.STANDBY: "standby",
-				AFTEREVENT.DEEPSTANDBY: "deepstandby",
-				AFTEREVENT.AUTO: "auto"
-			}[timer.afterEvent])) + '"')
-			if timer.eit is not None:
-				list.append(' eit="' + str(timer.eit) + '"')
-			if timer.dirname is not None:
-				list.append(' location="' + str(stringToXML(timer.dirname)) + '"')
-			if timer.tags is not None:
-				list.append(' tags="' + str(stringToXML(' '.join(timer.tags))) + '"')
-			list.append(' disabled="' + str(int(timer.disabled)) + '"')
-			list.append(' justplay="' + str(int(timer.justplay)) + '"')
-			list.append(' always_zap="' + str(int(timer.always_zap)) + '"')
-			list.append(' descramble="' + str(int(timer.descramble)) + '"')
-			list.append(' record_ecm="' + str(int(timer.record_ecm)) + '"')
-			list.append(' isAutoTimer="' + str(int(timer.isAutoTimer)) + '"')
-			if timer.ice_timer_id is not None:
-				list.append(' ice_timer_id="' + str(timer.ice_timer_id) + '"')
-			list.append('>\n')
-
-# 		Handle repeat entries, which never end and so never get pruned by cleanupDaily
-#       Repeating timers get, e.g., repeated="127" (dow bitmap)
-
-			ignore_before = 0
-			if config.recording.keep_timers.value > 0:
-				if int(timer.repeated) > 0:
-					ignore_before = time() - config.recording.keep_timers.value * 86400
+			if ref.flags & eServiceReference.isGroup:
+				key = (True, ref.getPath())
+			else:
+				key = (False, tuple(ref.getUnsignedData(x) for x in (1, 2, 3, 4)))
+			services.setdefault(key, []).append((entry.begin, -entry.end, idx))
+		doubles = set()
+		for service_entries in services.itervalues():
+			service_entries.sort()
+			max_end = None
+			for begin, end, idx in service_entries:
+				if max_end is not None and -end <= max_end:
+					print "[RecordTimer] ignore double timer", entries[idx]
+					doubles.add(idx)
+				else:
+					max_end = max(max_end, -end)
+		return [entry for idx, entry in enumerate(entries) if idx not in doubles]
 
+	# Timer changes often come in bursts (e.g. an edit followed by a state
+	# change, or an IceTV update of many timers), so saving is delayed
+	# a little and all the saves requested in the meantime are done in one write.
+	def saveTimer(self):
+		self.saveTimerDelay.start(self.SaveTimerDelay, True)
+
+	def getLogIgnoreBefore(self, timer):
+		# Handle repeat entries, which never end and so never get pruned by cleanupDaily
+		# Repeating timers get, e.g., repeated="127" (dow bitmap)
+		if config.recording.keep_timers.value > 0 and int(timer.repeated) > 0:
+			return time() - config.recording.keep_timers.value * 86400
+		return 0
+
+	def timerToXML(self, timer, separateLog):
+		list = []
+		list.append('<timer')
+		list.append(' begin="' + str(int(timer.begin)) + '"')
+		list.append(' end="' + str(int(timer.end)) + '"')
+		list.append(' serviceref="' + stringToXML(str(timer.service_ref)) + '"')
+		list.append(' repeated="' + str(int(timer.repeated)) + '"')
+		list.append(' rename_repeat="' + str(int(timer.rename_repeat)) + '"')
+		list.append(' name="' + str(stringToXML(timer.name)) + '"')
+		list.append(' description="' + str(stringToXML(timer.description)) + '"')
+		list.append(' afterevent="' + str(stringToXML({
+			AFTEREVENT.NONE: "nothing",
+			AFTEREVENT.STANDBY: "standby",
+			AFTEREVENT.DEEPSTANDBY: "deepstandby",
+			AFTEREVENT.AUTO: "auto"
+		}[timer.afterEvent])) + '"')
+		if timer.eit is not None:
+			list.append(' eit="' + str(timer.eit) + '"')
+		if timer.dirname is not None:
+			list.append(' location="' + str(stringToXML(timer.dirname)) + '"')
+		if timer.tags is not None:
+			list.append(' tags="' + str(stringToXML(' '.join(timer.tags))) + '"')
+		list.append(' disabled="' + str(int(timer.disabled)) + '"')
+		list.append(' justplay="' + str(int(timer.justplay)) + '"')
+		list.append(' always_zap="' + str(int(timer.always_zap)) + '"')
+		list.append(' descramble="' + str(int(timer.descramble)) + '"')
+		list.append(' record_ecm="' + str(int(timer.record_ecm)) + '"')
+		list.append(' isAutoTimer="' + str(int(timer.isAutoTimer)) + '"')
+		if timer.ice_timer_id is not None:
+			list.append(' ice_timer_id="' + str(timer.ice_timer_id) + '"')
+		if separateLog:
+			list.append(' log_id="' + str(timer.log_id) + '"')
+		list.append('>\n')
+
+		if not separateLog:
+			ignore_before = self.getLogIgnoreBefore(timer)
 			for log_time, code, msg in timer.log_entries:
 				if log_time < ignore_before:
 					continue
@@ -1169,22 +1239,101 @@ class RecordTimer(timer.Timer):
 				list.append(str(stringToXML(msg)))
 				list.append('</log>\n')
 
-			list.append('</timer>\n')
+		list.append('</timer>\n')
+		return list
 
+	# Write timers.xml now, if anything has changed since it was last written
+	def writeTimers(self):
+		self.saveTimerDelay.stop()
+		separateLog = config.recording.separate_timer_log.value
+		timers = [timer for timer in self.timer_list + self.processed_timers if not timer.dontSave]
+		if separateLog:
+			self.saveTimerLogs(timers)
+
+		list = ['<?xml version="1.0" ?>\n', '<timers>\n']
+		for timer in timers:
+			list.extend(self.timerToXML(timer, separateLog))
 		list.append('</timers>\n')
+		data = ''.join(list)
+		if data == self.savedTimers:
+			return
 
 		try:
 			f = open(self.Filename + ".writing", "w")
-			for x in list:
-				f.write(x)
+			f.write(data)
 			f.flush()
 
 			os.fsync(f.fileno())
 			f.close()
 			os.rename(self.Filename + ".writing", self.Filename)
+			self.savedTimers = data
 		except:
 			print "There is not /etc/enigma2/timers.xml file !!! Why ?? "
 
+	# The separate timer log file has a line "log_id<TAB>time<TAB>code<TAB>message"
+	# per log entry. New entries are appended, the file is only rewritten
+	# when entries were removed (by the timer log editor) and on loading.
+	def loadTimerLogs(self):
+		logs = {}
+		try:
+			f = open(self.LogFilename, 'r')
+		except IOError:
+			return logs
+		for line in f:
+			try:
+				log_id, log_time, code, msg = line.rstrip('\n').split('\t', 3)
+				logs.setdefault(log_id, []).append((int(log_time), int(code), msg))
+			except ValueError:
+				print "[RecordTimer] invalid line in timer log:", line
+		f.close()
+		return logs
+
+	def timerLogLines(self, timer, log_entries):
+		return ''.join("%s\t%d\t%d\t%s\n" % (timer.log_id, log_time, code, msg.replace('\n', ' ')) for log_time, code, msg in log_entries)
+
+	def saveTimerLogs(self, timers):
+		for timer in timers:
+			if timer.log_id is None:
+				self.log_id_count += 1
+				timer.log_id = "%d.%d" % (int(time()), self.log_id_count)
+		data = []
+		for timer in timers:
+			saved_list, saved_count = timer.log_saved
+			if saved_count and (saved_list is not timer.log_entries or saved_count > len(timer.log_entries)):
+				# The log was replaced or shortened, so the file has to be rewritten
+				self.compactTimerLogs(timers)
+				return
+			if saved_list is not timer.log_entries:
+				saved_count = 0
+			data.append(self.timerLogLines(timer, timer.log_entries[saved_count:]))
+		for timer in timers:
+			timer.log_saved = (timer.log_entries, len(timer.log_entries))
+		data = ''.join(data)
+		if data:
+			try:
+				f = open(self.LogFilename, "a")
+				f.write(data)
+				f.close()
+			except (IOError, OSError), e:
+				print "[RecordTimer] unable to write timer log:", e
+
+	def compactTimerLogs(self, timers):
+		data = []
+		for timer in timers:
+			timer.log_saved = (timer.log_entries, len(timer.log_entries))
+			if timer.log_id is not None:
+				ignore_before = self.getLogIgnoreBefore(timer)
+				data.append(self.timerLogLines(timer, [entry for entry in timer.log_entries if entry[0] >= ignore_before]))
+		try:
+			f = open(self.LogFilename + ".writing", "w")
+			f.write(''.join(data))
+			f.flush()
+			os.fsync(f.fileno())
+			f.close()
+			os.rename(self.LogFilename + ".writing", self.LogFilename)
+		except (IOError, OSError), e:
+			print "[RecordTimer] unable to write timer log:", e
+
 	def getNextZapTime(self, from_time=None):
 		now = from_time if from_time is not None else time()
 		for timer in self.timer_list:
@@ -1272,171 +1421,283 @@ class RecordTimer(timer.Timer):
 
 		return None
 
-	def isInTimer(self, eventid, begin, duration, service):
-		returnValue = None
-		kind = 0
-		time_match = 0
-
-		isAutoTimer = 0
-		bt = None
-		check_offset_time = not config.recording.margin_before.value and not config.recording.margin_after.value
-		end = begin + duration
-		refstr = ':'.join(service.split(':')[:11])
-		for x in self.timer_list:
-			isAutoTimer = 0
-			if x.isAutoTimer == 1:
-				isAutoTimer |= 1
-			if x.ice_timer_id is not None:
-				isAutoTimer |= 2
-			check = ':'.join(x.service_ref.ref.toString().split(':')[:11]) == refstr
-			if not check:
-				sref = x.service_ref.ref
-				parent_sid = sref.getUnsignedData(5)
-				parent_tsid = sref.getUnsignedData(6)
-				if parent_sid and parent_tsid:
-					# Check for subservice
-					sid = sref.getUnsignedData(1)
-					tsid = sref.getUnsignedData(2)
-					sref.setUnsignedData(1, parent_sid)
-					sref.setUnsignedData(2, parent_tsid)
-					sref.setUnsignedData(5, 0)
-					sref.setUnsignedData(6, 0)
-					check = sref.toCompareString() == refstr
-					num = 0
-					if check:
-						check = False
-						event = eEPGCache.getInstance().lookupEventId(sref, eventid)
-						num = event and event.getNumOfLinkageServices() or 0
-					sref.setUnsignedData(1, sid)
-					sref.setUnsignedData(2, tsid)
-					sref.setUnsignedData(5, parent_sid)
-					sref.setUnsignedData(6, parent_tsid)
-					for cnt in range(num):
-						subservice = event.getLinkageService(sref, cnt)
-						if sref.toCompareString() == subservice.toCompareString():
-							check = True
-							break
-			if check:
+	def invalidateTimerIndex(self, *args):
+		self.timer_index = None
+
+	# Build the per-service index used by isInTimer().
+	# Every service (and the parent service of a subservice timer) gets
+	# its single shot timers sorted by begin time, so an event only has
+	# to look at the timers that can overlap it, and its repeating timers
+	# expanded once into the weekdays on which they can match.
+	# Entries are (position in timer_list, timer, parent service ref, repeat data).
+	def buildTimerIndex(self):
+		index = {}
+		for pos, x in enumerate(self.timer_list):
+			sref = x.service_ref.ref
+			refstr = ':'.join(sref.toString().split(':')[:11])
+			keys = [(refstr, None)]
+			parent_sid = sref.getUnsignedData(5)
+			parent_tsid = sref.getUnsignedData(6)
+			if parent_sid and parent_tsid:
+				# Subservice timers can also match events of the parent service
+				parent = eServiceReference(sref.toString())
+				parent.setUnsignedData(1, parent_sid)
+				parent.setUnsignedData(2, parent_tsid)
+				parent.setUnsignedData(5, 0)
+				parent.setUnsignedData(6, 0)
+				parentstr = parent.toCompareString()
+				if parentstr != refstr:
+					keys.append((parentstr, parent))
+			if x.repeated:
 				timer_end = x.end
-				timer_begin = x.begin
-				kind_offset = 0
-				if not x.repeated and check_offset_time:
-					if 0 < end - timer_end <= 59:
-						timer_end = end
-					elif 0 < timer_begin - begin <= 59:
-						timer_begin = begin
-				if x.justplay:
-					kind_offset = 5
-					if (timer_end - x.begin) <= 1:
-						timer_end += 60
-				if x.always_zap:
-					kind_offset = 10
-
-				if x.repeated != 0:
-					if bt is None:
-						bt = localtime(begin)
-						bday = bt.tm_wday
-						begin2 = 1440 + bt.tm_hour * 60 + bt.tm_min
-						end2 = begin2 + duration / 60
-					xbt = localtime(x.begin)
-					xet = localtime(timer_end)
-					offset_day = False
-					checking_time = x.begin < begin or begin <= x.begin <= end
-					if xbt.tm_yday != xet.tm_yday:
-						oday = bday - 1
-						if oday == -1:
-							oday = 6
-						offset_day = x.repeated & (1 << oday)
-					xbegin = 1440 + xbt.tm_hour * 60 + xbt.tm_min
-					xend = xbegin + ((timer_end - x.begin) / 60)
-					if xend < xbegin:
-						xend += 1440
-					if x.repeated & (1 << bday) and checking_time:
-						if begin2 < xbegin <= end2:
-							if xend < end2:
-								# Recording within event
-								time_match = (xend - xbegin) * 60
-								kind = kind_offset + 3
-							else:
-								# Recording last part of event
-								time_match = (end2 - xbegin) * 60
-								kind = kind_offset + 1
-						elif xbegin <= begin2 <= xend:
-							if xend < end2:
-								# Recording first part of event
-								time_match = (xend - begin2) * 60
-								kind = kind_offset + 4
-							else:
-								# Recording whole event
-								time_match = (end2 - begin2) * 60
-								kind = kind_offset + 2
-						elif offset_day:
-							xbegin -= 1440
-							xend -= 1440
-							if begin2 < xbegin <= end2:
-								if xend < end2:
-									# Recording within event
-									time_match = (xend - xbegin) * 60
-									kind = kind_offset + 3
-								else:
-									# Recording last part of event
-									time_match = (end2 - xbegin) * 60
-									kind = kind_offset + 1
-							elif xbegin <= begin2 <= xend:
-								if xend < end2:
-									# Recording first part of event
-									time_match = (xend - begin2) * 60
-									kind = kind_offset + 4
-								else:
-									# Recording whole event
-									time_match = (end2 - begin2) * 60
-									kind = kind_offset + 2
-					elif offset_day and checking_time:
-						xbegin -= 1440
-						xend -= 1440
-						if begin2 < xbegin <= end2:
-							if xend < end2:
-								# Recording within event
-								time_match = (xend - xbegin) * 60
-								kind = kind_offset + 3
-							else:
-								# Recording last part of event
-								time_match = (end2 - xbegin) * 60
-								kind = kind_offset + 1
-						elif xbegin <= begin2 <= xend:
-							if xend < end2:
-								# Recording first part of event
-								time_match = (xend - begin2) * 60
-								kind = kind_offset + 4
-							else:
-								# Recording whole event
-								time_match = (end2 - begin2) * 60
-								kind = kind_offset + 2
+				if x.justplay and (timer_end - x.begin) <= 1:
+					timer_end += 60
+				xbt = localtime(x.begin)
+				xet = localtime(timer_end)
+				xbegin = 1440 + xbt.tm_hour * 60 + xbt.tm_min
+				xend = xbegin + ((timer_end - x.begin) / 60)
+				if xend < xbegin:
+					xend += 1440
+				offset_day = xbt.tm_yday != xet.tm_yday
+				days = x.repeated & 0x7F
+				if offset_day:
+					# A timer running over midnight can also match on the following day
+					days |= ((days << 1) | (days >> 6)) & 0x7F
+				repeat = (xbegin, xend, offset_day)
+			for key, parent in keys:
+				service = index.get(key)
+				if service is None:
+					service = index[key] = ([], [], [0], [[] for day in range(7)])
+				if x.repeated:
+					for day in range(7):
+						if days & (1 << day):
+							service[3][day].append((pos, x, parent, repeat))
 				else:
-					if begin < timer_begin <= end:
-						if timer_end < end:
+					service[1].append((x.begin, (pos, x, parent, None)))
+					service[2][0] = max(service[2][0], x.end - x.begin)
+		for service in index.itervalues():
+			service[1].sort(key=itemgetter(0))
+			service[0][:] = [entry[0] for entry in service[1]]
+			service[1][:] = [entry[1] for entry in service[1]]
+		return index
+
+	def getTimerIndex(self):
+		if self.timer_index is None or self.timer_index[0] is not self.timer_list or self.timer_index[1] != len(self.timer_list):
+			self.timer_index = (self.timer_list, len(self.timer_list), self.buildTimerIndex())
+		return self.timer_index[2]
+
+	# Return the index entries of the timers on service refstr that can
+	# overlap the event from begin to end, in timer_list order.
+	def getTimerCandidates(self, refstr, begin, end, bday=None):
+		service = self.getTimerIndex().get(refstr)
+		if service is None:
+			return []
+		begins, singles, maxspan, days = service
+		# Single shot timers may be stretched by up to a minute at either end
+		lo = bisect_left(begins, begin - maxspan[0] - 60)
+		hi = bisect_right(begins, max(end, begin + 59))
+		candidates = singles[lo:hi]
+		if bday is None:
+			bday = localtime(begin).tm_wday
+		candidates += days[bday]
+		candidates.sort(key=itemgetter(0))
+		return candidates
+
+	def isSubserviceInEvent(self, x, parent, eventid):
+		event = eEPGCache.getInstance().lookupEventId(parent, eventid)
+		num = event and event.getNumOfLinkageServices() or 0
+		sref = x.service_ref.ref
+		for cnt in range(num):
+			subservice = event.getLinkageService(sref, cnt)
+			if sref.toCompareString() == subservice.toCompareString():
+				return True
+		return False
+
+	# Return (time_match, kind) for timer x against the event from begin
+	# to end. eventday is (weekday, begin minute, end minute) of the event
+	# in local time, repeat is the precalculated data of a repeating timer.
+	def matchTimer(self, x, begin, end, duration, eventday, repeat, check_offset_time):
+		kind = 0
+		time_match = 0
+		timer_end = x.end
+		timer_begin = x.begin
+		kind_offset = 0
+		if not x.repeated and check_offset_time:
+			if 0 < end - timer_end <= 59:
+				timer_end = end
+			elif 0 < timer_begin - begin <= 59:
+				timer_begin = begin
+		if x.justplay:
+			kind_offset = 5
+			if (timer_end - x.begin) <= 1:
+				timer_end += 60
+		if x.always_zap:
+			kind_offset = 10
+
+		if x.repeated != 0:
+			bday, begin2, end2 = eventday
+			xbegin, xend, offset_day = repeat
+			checking_time = x.begin < begin or begin <= x.begin <= end
+			if offset_day:
+				oday = bday - 1
+				if oday == -1:
+					oday = 6
+				offset_day = x.repeated & (1 << oday)
+			if x.repeated & (1 << bday) and checking_time:
+				if begin2 < xbegin <= end2:
+					if xend < end2:
+						# Recording within event
+						time_match = (xend - xbegin) * 60
+						kind = kind_offset + 3
+					else:
+						# Recording last part of event
+						time_match = (end2 - xbegin) * 60
+						kind = kind_offset + 1
+				elif xbegin <= begin2 <= xend:
+					if xend < end2:
+						# Recording first part of event
+						time_match = (xend - begin2) * 60
+						kind = kind_offset + 4
+					else:
+						# Recording whole event
+						time_match = (end2 - begin2) * 60
+						kind = kind_offset + 2
+				elif offset_day:
+					xbegin -= 1440
+					xend -= 1440
+					if begin2 < xbegin <= end2:
+						if xend < end2:
 							# Recording within event
-							time_match = timer_end - timer_begin
+							time_match = (xend - xbegin) * 60
 							kind = kind_offset + 3
 						else:
 							# Recording last part of event
-							time_match = end - timer_begin
+							time_match = (end2 - xbegin) * 60
 							kind = kind_offset + 1
-					elif timer_begin <= begin <= timer_end:
-						if timer_end < end:
+					elif xbegin <= begin2 <= xend:
+						if xend < end2:
 							# Recording first part of event
-							time_match = timer_end - begin
+							time_match = (xend - begin2) * 60
 							kind = kind_offset + 4
-						else:  # Recording whole event
-							time_match = end - begin
+						else:
+							# Recording whole event
+							time_match = (end2 - begin2) * 60
 							kind = kind_offset + 2
-
-				if time_match:
-					returnValue = (time_match, kind, isAutoTimer)
-					if kind in (2, 7, 12):  # When full recording do not look further
-						break
+			elif offset_day and checking_time:
+				xbegin -= 1440
+				xend -= 1440
+				if begin2 < xbegin <= end2:
+					if xend < end2:
+						# Recording within event
+						time_match = (xend - xbegin) * 60
+						kind = kind_offset + 3
+					else:
+						# Recording last part of event
+						time_match = (end2 - xbegin) * 60
+						kind = kind_offset + 1
+				elif xbegin <= begin2 <= xend:
+					if xend < end2:
+						# Recording first part of event
+						time_match = (xend - begin2) * 60
+						kind = kind_offset + 4
+					else:
+						# Recording whole event
+						time_match = (end2 - begin2) * 60
+						kind = kind_offset + 2
+		else:
+			if begin < timer_begin <= end:
+				if timer_end < end:
+					# Recording within event
+					time_match = timer_end - timer_begin
+					kind = kind_offset + 3
+				else:
+					# Recording last part of event
+					time_match = end - timer_begin
+					kind = kind_offset + 1
+			elif timer_begin <= begin <= timer_end:
+				if timer_end < end:
+					# Recording first part of event
+					time_match = timer_end - begin
+					kind = kind_offset + 4
+				else:  # Recording whole event
+					time_match = end - begin
+					kind = kind_offset + 2
+		return time_match, kind
+
+	# Match an event against the index entries from getTimerCandidates()
+	# and return the isInTimer() result for it.
+	def matchCandidates(self, candidates, eventid, begin, end, duration, eventday, check_offset_time):
+		returnValue = None
+		for pos, x, parent, repeat in candidates:
+			if parent is not None and not self.isSubserviceInEvent(x, parent, eventid):
+				continue
+			time_match, kind = self.matchTimer(x, begin, end, duration, eventday, repeat, check_offset_time)
+			if time_match:
+				isAutoTimer = 0
+				if x.isAutoTimer == 1:
+					isAutoTimer |= 1
+				if x.ice_timer_id is not None:
+					isAutoTimer |= 2
+				returnValue = (time_match, kind, isAutoTimer)
+				if kind in (2, 7, 12):  # When full recording do not look further
+					break
 		return returnValue
 
+	def isInTimer(self, eventid, begin, duration, service):
+		check_offset_time = not config.recording.margin_before.value and not config.recording.margin_after.value
+		end = begin + duration
+		refstr = ':'.join(service.split(':')[:11])
+		bt = localtime(begin)
+		eventday = (bt.tm_wday, 1440 + bt.tm_hour * 60 + bt.tm_min, 1440 + bt.tm_hour * 60 + bt.tm_min + duration / 60)
+		candidates = self.getTimerCandidates(refstr, begin, end, bt.tm_wday)
+		return self.matchCandidates(candidates, eventid, begin, end, duration, eventday, check_offset_time)
+
+	# Bulk version of isInTimer() for a whole EPG page.
+	# events is a list of (service, eventid, begin, duration) tuples and
+	# the result is the list of isInTimer() results in the same order.
+	# The events of each service are swept in begin order against the
+	# service's single shot timers, so every timer is passed only once.
+	def getTimerMatches(self, events):
+		check_offset_time = not config.recording.margin_before.value and not config.recording.margin_after.value
+		index = self.getTimerIndex()
+		results = [None] * len(events)
+		refstrs = {}
+		services = {}
+		for idx, (service, eventid, begin, duration) in enumerate(events):
+			if not begin:
+				continue
+			refstr = refstrs.get(service)
+			if refstr is None:
+				refstr = refstrs[service] = ':'.join(service.split(':')[:11])
+			if refstr in index:
+				services.setdefault(refstr, []).append((begin, idx))
+		for refstr, service_events in services.iteritems():
+			begins, singles, maxspan, days = index[refstr]
+			repeats = any(days)
+			count = len(begins)
+			lo = hi = 0
+			edge = 0
+			service_events.sort()
+			for begin, idx in service_events:
+				eventid, duration = events[idx][1], events[idx][3]
+				end = begin + duration
+				# Single shot timers may be stretched by up to a minute at either end
+				while lo < count and begins[lo] < begin - maxspan[0] - 60:
+					lo += 1
+				edge = max(edge, end, begin + 59)
+				while hi < count and begins[hi] <= edge:
+					hi += 1
+				candidates = singles[lo:hi]
+				eventday = None
+				if repeats:
+					bt = localtime(begin)
+					eventday = (bt.tm_wday, 1440 + bt.tm_hour * 60 + bt.tm_min, 1440 + bt.tm_hour * 60 + bt.tm_min + duration / 60)
+					candidates += days[bt.tm_wday]
+				if candidates:
+					candidates.sort(key=itemgetter(0))
+					results[idx] = self.matchCandidates(candidates, eventid, begin, end, duration, eventday, check_offset_time)
+		return results
+
 	def removeEntry(self, entry):
 		# print "[RecordTimer] Remove " + str(entry)
 
@@ -1472,4 +1733,4 @@ class RecordTimer(timer.Timer):
 		self.saveTimer()
 
 	def shutdown(self):
-		self.saveTimer()
+		self.writeTimers()
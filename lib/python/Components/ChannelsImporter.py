@@ -7,6 +7,7 @@ from enigma import eTimer
 #for downloader
 import os, re, urllib2
 from enigma import eServiceReference, eDVBDB
+from Components.ServiceIndex import serviceIndex
 
 autoClientModeTimer = None
 def autostart():
@@ -239,6 +240,7 @@ class ChannelsImporter():
 		db = eDVBDB.getInstance()
 		db.reloadServicelist()
 		db.reloadBouquets()
+		serviceIndex.invalidate()
 		print "[ChannelsImporter][processFiles] New channel list loaded."
 		self.checkEPG()
 
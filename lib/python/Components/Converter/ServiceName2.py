@@ -21,6 +21,7 @@
 from Components.Converter.Converter import Converter
 from enigma import iServiceInformation, iPlayableService, iPlayableServicePtr, eServiceReference, eServiceCenter, eTimer, getBestPlayableServiceReference
 from Components.Element import cached
+from Components.ServiceIndex import serviceIndex
 from Components.config import config
 import NavigationInstance
 try:
@@ -76,57 +77,19 @@ class ServiceName2(Converter, object):
 		self.AlternativeControl = self.isAdditionalService(type=1)
 
 	def isAdditionalService(self, type=0):
-		def searchService(serviceHandler, bouquet):
-			istype = False
-			servicelist = serviceHandler.list(bouquet)
-			if not servicelist is None:
-				while True:
-					s = servicelist.getNext()
-					if not s.valid(): break
-					if not (s.flags & (eServiceReference.isMarker|eServiceReference.isDirectory)):
-						if type:
-							if s.flags & eServiceReference.isGroup:
-								istype = True
-								return istype
-						else:
-							if "%3a//" in s.toString().lower(): 
-								istype = True
-								return istype
-			return istype
-
-		isService = False
-		serviceHandler = eServiceCenter.getInstance()
 		if not config.usage.multibouquet.value:
 			service_types_tv = '1:7:1:0:0:0:0:0:0:0:(type == 1) || (type == 17) || (type == 22) || (type == 25) || (type == 134) || (type == 195)'
 			rootstr = '%s FROM BOUQUET "userbouquet.favourites.tv" ORDER BY bouquet'%(service_types_tv)
+			bouquets = [eServiceReference(rootstr)]
 		else:
 			rootstr = '1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "bouquets.tv" ORDER BY bouquet'
-		bouquet = eServiceReference(rootstr)
-		if not config.usage.multibouquet.value:
-			isService = searchService(serviceHandler, bouquet)
-		else:
-			bouquetlist = serviceHandler.list(bouquet)
-			if not bouquetlist is None:
-				while True:
-					bouquet = bouquetlist.getNext()
-					if not bouquet.valid(): break
-					if bouquet.flags & eServiceReference.isDirectory:
-						isService = searchService(serviceHandler, bouquet)
-						if isService: break
-		return isService 
+			bouquets = serviceIndex.getBouquets(eServiceReference(rootstr))
+		for bouquet in bouquets:
+			if serviceIndex.getBouquetFlags(bouquet)[type and 1 or 0]:
+				return True
+		return False
 
 	def getServiceNumber(self, ref):
-		def searchHelper(serviceHandler, num, bouquet, is_target):
-			servicelist = serviceHandler.list(bouquet)
-			if not servicelist is None:
-				while True:
-					s = servicelist.getNext()
-					if not s.valid(): break
-					if not (s.flags & (eServiceReference.isMarker|eServiceReference.isDirectory)):
-						num += 1
-						if s == ref and is_target: return s, num
-			return None, num
-
 		if isinstance(ref, eServiceReference):
 			isRadioService = ref.getData(0) in (2,10)
 			lastpath = isRadioService and config.radio.lastroot.value or config.tv.lastroot.value
@@ -148,25 +111,22 @@ class ServiceName2(Converter, object):
 			serviceHandler = eServiceCenter.getInstance()
 			if acount is True or not config.usage.multibouquet.value:
 				bouquet = eServiceReference(rootstr)
-				service, number = searchHelper(serviceHandler, 0, bouquet, True)
+				number = serviceIndex.getServicePosition(bouquet, ref)[0]
 			else:
 				if isRadioService:
 					bqrootstr = '1:7:2:0:0:0:0:0:0:0:FROM BOUQUET "bouquets.radio" ORDER BY bouquet'
 				else:
 					bqrootstr = '1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "bouquets.tv" ORDER BY bouquet'
 				number = 0
-				service = None
 				cur = eServiceReference(rootstr)
-				bouquet = eServiceReference(bqrootstr)
-				bouquetlist = serviceHandler.list(bouquet)
-				if not bouquetlist is None:
-					while True:
-						bouquet = bouquetlist.getNext()
-						if not bouquet.valid(): break
-						if bouquet.flags & eServiceReference.isDirectory:
-							service, number = searchHelper(serviceHandler, number, bouquet, cur == bouquet)
-							if not service is None and cur == bouquet: break
-			if not service is None:
+				offset = 0
+				for bouquet in serviceIndex.getBouquets(eServiceReference(bqrootstr)):
+					position, count = serviceIndex.getServicePosition(bouquet, ref)
+					if cur == bouquet:
+						number = position and offset + position
+						break
+					offset += count
+			if number:
 				info = serviceHandler.info(bouquet)
 				name = info and info.getName(bouquet) or ''
 				return number, name
@@ -174,26 +134,7 @@ class ServiceName2(Converter, object):
 
 	def getProviderName(self, ref):
 		if isinstance(ref, eServiceReference):
-			from Screens.ChannelSelection import service_types_radio, service_types_tv
-			typestr = ref.getData(0) in (2,10) and service_types_radio or service_types_tv
-			pos = typestr.rfind(':')
-			rootstr = '%s (channelID == %08x%04x%04x) && %s FROM PROVIDERS ORDER BY name' %(typestr[:pos+1],ref.getUnsignedData(4),ref.getUnsignedData(2),ref.getUnsignedData(3),typestr[pos+1:])
-			provider_root = eServiceReference(rootstr)
-			serviceHandler = eServiceCenter.getInstance()
-			providerlist = serviceHandler.list(provider_root)
-			if not providerlist is None:
-				while True:
-					provider = providerlist.getNext()
-					if not provider.valid(): break
-					if provider.flags & eServiceReference.isDirectory:
-						servicelist = serviceHandler.list(provider)
-						if not servicelist is None:
-							while True:
-								service = servicelist.getNext()
-								if not service.valid(): break
-								if service == ref:
-									info = serviceHandler.info(provider)
-									return info and info.getName(provider) or "Unknown"
+			return serviceIndex.getProviderName(ref)
 		return ""
 
 	def getTransponderInfo(self, info, ref, fmt):
@@ -0,0 +1,117 @@
+import os
+import stat
+import threading
+from time import time
+
+# Sizes and counts of directory trees, (bytes, files, dirs), cached per
+# directory. A directory is only listed again when its mtime changed, which
+# happens when entries are added, removed or renamed, or when its entry is
+# older than MAX_AGE seconds, so files that grew are picked up as well.
+# Bringing a tree up to date then costs a stat per directory instead of a
+# stat per file.
+#
+# UI code should use get(), which never touches the disk, and refresh(),
+# which updates the tree in a thread and calls back on the main thread.
+
+MAX_AGE = 300
+
+class _DirectoryEntry:
+	def __init__(self, mtime, bytes, files, subdirs):
+		self.mtime = mtime
+		self.scanned = time()
+		self.bytes = bytes
+		self.files = files
+		self.subdirs = subdirs
+		self.totals = None
+
+class DirectoryStats:
+	def __init__(self):
+		self.entries = {}
+		self.pending = {}
+		self.lock = threading.RLock()
+
+	# Returns the cached (bytes, files, dirs) of the tree, or None
+	def get(self, path):
+		entry = self.entries.get(os.path.normpath(path))
+		return entry and entry.totals
+
+	# Brings the tree up to date and returns its (bytes, files, dirs)
+	def getStats(self, path):
+		with self.lock:
+			return self.update(os.path.normpath(path))
+
+	# Brings the tree up to date in a thread and calls callback(path, stats)
+	def refresh(self, path, callback=None):
+		from twisted.internet import threads
+		path = os.path.normpath(path)
+		callbacks = self.pending.get(path)
+		if callbacks is not None:
+			callbacks.append(callback)
+			return
+		self.pending[path] = [callback]
+		threads.deferToThread(self.getStats, path).addBoth(self.refreshed, path)
+
+	def refreshed(self, stats, path):
+		if not isinstance(stats, tuple):
+			print "[DirectoryStats] Failed to update %s:" % path, stats.getErrorMessage()
+			stats = self.get(path) or (0, 0, 0)
+		for callback in self.pending.pop(path, []):
+			if callback is not None:
+				callback(path, stats)
+
+	# Drops the cached entries of a tree, e.g. after it was deleted
+	def invalidate(self, path):
+		path = os.path.normpath(path)
+		prefix = os.path.join(path, "")
+		with self.lock:
+			for name in [name for name in self.entries if name == path or name.startswith(prefix)]:
+				del self.entries[name]
+
+	def update(self, path):
+		try:
+			st = os.stat(path)
+		except OSError:
+			self.invalidate(path)
+			return (0, 0, 0)
+		entry = self.entries.get(path)
+		if entry is None or entry.mtime != st.st_mtime or time() - entry.scanned > MAX_AGE:
+			scanned = self.scan(path, st.st_mtime)
+			if entry is not None:
+				for name in set(entry.subdirs) - set(scanned.subdirs):
+					self.invalidate(os.path.join(path, name))
+			entry = self.entries[path] = scanned
+		bytes, files, dirs = entry.bytes, entry.files, len(entry.subdirs)
+		for name in entry.subdirs:
+			subbytes, subfiles, subdirs = self.update(os.path.join(path, name))
+			bytes += subbytes
+			files += subfiles
+			dirs += subdirs
+		entry.totals = (bytes, files, dirs)
+		return entry.totals
+
+	def scan(self, path, mtime):
+		bytes = files = 0
+		subdirs = []
+		try:
+			names = os.listdir(path)
+		except OSError:
+			names = []
+		for name in names:
+			fn = os.path.join(path, name)
+			try:
+				st = os.lstat(fn)
+				if stat.S_ISDIR(st.st_mode):
+					subdirs.append(name)
+					continue
+				if stat.S_ISLNK(st.st_mode):
+					# links to directories are not followed, like os.walk does
+					st = os.stat(fn)
+					if stat.S_ISDIR(st.st_mode):
+						continue
+			except OSError:
+				continue
+			bytes += st.st_size
+			files += 1
+		return _DirectoryEntry(mtime, bytes, files, subdirs)
+
+directoryStats = DirectoryStats()
@@ -1,7 +1,7 @@
 import skin
 from time import localtime, time, strftime
 
-from enigma import eEPGCache, eListbox, eListboxPythonMultiContent, loadPNG, gFont, getDesktop, eRect, eSize, RT_HALIGN_LEFT, RT_HALIGN_RIGHT, RT_HALIGN_CENTER, RT_VALIGN_CENTER, RT_VALIGN_TOP, RT_WRAP, BT_SCALE, BT_KEEP_ASPECT_RATIO
+from enigma import eEPGCache, eListbox, eListboxPythonMultiContent, gFont, getDesktop, eRect, eSize, RT_HALIGN_LEFT, RT_HALIGN_RIGHT, RT_HALIGN_CENTER, RT_VALIGN_CENTER, RT_VALIGN_TOP, RT_WRAP, BT_SCALE, BT_KEEP_ASPECT_RATIO
 
 from HTMLComponent import HTMLComponent
 from GUIComponent import GUIComponent
@@ -9,12 +9,13 @@ from Components.MultiContent import MultiContentEntryText, MultiContentEntryPixm
 from Components.Renderer.Picon import getPiconName
 from skin import parseFont
 from Tools.Alternatives import CompareWithAlternatives
-from Tools.LoadPixmap import LoadPixmap
+from Tools.LoadPixmap import LoadPixmap, pixmapCache
 from Components.config import config
 from ServiceReference import ServiceReference
 from Tools.ExtraAttributes import applyExtraSkinAttributes
 from Tools.Directories import resolveFilename, SCOPE_ACTIVE_SKIN
 from Tools.TextBoundary import getTextBoundarySize
+from Components.EpgWindowCache import epgWindowCache
 
 EPG_TYPE_SINGLE = 0
 EPG_TYPE_MULTI = 1
@@ -26,6 +27,10 @@ EPG_TYPE_INFOBARGRAPH = 7
 
 MAX_TIMELINES = 6
 
+# lookupEvent specs of the graphical EPG pages and the multi EPG steps
+GRAPH_EPG_SPEC = 'XRnITBD'  # service ref, service name, event id, event title, begin time, duration
+MULTI_EPG_SPEC = 'XRIBDTCn'
+
 class Rect:
 	def __init__(self, x, y, width, height):
 		self.x = x
@@ -158,6 +163,7 @@ class EPGList(HTMLComponent, GUIComponent):
 
 		self.overjump_empty = overjump_empty
 		self.timer = timer
+		self.timerMatches = None
 		self.onSelChanged = []
 		if selChangedCB is not None:
 			self.onSelChanged.append(selChangedCB)
@@ -293,6 +299,12 @@ class EPGList(HTMLComponent, GUIComponent):
 		self.eventNamePadding = 3
 		self.numberOfRows = None
 
+		# built graph EPG rows by service, see buildGraphEntry
+		self.graphRows = {}
+		self.graphLayout = None
+		self.graphTimerIndex = None
+		self.graphGeneration = 0
+
 	# Keep old selfs.offs attribute as a do-nothing property.
 
 	def __getOffs(self):
@@ -580,6 +592,9 @@ class EPGList(HTMLComponent, GUIComponent):
 			instance.setContent(self.l)
 
 	def preWidgetRemove(self, instance):
+		if self.type in (EPG_TYPE_MULTI, EPG_TYPE_GRAPH, EPG_TYPE_INFOBARGRAPH):
+			epgWindowCache.cancelPrefetch()
+			print "[EPGList] EPG window cache:", epgWindowCache.getStatistics()
 		if self.type in (EPG_TYPE_GRAPH, EPG_TYPE_INFOBARGRAPH):
 			instance.selectionChanged.get().remove(self.serviceChanged)
 			instance.setContent(None)
@@ -672,10 +687,22 @@ class EPGList(HTMLComponent, GUIComponent):
 		xpos, width = self.calcEntryPosAndWidthHelper(ev_start, ev_duration, time_base, time_base + time_epoch * 60, event_rect.w)
 		return xpos + event_rect.x, width
 
+	# Look up the timer matches of all the events of the list in one go,
+	# events is a list of (service, event_id, begin_time, duration) tuples.
+	def fillTimerMatches(self, events):
+		self.timerMatches = None
+		if events:
+			matches = self.timer.getTimerMatches(events)
+			self.timerMatches = (self.timer.getTimerIndex(), dict(zip(events, matches)))
+
 	def getPixmapForEntry(self, service, eventId, beginTime, duration):
 		if not beginTime:
 			return None
-		rec = self.timer.isInTimer(eventId, beginTime, duration, service)
+		# Use the matches from the last fill as long as the timers haven't changed
+		if self.timerMatches is not None and self.timerMatches[0] is self.timer.getTimerIndex() and (service, eventId, beginTime, duration) in self.timerMatches[1]:
+			rec = self.timerMatches[1][(service, eventId, beginTime, duration)]
+		else:
+			rec = self.timer.isInTimer(eventId, beginTime, duration, service)
 		if rec is not None:
 			self.wasEntryAutoTimer = bool(rec[2] & 1)
 			self.wasEntryIceTV = bool(rec[2] & 2)
@@ -835,6 +862,17 @@ class EPGList(HTMLComponent, GUIComponent):
 			res.append((eListboxPythonMultiContent.TYPE_TEXT, r5.x, r5.y, width, r5.h, 0, RT_HALIGN_LEFT | RT_VALIGN_CENTER, EventName))
 		return res
 
+	# The key of everything a graph EPG row depends on besides its own data
+	# and selection; the time is in minutes for the current event colours
+	def getGraphLayout(self):
+		r1 = self.service_rect
+		r2 = self.event_rect
+		return (self.graphGeneration, self.time_base, self.time_epoch,
+			r1.x, r1.y, r1.w, r1.h, r2.x, r2.y, r2.w, r2.h,
+			self.showPicon, self.showServiceTitle, self.showServiceNumber,
+			self.currentlyPlaying and self.currentlyPlaying.toString(),
+			int(time()) / 60)
+
 	def buildGraphEntry(self, service, service_name, events, picon, channel):
 		r1 = self.service_rect
 		r2 = self.event_rect
@@ -843,6 +881,22 @@ class EPGList(HTMLComponent, GUIComponent):
 		width = r2.w
 		height = r2.h
 		selected = (self.cur_service is not None) and (self.cur_service[0] == service)
+
+		# Rows are built once per page and layout and reused for every
+		# repaint, only rows whose selected event changed are built again
+		layout = self.getGraphLayout()
+		timerIndex = self.timer.getTimerIndex()
+		if layout != self.graphLayout or timerIndex is not self.graphTimerIndex:
+			self.graphLayout = layout
+			self.graphTimerIndex = timerIndex
+			self.graphRows = {}
+		rowKey = self.select_rect.x if selected and self.select_rect else None
+		# a service can be in the list more than once, with another channel
+		# number and picon, so rows are kept per service and channel
+		row = self.graphRows.get((service, channel))
+		if row is not None and row[0] == rowKey:
+			return row[1]
+
 		res = [None]
 
 		borderPixmaps = None
@@ -881,7 +935,7 @@ class EPGList(HTMLComponent, GUIComponent):
 			piconWidth = self.picon_size.width()
 			piconHeight = self.picon_size.height()
 			if picon != "":
-				displayPicon = loadPNG(picon)
+				displayPicon = pixmapCache.load(picon)
 			if displayPicon is not None:
 				res.append(MultiContentEntryPixmapAlphaBlend(
 					pos=(r1.x + self.serviceBorderWidth, r1.y + self.serviceBorderWidth),
@@ -1111,6 +1165,7 @@ class EPGList(HTMLComponent, GUIComponent):
 								res.append(MultiContentEntryPixmapAlphaBlend(
 									pos=(pos[0] - iconOffset, pos[1]), size=(21, 21),
 									png=self.icetvicon))
+		self.graphRows[(service, channel)] = (rowKey, res)
 		return res
 
 	def getSelectionPosition(self, serviceref):
@@ -1265,24 +1320,33 @@ class EPGList(HTMLComponent, GUIComponent):
 		test = [(service.ref.toString(), 0, stime) for service in services]
 		test.insert(0, 'X0RIBDTCn')
 		self.list = self.queryEPG(test)
+		self.fillTimerMatches([(x[1], x[2], x[3], x[4]) for x in self.list])
 		self.l.setList(self.list)
 		self.recalcEntrySize()
 		self.selectionChanged()
+		self.prefetchMultiEPG()
 
 	def updateMultiEPG(self, direction):
-		test = [x[3] and (x[1], direction, x[3]) or (x[1], direction, 0) for x in self.list]
-		test.insert(0, 'XRIBDTCn')
-		epg_data = self.queryEPG(test)
+		test = [(x[1], direction, x[3] or 0) for x in self.list]
+		epg_data = epgWindowCache.lookup(MULTI_EPG_SPEC, test)
 		cnt = 0
-		for x in epg_data:
+		for records in epg_data:
 			changecount = self.list[cnt][0] + direction
-			if changecount >= 0:
+			if changecount >= 0 and records:
+				x = records[0]
 				if x[2] is not None:
 					self.list[cnt] = (changecount, x[0], x[1], x[2], x[3], x[4], x[5], x[6])
 			cnt += 1
+		self.fillTimerMatches([(x[1], x[2], x[3], x[4]) for x in self.list])
 		self.l.setList(self.list)
 		self.recalcEntrySize()
 		self.selectionChanged()
+		self.prefetchMultiEPG()
+
+	# Looks up the next and previous events of every service in the background
+	def prefetchMultiEPG(self):
+		test = [(x[1], direction, x[3] or 0) for direction in (1, -1) for x in self.list if x[1]]
+		epgWindowCache.prefetch(MULTI_EPG_SPEC, test)
 
 	def getCurrentCursorLocation(self):
 		return self.time_base
@@ -1325,48 +1389,51 @@ class EPGList(HTMLComponent, GUIComponent):
 		if stime is not None:
 			self.time_base = int(stime)
 		if services is None:
-			time_base = self.getTimeBase()
-			test = [(service[0], 0, time_base, self.time_epoch) for service in self.list]
+			refs = [service[0] for service in self.list]
 			serviceList = self.list
 			piconIdx = 3
 			channelIdx = 4
 		else:
 			self.cur_event = None
 			self.cur_service = None
-			test = [(service.ref.toString(), 0, self.time_base, self.time_epoch) for service in services]
+			refs = [service.ref.toString() for service in services]
 			serviceList = services
 			piconIdx = 0
 			channelIdx = None
 
-		test.insert(0, 'XRnITBD')  # return record, service ref, service name, event id, event title, begin time, duration
-		epg_data = self.queryEPG(test)
+		time_base = self.getTimeBase()
+		test = [(ref, 0, time_base, self.time_epoch) for ref in refs]
+		epg_data = epgWindowCache.lookup(GRAPH_EPG_SPEC, test)
+		self.graphGeneration += 1
 		self.list = []
-		tmp_list = None
-		service = ""
-		sname = ""
-
-		serviceIdx = 0
-		for x in epg_data:
-			if service != x[0]:
-				if tmp_list is not None:
-					picon = None if piconIdx == 0 else serviceList[serviceIdx][piconIdx]
-					# We pass the serviceref if we don't have the channel number yet, so it can be grabbed
-					channel = serviceList[serviceIdx] if (channelIdx == None) else serviceList[serviceIdx][channelIdx] 
-					self.list.append((service, sname, tmp_list[0][0] is not None and tmp_list or None, picon, channel))
-					serviceIdx += 1
-				service = x[0]
-				sname = x[1]
-				tmp_list = []
-			tmp_list.append((x[2], x[3], x[4], x[5]))  # (event_id, event_title, begin_time, duration)
-		if tmp_list and len(tmp_list):
+		for serviceIdx, records in enumerate(epg_data):
+			if not records:
+				continue
+			# (event_id, event_title, begin_time, duration)
+			events = [(x[2], x[3], x[4], x[5]) for x in records]
 			picon = None if piconIdx == 0 else serviceList[serviceIdx][piconIdx]
+			# We pass the serviceref if we don't have the channel number yet, so it can be grabbed
 			channel = serviceList[serviceIdx] if (channelIdx == None) else serviceList[serviceIdx][channelIdx]
-			self.list.append((service, sname, tmp_list[0][0] is not None and tmp_list or None, picon, channel))
-			serviceIdx += 1
+			self.list.append((records[0][0], records[0][1], events[0][0] is not None and events or None, picon, channel))
 
+		self.fillTimerMatches([(x[0], ev[0], ev[2], ev[3]) for x in self.list if x[2] for ev in x[2]])
 		self.l.setList(self.list)
 		self.recalcEntrySize()
 		self.findBestEvent()
+		self.prefetchGraphEPG()
+
+	# Looks up the previous and next time page and, when given, the current
+	# page of other services (e.g. of the neighbouring bouquets) in the
+	# background, so paging is served from the EPG window cache
+	def prefetchGraphEPG(self, services=None):
+		time_base = self.getTimeBase()
+		epoch = self.time_epoch * 60
+		refs = [x[0] for x in self.list]
+		test = [(ref, 0, time_base + epoch, self.time_epoch) for ref in refs]
+		test += [(ref, 0, time_base - epoch, self.time_epoch) for ref in refs]
+		if services:
+			test += [(service.ref.toString(), 0, time_base, self.time_epoch) for service in services]
+		epgWindowCache.prefetch(GRAPH_EPG_SPEC, test)
 
 	def sortSingleEPG(self, type):
 		list = self.list
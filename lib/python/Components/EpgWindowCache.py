@@ -0,0 +1,129 @@
+from collections import OrderedDict
+from time import time
+
+from enigma import eEPGCache, eTimer
+
+# Results of eEPGCache.lookupEvent for the graphical and multi EPG, per
+# lookup spec and query, e.g. ("XRnITBD", (ref, 0, begin, minutes)) for the
+# events of one service in one time page. The entries are kept in least
+# recently used order, up to MAX_ENTRIES, and are looked up again after
+# MAX_AGE seconds so newly received EPG data shows up.
+#
+# The spec must start with "XR", so every query returns at least one record
+# and each record starts with the service reference.
+#
+# prefetch() queues lookups, e.g. of the neighbouring time pages, which are
+# done in PREFETCH_CHUNK sized parts while the user is not pressing keys.
+
+MAX_ENTRIES = 5000
+MAX_AGE = 300
+PREFETCH_CHUNK = 20
+PREFETCH_DELAY = 300
+
+class EPGWindowCache:
+	def __init__(self):
+		self.entries = OrderedDict()
+		self.pending = []
+		self.prefetchTimer = None
+		self.hits = 0
+		self.misses = 0
+		self.prefetched = 0
+
+	def get(self, key):
+		entry = self.entries.pop(key, None)
+		if entry is None or time() - entry[0] > MAX_AGE:
+			return None
+		self.entries[key] = entry
+		return entry[1]
+
+	def put(self, key, records):
+		self.entries.pop(key, None)
+		self.entries[key] = (time(), records)
+		while len(self.entries) > MAX_ENTRIES:
+			self.entries.popitem(last=False)
+
+	def clear(self):
+		self.entries.clear()
+		del self.pending[:]
+
+	# Returns a list of records for each query
+	def lookup(self, spec, queries):
+		results = [self.get((spec, query)) for query in queries]
+		missing = [query for query, records in zip(queries, results) if records is None]
+		self.hits += len(queries) - len(missing)
+		self.misses += len(missing)
+		if missing:
+			fetched = self.query(spec, missing)
+			results = [records if records is not None else fetched[query] for query, records in zip(queries, results)]
+		return results
+
+	# Queries the EPG and returns {query: records}
+	def query(self, spec, queries):
+		fetched = {}
+		queries = list(OrderedDict.fromkeys(queries))
+		while queries:
+			# the records are told apart by service, so a service may only
+			# be looked up once per call
+			batch, services, rest = [], set(), []
+			for query in queries:
+				if query[0] in services:
+					rest.append(query)
+				else:
+					services.add(query[0])
+					batch.append(query)
+			fetched.update(self.queryBatch(spec, batch))
+			queries = rest
+		return fetched
+
+	def queryBatch(self, spec, queries):
+		epgcache = eEPGCache.getInstance()
+		data = epgcache and epgcache.lookupEvent([spec] + queries) or []
+		groups = []
+		for x in data:
+			if not groups or groups[-1][0][0] != x[0]:
+				groups.append([])
+			groups[-1].append(x)
+		if len(groups) == len(queries):
+			fetched = dict(zip(queries, groups))
+		else:
+			# should not happen with "X", match them by service instead
+			byService = dict((records[0][0], records) for records in groups)
+			fetched = dict((query, byService.get(query[0], [])) for query in queries)
+		for query, records in fetched.iteritems():
+			self.put((spec, query), records)
+		return fetched
+
+	# Queues lookups to be done in the background, replacing those that are
+	# still pending
+	def prefetch(self, spec, queries):
+		self.pending = [(spec, query) for query in queries]
+		if self.prefetchTimer is None:
+			self.prefetchTimer = eTimer()
+			self.prefetchTimer.callback.append(self.prefetchNext)
+		self.prefetchTimer.start(PREFETCH_DELAY, True)
+
+	def prefetchNext(self):
+		chunk = []
+		while self.pending and len(chunk) < PREFETCH_CHUNK:
+			spec, query = self.pending.pop(0)
+			if self.get((spec, query)) is None:
+				if chunk and chunk[0][0] != spec:
+					self.pending.insert(0, (spec, query))
+					break
+				chunk.append((spec, query))
+		if chunk:
+			self.query(chunk[0][0], [query for spec, query in chunk])
+			self.prefetched += len(chunk)
+		if self.pending:
+			self.prefetchTimer.start(PREFETCH_DELAY, True)
+
+	def cancelPrefetch(self):
+		del self.pending[:]
+		if self.prefetchTimer is not None:
+			self.prefetchTimer.stop()
+
+	def getStatistics(self):
+		total = self.hits + self.misses
+		return "%d entries, %d hits, %d misses (%d%% hits), %d prefetched" % (len(self.entries), self.hits, self.misses, total and 100 * self.hits / total, self.prefetched)
+
+epgWindowCache = EPGWindowCache()
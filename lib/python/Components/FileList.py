@@ -6,6 +6,7 @@ from Tools.Directories import SCOPE_ACTIVE_SKIN, resolveFilename, fileExists, pa
 from enigma import RT_HALIGN_LEFT, eListboxPythonMultiContent, \
 	eServiceReference, eServiceReferenceFS, eServiceCenter, gFont, getDesktop
 from Tools.LoadPixmap import LoadPixmap
+from Tools.ScanDir import scanDirectory
 import skin
 
 EXTENSIONS = {
@@ -58,28 +59,51 @@ EXTENSIONS = {
 		"webm": "movie",
 	}
 
+# The icons of the file types, resolved in the skin once per type as the
+# entries are built on every repaint
+fileIcons = {}
+
+def getFileIcon(name, isDir):
+	if isDir:
+		filetype = "directory"
+	else:
+		filetype = EXTENSIONS.get(name.split('.')[-1].lower())
+		if filetype is None:
+			return None
+	if filetype not in fileIcons:
+		fileIcons[filetype] = LoadPixmap(cached=True, path=resolveFilename(SCOPE_ACTIVE_SKIN, "extensions/" + filetype + ".png"))
+	return fileIcons[filetype]
+
 def FileEntryComponent(name, absolute=None, isDir=False):
 	res = [ (absolute, isDir) ]
 	x, y, w, h = skin.parameters.get("FileListName",(35, 1, 470, 20))
 	res.append((eListboxPythonMultiContent.TYPE_TEXT, x, y, w, h, 0, RT_HALIGN_LEFT, name))
-	if isDir:
-		png = LoadPixmap(cached=True, path=resolveFilename(SCOPE_ACTIVE_SKIN, "extensions/directory.png"))
-	else:
-		extension = name.split('.')
-		extension = extension[-1].lower()
-		if extension in EXTENSIONS:
-			png = LoadPixmap(resolveFilename(SCOPE_ACTIVE_SKIN, "extensions/" + EXTENSIONS[extension] + ".png"))
-		else:
-			png = None
+	png = getFileIcon(name, isDir)
 	if png is not None:
 		x, y, w, h = skin.parameters.get("FileListIcon",(10, 2, 20, 20))
 		res.append((eListboxPythonMultiContent.TYPE_PIXMAP_ALPHABLEND, x, y, w, h, png))
 
 	return res
 
+# Returns the subdirectories of a directory, as paths ending in '/', and its
+# files, both sorted by name, and the set of names that are symbolic links
+def listDirectory(directory):
+	try:
+		entries = scanDirectory(directory)
+	except OSError:
+		entries = []
+	entries.sort()
+	directories = [directory + name + "/" for name, isDir, isLink in entries if isDir]
+	files = [name for name, isDir, isLink in entries if not isDir]
+	links = set([name for name, isDir, isLink in entries if isLink])
+	return directories, files, links
+
 class FileList(MenuList):
 	def __init__(self, directory, showDirectories=True, showFiles=True, showMountpoints=True, matchingPattern=None, useServiceRef=False, inhibitDirs=False, inhibitMounts=False, isTop=False, enableWrapAround=False, additionalExtensions=None):
 		MenuList.__init__(self, list, enableWrapAround, eListboxPythonMultiContent)
+		# The list holds ((absolute, isDir, ...), name) tuples, the entries
+		# are only built for the rows on screen.
+		self.l.setBuildFunc(self.buildEntry)
 		self.additional_extensions = additionalExtensions
 		self.mountpoints = []
 		self.current_directory = None
@@ -129,6 +153,9 @@ class FileList(MenuList):
 				file = os.path.dirname(file)
 			return os.path.join(last, "")
 
+	def buildEntry(self, data, name):
+		return FileEntryComponent(name=name, absolute=data[0], isDir=data[1])
+
 	def getSelection(self):
 		if self.l.getCurrentSelection() is None:
 			return None
@@ -171,7 +198,7 @@ class FileList(MenuList):
 			for p in harddiskmanager.getMountedPartitions():
 				path = os.path.join(p.mountpoint, "")
 				if path not in self.inhibitMounts and not self.inParentDirs(path, self.inhibitDirs):
-					self.list.append(FileEntryComponent(name=p.description, absolute=path, isDir=True))
+					self.list.append(((path, True), p.description))
 			files = []
 			directories = []
 		elif directory is None:
@@ -199,28 +226,19 @@ class FileList(MenuList):
 			files.sort()
 		else:
 			if fileExists(directory):
-				try:
-					files = os.listdir(directory)
-				except:
-					files = []
-				files.sort()
-				tmpfiles = files[:]
-				for x in tmpfiles:
-					if os.path.isdir(directory + x):
-						directories.append(directory + x + "/")
-						files.remove(x)
+				directories, files, links = listDirectory(directory)
 
 		if directory is not None and self.showDirectories and not self.isTop:
 			if directory == self.current_mountpoint and self.showMountpoints:
-				self.list.append(FileEntryComponent(name="<" + _("List of storage devices") + ">", absolute=None, isDir=True))
+				self.list.append(((None, True), "<" + _("List of storage devices") + ">"))
 			elif (directory != "/") and not (self.inhibitMounts and self.getMountpoint(directory) in self.inhibitMounts):
-				self.list.append(FileEntryComponent(name="<" + _("Parent directory") + ">", absolute='/'.join(directory.split('/')[:-2]) + '/', isDir=True))
+				self.list.append((('/'.join(directory.split('/')[:-2]) + '/', True), "<" + _("Parent directory") + ">"))
 
 		if self.showDirectories:
 			for x in directories:
 				if not (self.inhibitMounts and self.getMountpoint(x) in self.inhibitMounts) and not self.inParentDirs(x, self.inhibitDirs):
 					name = x.split('/')[-2]
-					self.list.append(FileEntryComponent(name=name, absolute=x, isDir=True))
+					self.list.append(((x, True), name))
 
 		if self.showFiles:
 			for x in files:
@@ -232,10 +250,10 @@ class FileList(MenuList):
 					name = x
 
 				if (self.matchingPattern is None) or self.matchingPattern.search(path):
-					self.list.append(FileEntryComponent(name=name, absolute=x , isDir=False))
+					self.list.append(((x , False), name))
 
 		if self.showMountpoints and len(self.list) == 0:
-			self.list.append(FileEntryComponent(name=_("nothing connected"), absolute=None, isDir=False))
+			self.list.append(((None, False), _("nothing connected")))
 
 		self.l.setList(self.list)
 
@@ -306,15 +324,7 @@ def MultiFileSelectEntryComponent(name, absolute=None, isDir=False, selected=Fal
 		x, y, w, h = skin.parameters.get("FileListMultiLock",(2, 0, 25, 25))
 		res.append((eListboxPythonMultiContent.TYPE_PIXMAP_ALPHABLEND, x, y, w, h, icon))
 
-	if isDir:
-		png = LoadPixmap(cached=True, path=resolveFilename(SCOPE_ACTIVE_SKIN, "extensions/directory.png"))
-	else:
-		extension = name.split('.')
-		extension = extension[-1].lower()
-		if extension in EXTENSIONS:
-			png = LoadPixmap(resolveFilename(SCOPE_ACTIVE_SKIN, "extensions/" + EXTENSIONS[extension] + ".png"))
-		else:
-			png = None
+	png = getFileIcon(name, isDir)
 
 	if png is not None:
 		x, y, w, h = skin.parameters.get("FileListMultiIcon",(30, 2, 20, 20))
@@ -346,10 +356,12 @@ class MultiFileSelectList(FileList):
 		for f in self.onSelectionChanged:
 			f()
 
+	def buildEntry(self, data):
+		return MultiFileSelectEntryComponent(name=data[3], absolute=data[0], isDir=data[1], selected=data[2])
+
 	def changeSelectionState(self):
 		if len(self.list):
 			idx = self.l.getCurrentSelectionIndex()
-			newList = self.list[:]
 			x = self.list[idx]
 			if not x[0][3].startswith('<'):
 				if x[0][1] is True:
@@ -369,9 +381,8 @@ class MultiFileSelectList(FileList):
 					SelectState = True
 					if (realPathname not in self.selectedFiles) and (os.path.normpath(realPathname) not in self.selectedFiles):
 						self.selectedFiles.append(realPathname)
-				newList[idx] = MultiFileSelectEntryComponent(name=x[0][3], absolute=x[0][0], isDir=x[0][1], selected=SelectState)
-			self.list = newList
-			self.l.setList(self.list)
+				self.list[idx] = ((x[0][0], x[0][1], SelectState, x[0][3]),)
+				self.l.invalidateEntry(idx)
 
 	def getSelectedList(self):
 		selectedFilesExist = []
@@ -397,7 +408,7 @@ class MultiFileSelectList(FileList):
 			for p in harddiskmanager.getMountedPartitions():
 				path = os.path.join(p.mountpoint, "")
 				if path not in self.inhibitMounts and not self.inParentDirs(path, self.inhibitDirs):
-					self.list.append(MultiFileSelectEntryComponent(name=p.description, absolute=path, isDir=True))
+					self.list.append(((path, True, False, p.description),))
 			files = []
 			directories = []
 		elif directory is None:
@@ -424,29 +435,20 @@ class MultiFileSelectList(FileList):
 			files.sort()
 		else:
 			if fileExists(directory):
-				try:
-					files = os.listdir(directory)
-				except:
-					files = []
-				files.sort()
-				tmpfiles = files[:]
-				for x in tmpfiles:
-					if os.path.isdir(directory + x):
-						directories.append(directory + x + "/")
-						files.remove(x)
+				directories, files, links = listDirectory(directory)
 
 		if directory is not None and self.showDirectories and not self.isTop:
 			if directory == self.current_mountpoint and self.showMountpoints:
-				self.list.append(MultiFileSelectEntryComponent(name="<" + _("List of storage devices") + ">", absolute=None, isDir=True))
+				self.list.append(((None, True, False, "<" + _("List of storage devices") + ">"),))
 			elif (directory != "/") and not (self.inhibitMounts and self.getMountpoint(directory) in self.inhibitMounts):
-				self.list.append(MultiFileSelectEntryComponent(name="<" + _("Parent directory") + ">", absolute='/'.join(directory.split('/')[:-2]) + '/', isDir=True))
+				self.list.append((('/'.join(directory.split('/')[:-2]) + '/', True, False, "<" + _("Parent directory") + ">"),))
 
 		if self.showDirectories:
 			for x in directories:
 				if not (self.inhibitMounts and self.getMountpoint(x) in self.inhibitMounts) and not self.inParentDirs(x, self.inhibitDirs):
 					name = x.split('/')[-2]
 					alreadySelected = (x in self.selectedFiles) or (os.path.normpath(x) in self.selectedFiles)
-					self.list.append(MultiFileSelectEntryComponent(name=name, absolute=x, isDir=True, selected=alreadySelected))
+					self.list.append(((x, True, alreadySelected, name),))
 
 		if self.showFiles:
 			for x in files:
@@ -462,7 +464,7 @@ class MultiFileSelectList(FileList):
 						#if os.path.basename(entry) == x:
 						if entry == path:
 							alreadySelected = True
-					self.list.append(MultiFileSelectEntryComponent(name=name, absolute=x , isDir=False, selected=alreadySelected))
+					self.list.append(((x , False, alreadySelected, name),))
 
 		self.l.setList(self.list)
 
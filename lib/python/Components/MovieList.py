@@ -1,7 +1,9 @@
 import os
 import struct
 import random
-from time import localtime, strftime
+import cPickle as pickle
+from hashlib import md5
+from time import localtime, strftime, time
 
 from enigma import eListboxPythonMultiContent, eListbox, gFont, iServiceInformation, eRect, eSize, RT_HALIGN_LEFT, RT_HALIGN_RIGHT, RT_VALIGN_CENTER, eServiceReference, eServiceReferenceFS, eServiceCenter, eTimer, getDesktop
 from GUIComponent import GUIComponent
@@ -9,7 +11,7 @@ from Tools.FuzzyDate import FuzzyTime
 from Components.MultiContent import MultiContentEntryText, MultiContentEntryPixmapAlphaTest, MultiContentEntryPixmapAlphaBlend, MultiContentEntryProgress
 from Components.config import config
 from Tools.LoadPixmap import LoadPixmap
-from Tools.Directories import SCOPE_ACTIVE_SKIN, resolveFilename
+from Tools.Directories import SCOPE_ACTIVE_SKIN, SCOPE_CONFIG, resolveFilename
 from Tools.UnitConversions import UnitScaler
 from Screens.LocationBox import defaultInhibitDirs
 # GML:1
@@ -26,6 +28,10 @@ KNOWN_EXTENSIONS = MOVIE_EXTENSIONS.union(IMAGE_EXTENSIONS, DVD_EXTENSIONS, AUDI
 
 cutsParser = struct.Struct('>QI')  # big-endian, 64-bit PTS and 32-bit type
 
+MOVIE_INFO_CACHE_DIR = resolveFilename(SCOPE_CONFIG, "movieinfo/")
+MOVIE_INFO_CACHE_VERSION = 1
+MOVIE_INFO_SIDECARS = (".meta", ".eit", ".cuts")
+
 class MovieListData:
 	def __init__(self):
 		pass
@@ -70,14 +76,153 @@ class StubInfo:
 		return ''
 justStubInfo = StubInfo()
 
+# The information the movie list shows about the files in one directory,
+# stored in a file per directory in MOVIE_INFO_CACHE_DIR, so the listed
+# directories and their mtime are left alone. Each entry is valid as long
+# as inode, size and mtime of the file and of its sidecar files are
+# unchanged.
+# Missing values are taken from the service information when they are
+# first asked for, so stale entries are rebuilt lazily.
+class MovieInfoCache:
+	def __init__(self, path):
+		self.filename = self.cacheFile(path)
+		self.entries = {}
+		self.used = set()
+		self.dirty = False
+		try:
+			f = open(self.filename, "rb")
+			try:
+				version, entries = pickle.load(f)
+			finally:
+				f.close()
+			if version == MOVIE_INFO_CACHE_VERSION and isinstance(entries, dict):
+				self.entries = entries
+		except Exception:
+			# missing, written by another version or half written by another box
+			pass
+
+	@staticmethod
+	def cacheFile(path):
+		return os.path.join(MOVIE_INFO_CACHE_DIR, md5(os.path.realpath(path)).hexdigest() + ".pkl")
+
+	# Drops the cache of a directory that was deleted
+	@staticmethod
+	def remove(path):
+		try:
+			os.unlink(MovieInfoCache.cacheFile(path))
+		except OSError:
+			pass
+
+	@staticmethod
+	def fileStamp(path):
+		stamp = []
+		for name in (path,) + tuple(path + ext for ext in MOVIE_INFO_SIDECARS):
+			try:
+				st = os.stat(name)
+				stamp.append((st.st_ino, st.st_size, st.st_mtime))
+			except OSError:
+				stamp.append(None)
+		return tuple(stamp)
+
+	def getInfo(self, serviceHandler, serviceref):
+		path = serviceref.getPath()
+		name = os.path.basename(path)
+		stamp = self.fileStamp(path)
+		entry = self.entries.get(name)
+		if entry is None or entry[0] != stamp:
+			entry = (stamp, {})
+			self.entries[name] = entry
+			self.dirty = True
+		self.used.add(name)
+		return CachedInfo(self, serviceHandler, serviceref, entry[1])
+
+	def save(self):
+		for name in self.entries.keys():
+			if name not in self.used:
+				del self.entries[name]
+				self.dirty = True
+		if not self.dirty:
+			return
+		self.dirty = False
+		tmpname = self.filename + ".tmp"
+		try:
+			if not os.path.isdir(MOVIE_INFO_CACHE_DIR):
+				os.makedirs(MOVIE_INFO_CACHE_DIR)
+			# Write a new file and rename it, so a crash never leaves a half
+			# written one
+			f = open(tmpname, "wb")
+			try:
+				pickle.dump((MOVIE_INFO_CACHE_VERSION, self.entries), f, pickle.HIGHEST_PROTOCOL)
+			finally:
+				f.close()
+			os.rename(tmpname, self.filename)
+		except Exception, e:
+			print "[MovieList] Failed to save %s: %s" % (self.filename, e)
+			try:
+				os.unlink(tmpname)
+			except OSError:
+				pass
+
+# iStaticServiceInformation answering from a MovieInfoCache entry
+class CachedInfo:
+	def __init__(self, cache, serviceHandler, serviceref, values):
+		self.cache = cache
+		self.serviceHandler = serviceHandler
+		self.serviceref = serviceref
+		self.values = values
+		self.info = None
+
+	def getServiceInfo(self):
+		if self.info is None:
+			self.info = self.serviceHandler.info(self.serviceref) or justStubInfo
+		return self.info
+
+	def cached(self, key, get):
+		values = self.values
+		if key not in values:
+			values[key] = get()
+			self.cache.dirty = True
+		return values[key]
+
+	def getName(self, serviceref):
+		return self.cached("name", lambda: self.getServiceInfo().getName(serviceref))
+
+	def getLength(self, serviceref):
+		return self.cached("length", lambda: self.getServiceInfo().getLength(serviceref))
+
+	def getFileSize(self, serviceref):
+		return self.cached("size", lambda: self.getServiceInfo().getFileSize(serviceref))
+
+	def getInfo(self, serviceref, w):
+		if w == iServiceInformation.sTimeCreate:
+			return self.cached("begin", lambda: self.getServiceInfo().getInfo(serviceref, w))
+		return self.getServiceInfo().getInfo(serviceref, w)
+
+	def getInfoString(self, serviceref, w):
+		if w == iServiceInformation.sTags:
+			return self.cached("tags", lambda: self.getServiceInfo().getInfoString(serviceref, w))
+		if w == iServiceInformation.sDescription:
+			return self.cached("description", lambda: self.getServiceInfo().getInfoString(serviceref, w))
+		return self.getServiceInfo().getInfoString(serviceref, w)
+
+	def getResumePoint(self):
+		# not kept in the values, the resume point changes while the list is
+		# shown, and _getCutsResumeInfo checks the .cuts file stamp anyway
+		return _getCutsResumeInfo(self.serviceref.getPath() + '.cuts')
+
+	def __getattr__(self, name):
+		return getattr(self.getServiceInfo(), name)
+
 def lastPlayPosFromCache(ref):
 	from Screens.InfoBarGenerics import resumePointCache
 	return resumePointCache.get(ref.toString(), None)
 
-def moviePlayState(cutsFileName, ref, length):
+def moviePlayState(cutsFileName, ref, length, resume=False):
 	"""Returns None, 0..100 for percentage"""
 	# .cuts file - bookmarks, edit points and resume, kept with a recording
-	resume = _getCutsResumeInfo(cutsFileName)
+	# resume can be passed in when the resume point is already known
+	if resume is False:
+		resume = _getCutsResumeInfo(cutsFileName)
 
 	# There was enough info in the .cuts file
 	if resume and length and length > 0:
@@ -105,19 +250,39 @@ def moviePlayState(cutsFileName, ref, length):
 		return 0
 	return None
 
+# Resume points of .cuts files, by file name, with the (mtime, size) of the
+# file they were read from
+cutsResumeCache = {}
+CUTS_RESUME_CACHE_MAX = 5000
+
+def readCutsFile(filename):
+	# Returns the (pts, type) marks of a .cuts file, read in one go
+	with open(filename, 'rb') as f:
+		data = f.read()
+	count = len(data) / cutsParser.size
+	values = struct.unpack('>' + 'QI' * count, data[:count * cutsParser.size])
+	return zip(values[0::2], values[1::2])
+
 def _getCutsResumeInfo(filename):
+	try:
+		st = os.stat(filename)
+	except OSError:
+		cutsResumeCache.pop(filename, None)
+		return None
+	stamp = (st.st_mtime, st.st_size)
+	cached = cutsResumeCache.get(filename)
+	if cached is not None and cached[0] == stamp:
+		return cached[1]
 	resume_pts = None
 	try:
-		with open(filename, 'rb') as f:
-			while True:
-				data = f.read(cutsParser.size)
-				if len(data) < cutsParser.size:
-					break
-				cut, cutType = cutsParser.unpack(data)
-				if cutType == 3:  # Resume point
-					resume_pts = cut
+		for cut, cutType in readCutsFile(filename):
+			if cutType == 3:  # Resume point
+				resume_pts = cut
 	except:
 		pass
+	if len(cutsResumeCache) >= CUTS_RESUME_CACHE_MAX:
+		cutsResumeCache.clear()
+	cutsResumeCache[filename] = (stamp, resume_pts)
 	return resume_pts
 
 def resetMoviePlayState(cutsFileName, ref=None):
@@ -125,16 +290,7 @@ def resetMoviePlayState(cutsFileName, ref=None):
 		if ref is not None:
 			from Screens.InfoBarGenerics import delResumePoint
 			delResumePoint(ref)
-		f = open(cutsFileName, 'rb')
-		cutlist = []
-		while 1:
-			data = f.read(cutsParser.size)
-			if len(data) < cutsParser.size:
-				break
-			cut, cutType = cutsParser.unpack(data)
-			if cutType != 3:
-				cutlist.append(data)
-		f.close()
+		cutlist = [cutsParser.pack(cut, cutType) for cut, cutType in readCutsFile(cutsFileName) if cutType != 3]
 		f = open(cutsFileName, 'wb')
 		f.write(''.join(cutlist))
 		f.close()
@@ -142,6 +298,7 @@ def resetMoviePlayState(cutsFileName, ref=None):
 		pass
 		# import sys
 		# print "[MovieList] Exception in resetMoviePlayState: %s: %s" % sys.exc_info()[:2]
+	cutsResumeCache.pop(cutsFileName, None)
 
 def is_counted(path):
 	# Don't count by default outside of home.
@@ -224,6 +381,9 @@ class MovieList(GUIComponent):
 	UsingTrashSort = False
 	InTrashFolder = False
 
+	# Seconds spent per timer run on filling in entry data after a load
+	FILL_TIME_SLICE = 0.05
+
 	def __init__(self, root, sort_type=None, descr_state=None):
 		GUIComponent.__init__(self)
 		self.list = []
@@ -269,6 +429,10 @@ class MovieList(GUIComponent):
 		self.sizeWidth = None  # Defaults to being calculated from font size
 		self.sizeWidthScale = 5.0  # Over-ridden by self.sizeWidth if set
 		self.reloadDelayTimer = None
+		self.fillTimer = eTimer()
+		self.fillTimer.callback.append(self.fillListData)
+		self.fillCursor = 0
+		self.infoCache = None
 		self.l = eListboxPythonMultiContent()
 		self.tags = set()
 		self.root = None
@@ -552,8 +716,7 @@ class MovieList(GUIComponent):
 		self.l.setFont(1, gFont(self.fontName, (self.fontSize - 3) + config.movielist.fontsize.value))
 
 	def invalidateItem(self, index):
-		x = self.list[index]
-		self.list[index] = (x[0], x[1], x[2], None)
+		self.fillItem(index)
 		self.l.invalidateEntry(index)
 
 	def invalidateCurrentItem(self):
@@ -571,6 +734,108 @@ class MovieList(GUIComponent):
 	def showCol(self, conf, col):
 		return conf.value == "yes" or conf.value == "auto" and col in self.sortCols.get(self.sort_type, self.staticCols)
 
+	def getDisplayName(self, serviceref, info):
+		txt = info.getName(serviceref)
+		if config.movielist.hide_extensions.value:
+			fileName, fileExtension = os.path.splitext(txt)
+			if fileExtension in KNOWN_EXTENSIONS:
+				txt = fileName
+		return txt
+
+	def buildMovieListData(self, serviceref, info):
+		switch = config.usage.show_icons_in_movielist.value
+		pathName = serviceref.getPath()
+		data = MovieListData()
+		data.len = info.getLength(serviceref)
+		if self.showCol(config.movielist.showsizes, self.COL_SIZE):
+			data.size = info.getFileSize(serviceref)
+		else:
+			data.size = -1
+		data.txt = self.getDisplayName(serviceref, info)
+		data.icon = None
+		data.part = None
+		if os.path.basename(pathName) in self.runningTimers:
+			if switch == 'i':
+				if (self.playInBackground or self.playInForeground) and serviceref == (self.playInBackground or self.playInForeground):
+					data.icon = self.iconMoviePlayRec
+				else:
+					data.icon = self.iconMovieRec
+			elif switch in ('p', 's'):
+				data.part = 100
+				if (self.playInBackground or self.playInForeground) and serviceref == (self.playInBackground or self.playInForeground):
+					data.partcol = self.pbarColourSeen
+					data.partcolsel = self.pbarColourSeenSel
+				else:
+					data.partcol = self.pbarColourRec
+					data.partcolsel = self.pbarColourRecSel
+		elif (self.playInBackground or self.playInForeground) and serviceref == (self.playInBackground or self.playInForeground):
+			data.icon = self.iconMoviePlay
+		else:
+			if isinstance(info, CachedInfo):
+				data.part = moviePlayState(pathName + '.cuts', serviceref, data.len * 90000, info.getResumePoint())
+			else:
+				data.part = moviePlayState(pathName + '.cuts', serviceref, data.len * 90000)
+			if switch == 'i':
+				if data.part is not None and data.part >= 0:
+					data.icon = self.iconPart[data.part // 25]
+				else:
+					if config.usage.movielist_unseen.value:
+						data.icon = self.iconUnwatched
+			elif switch in ('p', 's'):
+				if data.part is not None and data.part > 0:
+					data.partcol = self.pbarColourSeen
+					data.partcolsel = self.pbarColourSeenSel
+				else:
+					if config.usage.movielist_unseen.value:
+						data.part = 100
+						data.partcol = self.pbarColour
+						data.partcolsel = self.pbarColourSel
+		return data
+
+	# Sets the entry data that needs more than the service listing:
+	# subdirectory counts, or length, size and play state of a file
+	def fillItem(self, index):
+		x = self.list[index]  # x = ref,info,begin,data,...
+		serviceref, info = x[0], x[1]
+		if serviceref.flags & eServiceReference.mustDescent:
+			data = -1
+			if info is not None and is_counted(serviceref.getPath()):
+				data = self.count(serviceref) or -1
+		else:
+			data = self.buildMovieListData(serviceref, info)
+		self.list[index] = (serviceref, info, x[2], data) + x[4:]
+
+	def startListFill(self):
+		if not self.fillTimer.isActive():
+			self.fillTimer.start(0, True)
+
+	# load() leaves the data of files and counted directories unset, so
+	# the names show up at once. The data is filled in here a time slice
+	# at a time, the rows on the page of the selection first.
+	def fillListData(self):
+		count = len(self.list)
+		page = config.movielist.itemsperpage.value
+		top = self.l.getCurrentSelectionIndex()
+		top -= top % page
+		pending = [index for index in xrange(top, min(top + page, count)) if self.list[index][3] is None]
+		deadline = time() + self.FILL_TIME_SLICE
+		while True:
+			if pending:
+				index = pending.pop(0)
+			else:
+				while self.fillCursor < count and self.list[self.fillCursor][3] is not None:
+					self.fillCursor += 1
+				if self.fillCursor >= count:
+					if self.infoCache is not None:
+						self.infoCache.save()
+					return
+				index = self.fillCursor
+			self.fillItem(index)
+			self.l.invalidateEntry(index)
+			if time() >= deadline:
+				self.fillTimer.start(10, True)
+				return
+
 	def buildMovieListEntry(self, serviceref, info, begin, data):
 		switch = config.usage.show_icons_in_movielist.value
 		width = self.l.getItemSize().width()
@@ -612,9 +877,9 @@ class MovieList(GUIComponent):
 			res.append(MultiContentEntryText(pos=(textPos, 0), size=(width - textPos - dateWidth - r, ih), font=0, flags = RT_HALIGN_LEFT | RT_VALIGN_CENTER, text=txt))
 			txt = _("Directory")
 			if data is None:
+				# still to be counted by fillListData
 				data = -1
-				if is_counted(pathName):
-					data = self.count(serviceref)
+				self.startListFill()
 			if data != -1:
 				if data[0] and data[1]:
 					txt = _("%s; %s") % (_("Dirs: %d") % data[0], _("Files: %d") % data[1])
@@ -629,53 +894,12 @@ class MovieList(GUIComponent):
 			res.append(MultiContentEntryText(pos=(width - dateWidth - r, 0), size=(dateWidth, ih), font=1, flags=RT_HALIGN_RIGHT | RT_VALIGN_CENTER, text=txt))
 			return res
 		if data == -1 or data is None:
+			# still to be filled in by fillListData, show just the name for now
 			data = MovieListData()
-			cur_idx = self.l.getCurrentSelectionIndex()
-			x = self.list[cur_idx]  # x = ref,info,begin,...
-			data.len = info.getLength(serviceref)
-			if showSize:
-				data.size = info.getFileSize(serviceref)
-			self.list[cur_idx] = (x[0], x[1], x[2], data)  # update entry in list... so next time we don't need to recalc
-			data.txt = info.getName(serviceref)
-			if config.movielist.hide_extensions.value:
-				fileName, fileExtension = os.path.splitext(data.txt)
-				if fileExtension in KNOWN_EXTENSIONS:
-					data.txt = fileName
-			data.icon = None
-			data.part = None
-			if os.path.basename(pathName) in self.runningTimers:
-				if switch == 'i':
-					if (self.playInBackground or self.playInForeground) and serviceref == (self.playInBackground or self.playInForeground):
-						data.icon = self.iconMoviePlayRec
-					else:
-						data.icon = self.iconMovieRec
-				elif switch in ('p', 's'):
-					data.part = 100
-					if (self.playInBackground or self.playInForeground) and serviceref == (self.playInBackground or self.playInForeground):
-						data.partcol = self.pbarColourSeen
-						data.partcolsel = self.pbarColourSeenSel
-					else:
-						data.partcol = self.pbarColourRec
-						data.partcolsel = self.pbarColourRecSel
-			elif (self.playInBackground or self.playInForeground) and serviceref == (self.playInBackground or self.playInForeground):
-				data.icon = self.iconMoviePlay
-			else:
-				data.part = moviePlayState(pathName + '.cuts', serviceref, data.len * 90000)
-				if switch == 'i':
-					if data.part is not None and data.part >= 0:
-						data.icon = self.iconPart[data.part // 25]
-					else:
-						if config.usage.movielist_unseen.value:
-							data.icon = self.iconUnwatched
-				elif switch in ('p', 's'):
-					if data.part is not None and data.part > 0:
-						data.partcol = self.pbarColourSeen
-						data.partcolsel = self.pbarColourSeenSel
-					else:
-						if config.usage.movielist_unseen.value:
-							data.part = 100
-							data.partcol = self.pbarColour
-							data.partcolsel = self.pbarColourSel
+			data.txt = self.getDisplayName(serviceref, info)
+			data.len = -1
+			data.size = -1
+			self.startListFill()
 		if showLen:
 			len = data.len
 			len = "%d:%02d" % (len / 60, len % 60) if len > 0 else ""
@@ -770,6 +994,7 @@ class MovieList(GUIComponent):
 		self.setFontsize()
 
 	def preWidgetRemove(self, instance):
+		self.fillTimer.stop()
 		instance.setContent(None)
 		instance.selectionChanged.get().remove(self.selectionChanged)
 
@@ -799,6 +1024,7 @@ class MovieList(GUIComponent):
 			elif self.numUserFiles > 0:
 				self.numUserFiles -= 1
 			del self.list[index]
+			self.fillCursor = min(self.fillCursor, index)
 			try:
 				self.markList.remove(serviceref)
 			except:
@@ -903,6 +1129,8 @@ class MovieList(GUIComponent):
 		# this lists our root service, then building a
 		# nice list
 		self.list = []
+		self.fillTimer.stop()
+		self.fillCursor = 0
 		serviceHandler = eServiceCenter.getInstance()
 		numberOfDirs = 0
 		self.numUserDirs = 0  # does not include parent or Trashcan
@@ -942,6 +1170,10 @@ class MovieList(GUIComponent):
 				MovieList.UsingTrashSort = MovieList.TRASHSORT_SHOWDELETE
 
 		isFsRoot = root.type == eServiceReference.idFile
+		if isFsRoot and config.movielist.info_cache.value:
+			self.infoCache = MovieInfoCache(rootPath)
+		else:
+			self.infoCache = None
 
 		while 1:
 			serviceref = reflist.getNext()
@@ -958,7 +1190,10 @@ class MovieList(GUIComponent):
 				from Components.ParentalControl import parentalControl
 				if not parentalControl.sessionPinCached and parentalControl.isProtected(serviceref):
 					continue
-			info = self.getServiceInfo(serviceHandler, serviceref)
+			if self.infoCache is not None and not serviceref.flags & eServiceReference.mustDescent:
+				info = self.infoCache.getInfo(serviceHandler, serviceref)
+			else:
+				info = self.getServiceInfo(serviceHandler, serviceref)
 			begin = info.getInfo(serviceref, iServiceInformation.sTimeCreate)
 
 # GML:1
@@ -980,7 +1215,7 @@ class MovieList(GUIComponent):
 					if normname != ".Trash":
 						self.numUserDirs += 1
 						if is_counted(dirname):
-							data = self.count(serviceref)
+							data = None  # counted by fillListData
 					self.list.insert(0, (serviceref, info, begin, data))
 				continue
 			# convert space-separated list of tags into a set
@@ -1015,9 +1250,9 @@ class MovieList(GUIComponent):
 
 # GML:1
 			if begin2 != 0:
-				self.list.append((serviceref, info, begin, -1, begin2))
+				self.list.append((serviceref, info, begin, None, begin2))
 			else:
-				self.list.append((serviceref, info, begin, -1))
+				self.list.append((serviceref, info, begin, None))
 			self.numUserFiles += 1
 
 		self.parentDirectory = 0
@@ -1151,6 +1386,9 @@ class MovieList(GUIComponent):
 		# Adding the realtags to the tag list
 		for tag in realtags:
 			self.tags[tag] = set([tag])
+		if self.infoCache is not None:
+			self.infoCache.save()
+		self.startListFill()
 
 	def getNameKey(self, ref, info):
 		# append the file name numeric suffix to the name, to reliably
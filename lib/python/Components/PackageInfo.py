@@ -3,6 +3,7 @@ from Tools.Directories import crawlDirectory, resolveFilename, SCOPE_CONFIG, SCO
 from Components.NimManager import nimmanager
 from Components.Ipkg import IpkgComponent
 from Components.config import config, configfile
+from Components.ServiceIndex import serviceIndex
 from boxbranding import getBoxType
 from enigma import eConsoleAppContainer, eDVBDB
 import os
@@ -302,6 +303,7 @@ class PackageInfoHandler:
 		if self.reloadFavourites:
 			self.reloadFavourites = False
 			db = eDVBDB.getInstance().reloadBouquets()
+			serviceIndex.invalidate()
 
 		self.currentIndex += 1
 		attributes = self.installingAttributes
@@ -394,6 +396,7 @@ class PackageInfoHandler:
 			db.reloadServicelist()
 			db.loadServicelist(directory + name)
 			db.saveServicelist()
+			serviceIndex.invalidate()
 		self.installNext()
 
 	def installFavourites(self, directory, name):
@@ -9,6 +9,7 @@ def InitRecordingConfig():
 	config.recording.margin_after = ConfigSelectionNumber(min=0, max=120, stepwidth=1, default=5, wraparound=True)
 	config.recording.ascii_filenames = ConfigYesNo(default=False)
 	config.recording.keep_timers = ConfigSelectionNumber(min=1, max=120, stepwidth=1, default=7, wraparound=True)
+	config.recording.separate_timer_log = ConfigYesNo(default=False)
 	config.recording.filename_composition = ConfigSelection(default="standard", choices=[
 		("standard", _("standard")),
 		("event", _("Event name first")),
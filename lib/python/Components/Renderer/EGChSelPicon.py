@@ -2,6 +2,7 @@
 import os
 from Renderer import Renderer
 from enigma import ePixmap
+from Tools.LoadPixmap import LoadPicon
 from Tools.Directories import fileExists, SCOPE_SKIN_IMAGE, SCOPE_CURRENT_SKIN, resolveFilename
 
 class EGChSelPicon(Renderer):
@@ -52,7 +53,11 @@ class EGChSelPicon(Renderer):
 						      pngname = resolveFilename(SCOPE_SKIN_IMAGE, "skin_default/picon_default.png")
 				      self.nameCache["default"] = pngname
 		      if self.pngname != pngname:
-			      self.instance.setPixmapFromFile(pngname)
+			      ptr = LoadPicon(pngname)
+			      if ptr is not None:
+				      self.instance.setPixmap(ptr)
+			      else:
+				      self.instance.setPixmapFromFile(pngname)
 			      self.pngname = pngname
 
 
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from Renderer import Renderer
 from enigma import ePixmap, iServiceInformation, iPlayableService, iPlayableServicePtr
+from Tools.LoadPixmap import LoadPicon
 from Tools.Directories import fileExists, SCOPE_SKIN_IMAGE, SCOPE_CURRENT_SKIN, resolveFilename
 import os
 
@@ -73,7 +74,11 @@ class EGPicon(Renderer):
 						      pngname = resolveFilename(SCOPE_SKIN_IMAGE, "skin_default/picon_default.png")
 				      self.nameCache["default"] = pngname
 		      if self.pngname != pngname:
-			      self.instance.setPixmapFromFile(pngname)
+			      ptr = LoadPicon(pngname)
+			      if ptr is not None:
+				      self.instance.setPixmap(ptr)
+			      else:
+				      self.instance.setPixmapFromFile(pngname)
 			      self.pngname = pngname
 
 			
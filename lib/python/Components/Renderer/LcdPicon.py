@@ -2,6 +2,7 @@ import os, re, unicodedata
 from Renderer import Renderer
 from enigma import ePixmap, ePicLoad
 from Tools.Alternatives import GetWithAlternative
+from Tools.LoadPixmap import pixmapCache
 from Tools.Directories import pathExists, SCOPE_ACTIVE_SKIN, resolveFilename
 from Components.Harddisk import harddiskmanager
 from boxbranding import getBoxType, getMachineBuild
@@ -110,6 +111,7 @@ class LcdPicon(Renderer):
 		self.PicLoad.PictureData.get().append(self.updatePicon)
 		self.piconsize = (0,0)
 		self.pngname = ""
+		self.decodename = ""
 		self.lastPath = None
 		if getBoxType() in bw_lcd or config.lcd.picon_pack.value or getMachineBuild() == "inihdp":
 			pngname = findLcdPicon("lcd_picon_default")
@@ -158,8 +160,11 @@ class LcdPicon(Renderer):
 	def updatePicon(self, picInfo=None):
 		ptr = self.PicLoad.getData()
 		if ptr is not None:
-			self.instance.setPixmap(ptr.__deref__())
-			self.instance.show()
+			# the service may have changed while the picon was decoded
+			pixmapCache.put(self.decodename, tuple(self.piconsize), ptr)
+			if self.decodename == self.pngname:
+				self.instance.setPixmap(ptr.__deref__())
+				self.instance.show()
 
 	def changed(self, what):
 		if self.instance:
@@ -169,8 +174,13 @@ class LcdPicon(Renderer):
 				if not pathExists(pngname): # no picon for service found
 					pngname = self.defaultpngname
 				if self.pngname != pngname:
-					if pngname:
+					ptr = pngname and pixmapCache.get(pngname, tuple(self.piconsize))
+					if ptr:
+						self.instance.setPixmap(ptr.__deref__())
+						self.instance.show()
+					elif pngname:
 						self.PicLoad.setPara((self.piconsize[0], self.piconsize[1], 0, 0, 1, 1, "#FF000000"))
+						self.decodename = pngname
 						self.PicLoad.startDecode(pngname)
 					else:
 						self.instance.hide()
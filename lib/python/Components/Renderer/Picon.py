@@ -1,38 +1,83 @@
 import os, re, unicodedata
+from time import time
+from collections import OrderedDict
 from Renderer import Renderer
 from enigma import ePixmap, ePicLoad
 from Tools.Alternatives import GetWithAlternative
+from Tools.LoadPixmap import LoadPicon
 from Tools.Directories import pathExists, SCOPE_ACTIVE_SKIN, resolveFilename
 from Components.Harddisk import harddiskmanager
+from Components.ServiceIndex import serviceIndex
 from ServiceReference import ServiceReference
 
 searchPaths = []
 lastPiconPath = None
+piconIndex = {} # picon directory -> (mtime, names of the png files in it)
+piconIndexChecked = 0
+serviceNames = OrderedDict() # service reference -> channel name as used for picon file names
+# dropped when services or bouquets are reloaded, a channel may have been
+# renamed, and limited to the ServiceNamesMax most recently used services
+serviceIndex.onInvalidate.append(serviceNames.clear)
+ServiceNamesMax = 1000
+
+# Seconds between checks of the picon directory mtimes
+PiconIndexCheckInterval = 10
 
 def initPiconPaths():
-	global searchPaths
+	global searchPaths, lastPiconPath
 	searchPaths = []
+	lastPiconPath = None
+	piconIndex.clear()
+	serviceNames.clear()
 	for mp in ('/usr/share/enigma2/', '/'):
 		onMountpointAdded(mp)
 	for part in harddiskmanager.getMountedPartitions():
 		onMountpointAdded(part.mountpoint)
 
+def indexPiconPath(path):
+	try:
+		mtime = os.stat(path).st_mtime
+		names = set(fn[:-4] for fn in os.listdir(path) if fn.endswith('.png'))
+	except OSError:
+		piconIndex.pop(path, None)
+		return None
+	piconIndex[path] = (mtime, names)
+	return names
+
+# Rescans the picon directories whose contents changed, at most once per
+# PiconIndexCheckInterval, so that lookups in between need no file access
+def checkPiconIndex():
+	global piconIndexChecked
+	now = time()
+	if piconIndexChecked <= now < piconIndexChecked + PiconIndexCheckInterval:
+		return
+	piconIndexChecked = now
+	for path in searchPaths:
+		entry = piconIndex.get(path)
+		try:
+			if entry is not None and entry[0] == os.stat(path).st_mtime:
+				continue
+		except OSError:
+			pass
+		indexPiconPath(path)
+
 def onMountpointAdded(mountpoint):
 	global searchPaths
 	try:
 		path = os.path.join(mountpoint, 'picon') + '/'
 		if os.path.isdir(path) and path not in searchPaths:
-			for fn in os.listdir(path):
-				if fn.endswith('.png'):
-					print "[Picon] adding path:", path
-					searchPaths.append(path)
-					break
+			if indexPiconPath(path):
+				print "[Picon] adding path:", path
+				searchPaths.append(path)
 	except Exception, ex:
 		print "[Picon] Failed to investigate %s:" % mountpoint, ex
 
 def onMountpointRemoved(mountpoint):
-	global searchPaths
+	global searchPaths, lastPiconPath
 	path = os.path.join(mountpoint, 'picon') + '/'
+	piconIndex.pop(path, None)
+	if lastPiconPath == path:
+		lastPiconPath = None
 	try:
 		searchPaths.remove(path)
 		print "[Picon] removed path:", path
@@ -47,30 +92,35 @@ def onPartitionChange(why, part):
 
 def findPicon(serviceName):
 	global lastPiconPath
+	checkPiconIndex()
 	if lastPiconPath is not None:
-		pngname = lastPiconPath + serviceName + ".png"
-		if pathExists(pngname):
-			return pngname
-		else:
-			return ""
-	else:
-		global searchPaths
-		pngname = ""
-		for path in searchPaths:
-			if pathExists(path) and not path.startswith('/media/net') and not path.startswith('/media/autofs'):
-				pngname = path + serviceName + ".png"
-				if pathExists(pngname):
-					lastPiconPath = path
-					break
-			elif pathExists(path):
-				pngname = path + serviceName + ".png"
-				if pathExists(pngname):
-					lastPiconPath = path
-					break
-		if pathExists(pngname):
-			return pngname
-		else:
-			return ""
+		entry = piconIndex.get(lastPiconPath)
+		if entry is not None and serviceName in entry[1]:
+			return lastPiconPath + serviceName + ".png"
+		return ""
+	for path in searchPaths:
+		entry = piconIndex.get(path)
+		if entry is None:
+			# paths added by skins are indexed on first use
+			if indexPiconPath(path) is None:
+				continue
+			entry = piconIndex[path]
+		if serviceName in entry[1]:
+			lastPiconPath = path
+			return path + serviceName + ".png"
+	return ""
+
+def getPiconServiceName(serviceName):
+	serviceIndex.checkSignature()
+	name = serviceNames.pop(serviceName, None)
+	if name is None:
+		name = ServiceReference(serviceName).getServiceName()
+		name = unicodedata.normalize('NFKD', unicode(name, 'utf_8', errors='ignore')).encode('ASCII', 'ignore')
+		name = re.sub('[^a-z0-9]', '', name.replace('&', 'and').replace('+', 'plus').replace('*', 'star').lower())
+		if len(serviceNames) >= ServiceNamesMax:
+			serviceNames.popitem(last=False)
+	serviceNames[serviceName] = name
+	return name
 
 def getPiconName(serviceName):
 	#remove the path and name fields, and replace ':' by '_'
@@ -84,9 +134,7 @@ def getPiconName(serviceName):
 			fields[0] = '1'
 		pngname = findPicon('_'.join(fields))
 	if not pngname: # picon by channel name
-		name = ServiceReference(serviceName).getServiceName()
-		name = unicodedata.normalize('NFKD', unicode(name, 'utf_8', errors='ignore')).encode('ASCII', 'ignore')
-		name = re.sub('[^a-z0-9]', '', name.replace('&', 'and').replace('+', 'plus').replace('*', 'star').lower())
+		name = getPiconServiceName(serviceName)
 		if len(name) > 0:
 			pngname = findPicon(name)
 			if not pngname and len(name) > 2 and name.endswith('hd'):
@@ -139,12 +187,16 @@ class Picon(Renderer):
 			pngname = ""
 			if what[0] == 1 or what[0] == 3:
 				pngname = getPiconName(self.source.text)
-				if not pathExists(pngname): # no picon for service found
+				if not pngname: # no picon for service found
 					pngname = self.defaultpngname
 				if self.pngname != pngname:
 					if pngname:
 						self.instance.setScale(1)
-						self.instance.setPixmapFromFile(pngname)
+						ptr = LoadPicon(pngname)
+						if ptr is not None:
+							self.instance.setPixmap(ptr)
+						else:
+							self.instance.setPixmapFromFile(pngname)
 						self.instance.show()
 					else:
 						self.instance.hide()
@@ -1,5 +1,6 @@
 from Renderer import Renderer
 from enigma import ePixmap
+from Tools.LoadPixmap import LoadPicon
 from Tools.Directories import fileExists, SCOPE_SKIN_IMAGE, SCOPE_CURRENT_SKIN, resolveFilename
 
 class Picon2(Renderer):
@@ -51,7 +52,11 @@ class Picon2(Renderer):
 							pngname = resolveFilename(SCOPE_SKIN_IMAGE, "skin_default/picon_default.png")
 					self.nameCache["default"] = pngname
 			if self.pngname != pngname:
-				self.instance.setPixmapFromFile(pngname)
+				ptr = LoadPicon(pngname)
+				if ptr is not None:
+					self.instance.setPixmap(ptr)
+				else:
+					self.instance.setPixmapFromFile(pngname)
 				self.pngname = pngname
 
 	def findPicon(self, serviceName):
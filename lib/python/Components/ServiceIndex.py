@@ -0,0 +1,171 @@
+import os
+
+from enigma import eServiceCenter, eServiceReference, eEnv
+
+from Tools.ServiceReference import service_types_tv_ref, service_types_radio_ref
+
+# Channel numbers, services and bouquets of the bouquet lists, so number
+# entry, zapping and the channel number converters look them up in dicts
+# instead of walking the bouquets with getNext() each time.
+#
+# A bouquet is listed on its first lookup and kept until invalidate() is
+# called, which has to happen whenever the bouquets are changed, reloaded
+# or renumbered, e.g. by the bouquet editor, a settings import or a change
+# of the numbering mode. As a safety net the index is also dropped when the
+# modification time of the bouquet directory changes, which happens
+# whenever a bouquet file or the service list is replaced.
+#
+# The providers of the services are looked up per transponder, with one
+# FROM PROVIDERS query for all of its services.
+
+BOUQUET_PATH = eEnv.resolve("${sysconfdir}/enigma2/")
+
+COUNTED_MASK = eServiceReference.isMarker | eServiceReference.isDirectory
+
+def _listServices(ref):
+	services = []
+	servicelist = eServiceCenter.getInstance().list(ref)
+	if servicelist is not None:
+		while True:
+			service = servicelist.getNext()
+			if not service.valid():
+				break
+			services.append(service)
+	return services
+
+class _BouquetEntry:
+	def __init__(self, bouquet):
+		self.services = _listServices(bouquet)
+		self.numbers = {} # channel number -> first service with that number
+		self.indexes = {} # compare string -> first entry of the service
+		self.positions = {} # compare string -> position among the services
+		self.count = 0 # services that are neither markers nor directories
+		self.offset = None # first channel number - 1
+		self.streams = None
+		self.alternatives = None
+		for index, service in enumerate(self.services):
+			key = service.toCompareString()
+			self.indexes.setdefault(key, index)
+			number = service.getChannelNum()
+			if number not in self.numbers:
+				self.numbers[number] = service
+				if number > 0 and self.offset is None:
+					self.offset = number - 1
+			if not service.flags & COUNTED_MASK:
+				self.count += 1
+				self.positions.setdefault(key, self.count)
+
+	def getFlags(self):
+		if self.streams is None:
+			counted = [service for service in self.services if not service.flags & COUNTED_MASK]
+			self.streams = any("%3a//" in service.toString().lower() for service in counted)
+			self.alternatives = any(service.flags & eServiceReference.isGroup for service in counted)
+		return self.streams, self.alternatives
+
+class ServiceIndex:
+	def __init__(self):
+		self.bouquets = {}
+		self.roots = {}
+		self.providers = {}
+		self.signature = None
+		# called on invalidate(), for caches of other modules that depend on
+		# the bouquets or the service list
+		self.onInvalidate = []
+
+	def invalidate(self):
+		self.bouquets.clear()
+		self.roots.clear()
+		self.providers.clear()
+		for x in self.onInvalidate:
+			x()
+
+	def checkSignature(self):
+		try:
+			signature = os.stat(BOUQUET_PATH).st_mtime
+		except OSError:
+			signature = None
+		if signature != self.signature:
+			self.signature = signature
+			self.invalidate()
+
+	def getEntry(self, bouquet):
+		self.checkSignature()
+		key = bouquet.toCompareString()
+		entry = self.bouquets.get(key)
+		if entry is None:
+			entry = self.bouquets[key] = _BouquetEntry(bouquet)
+		return entry
+
+	# Returns the services of a bouquet, markers and sub bouquets included
+	def getServices(self, bouquet):
+		return self.getEntry(bouquet).services
+
+	# Returns the bouquets listed in a bouquet root, in their order
+	def getBouquets(self, root):
+		self.checkSignature()
+		key = root.toCompareString()
+		bouquets = self.roots.get(key)
+		if bouquets is None:
+			bouquets = self.roots[key] = [bouquet for bouquet in self.getServices(root) if bouquet.flags & eServiceReference.isDirectory]
+		return bouquets
+
+	# Returns the service with the channel number in the bouquet, or None
+	# when there is none or it is invisible
+	def getServiceByNumber(self, bouquet, number):
+		service = self.getEntry(bouquet).numbers.get(number)
+		if service is None or service.flags & eServiceReference.isInvisible:
+			return None
+		return service
+
+	# Returns the entry of the service in the bouquet, or None
+	def findService(self, bouquet, service):
+		entry = self.getEntry(bouquet)
+		index = entry.indexes.get(service.toCompareString())
+		if index is None:
+			return None
+		return entry.services[index]
+
+	# Returns the bouquets of root that contain the service
+	def getServiceBouquets(self, root, service):
+		key = service.toCompareString()
+		return [bouquet for bouquet in self.getBouquets(root) if key in self.getEntry(bouquet).indexes]
+
+	# Returns the position of the service among the services of the bouquet
+	# that are neither markers nor directories, or 0, and their number
+	def getServicePosition(self, bouquet, service):
+		entry = self.getEntry(bouquet)
+		return entry.positions.get(service.toCompareString(), 0), entry.count
+
+	# Returns whether the bouquet has streams and whether it has alternatives
+	def getBouquetFlags(self, bouquet):
+		return self.getEntry(bouquet).getFlags()
+
+	# Returns the channel number of the first service in the bouquet - 1
+	def getNumberOffset(self, bouquet):
+		return self.getEntry(bouquet).offset or 0
+
+	# Returns the provider name of a DVB service, or ""
+	def getProviderName(self, ref):
+		self.checkSignature()
+		radio = ref.getData(0) in (2, 10)
+		channelID = (ref.getUnsignedData(4), ref.getUnsignedData(2), ref.getUnsignedData(3))
+		providers = self.providers.get((radio, channelID))
+		if providers is None:
+			providers = self.providers[(radio, channelID)] = self.listProviders(radio, channelID)
+		return providers.get(ref.toCompareString(), "")
+
+	def listProviders(self, radio, channelID):
+		providers = {}
+		typestr = (radio and service_types_radio_ref or service_types_tv_ref).toString()
+		pos = typestr.rfind(':')
+		root = eServiceReference('%s (channelID == %08x%04x%04x) && %s FROM PROVIDERS ORDER BY name' % ((typestr[:pos + 1],) + channelID + (typestr[pos + 1:],)))
+		serviceHandler = eServiceCenter.getInstance()
+		for provider in _listServices(root):
+			if provider.flags & eServiceReference.isDirectory:
+				info = serviceHandler.info(provider)
+				name = info and info.getName(provider) or "Unknown"
+				for service in _listServices(provider):
+					providers.setdefault(service.toCompareString(), name)
+		return providers
+
+serviceIndex = ServiceIndex()
@@ -2,7 +2,7 @@ from HTMLComponent import HTMLComponent
 from GUIComponent import GUIComponent
 from skin import parseColor, parseFont
 
-from enigma import eListboxServiceContent, eListbox, eServiceCenter, eServiceReference, gFont, eRect, eSize
+from enigma import eListboxServiceContent, eListbox, eServiceCenter, eServiceReference, eTimer, gFont, eRect, eSize
 from Tools.LoadPixmap import LoadPixmap
 from Tools.TextBoundary import getTextBoundarySize
 
@@ -10,8 +10,10 @@ from Tools.Directories import resolveFilename, SCOPE_ACTIVE_SKIN
 
 from Components.Renderer.Picon import getPiconName
 from Components.config import config
+from Components.ServiceIndex import serviceIndex
 
 def refreshServiceList(configElement = None):
+	serviceIndex.invalidate()
 	from Screens.InfoBar import InfoBar
 	InfoBarInstance = InfoBar.instance
 	if InfoBarInstance is not None:
@@ -19,6 +21,32 @@ def refreshServiceList(configElement = None):
 		if servicelist:
 			servicelist.setMode()
 
+# Delay after setting a root before its name index is built, so opening a
+# large list like "All services" is not held up by it
+NAME_INDEX_DELAY = 500
+
+# The indexes of the entries of a list by the first printable character of
+# their names, as getNextBeginningWithChar of eListboxServiceContent compares
+# them. The names are fetched with one getContent() call in the order the
+# list is sorted in, instead of looking each entry up on every key press.
+class ServiceNameIndex:
+	def __init__(self, root):
+		self.first = {}
+		servicelist = eServiceCenter.getInstance().list(root)
+		names = servicelist and servicelist.getContent("N", True)
+		self.valid = isinstance(names, list)
+		if not self.valid:
+			return
+		for index, name in enumerate(names):
+			for char in name:
+				if " " <= char <= "~":
+					self.first.setdefault(char, index)
+					break
+
+	# Returns the index of the first entry beginning with char, or 0
+	def find(self, char):
+		return self.first.get(char, 0)
+
 class ServiceList(HTMLComponent, GUIComponent):
 	MODE_NORMAL = 0
 	MODE_FAVOURITES = 1
@@ -71,6 +99,11 @@ class ServiceList(HTMLComponent, GUIComponent):
 
 		self.onSelectionChanged = [ ]
 
+		self.nameIndex = None
+		self.nameIndexPending = False
+		self.nameIndexTimer = eTimer()
+		self.nameIndexTimer.callback.append(self.buildNameIndex)
+
 	def applySkin(self, desktop, parent):
 		def foregroundColorMarked(value):
 			self.l.setColor(eListboxServiceContent.markedForeground, parseColor(value))
@@ -235,10 +268,15 @@ class ServiceList(HTMLComponent, GUIComponent):
 		self.instance.moveSelection(self.instance.moveDown)
 
 	def moveToChar(self, char):
-		# TODO fill with life
 		print "[ServiceList] Next char: "
-		index = self.l.getNextBeginningWithChar(char)
-		indexup = self.l.getNextBeginningWithChar(char.upper())
+		if self.nameIndexPending:
+			self.buildNameIndex()
+		if self.nameIndex is not None:
+			index = self.nameIndex.find(char)
+			indexup = self.nameIndex.find(char.upper())
+		else:
+			index = self.l.getNextBeginningWithChar(char)
+			indexup = self.l.getNextBeginningWithChar(char.upper())
 		if indexup != 0:
 			if index > indexup or index == 0:
 				index = indexup
@@ -295,6 +333,7 @@ class ServiceList(HTMLComponent, GUIComponent):
 		self.setMode(self.mode)
 
 	def preWidgetRemove(self, instance):
+		self.nameIndexTimer.stop()
 		instance.setContent(None)
 		instance.selectionChanged.get().remove(self.selectionChanged)
 
@@ -322,24 +361,46 @@ class ServiceList(HTMLComponent, GUIComponent):
 		self.l.setRoot(root, justSet)
 		if not justSet:
 			self.l.sort()
+		self.resetNameIndex(not justSet)
 		self.selectionChanged()
 
 	def resetRoot(self):
 		index = self.instance.getCurrentIndex()
 		self.l.setRoot(self.root, False)
 		self.l.sort()
+		self.resetNameIndex(True)
 		self.instance.moveSelectionTo(index)
 
 	def removeCurrent(self):
 		self.l.removeCurrent()
+		self.resetNameIndex(False)
 
 	def addService(self, service, beforeCurrent=False):
 		self.l.addService(service, beforeCurrent)
+		self.resetNameIndex(False)
 
 	def finishFill(self):
 		self.l.FillFinished()
 		self.l.sort()
 
+	# Drops the name index, and builds it again when the list is idle if the
+	# entries are the sorted contents of the root again
+	def resetNameIndex(self, rebuild):
+		self.nameIndex = None
+		self.nameIndexPending = rebuild
+		self.nameIndexTimer.stop()
+		if rebuild:
+			self.nameIndexTimer.start(NAME_INDEX_DELAY, True)
+
+	def buildNameIndex(self):
+		self.nameIndexTimer.stop()
+		if not self.nameIndexPending:
+			return
+		self.nameIndexPending = False
+		nameIndex = ServiceNameIndex(self.root)
+		if nameIndex.valid:
+			self.nameIndex = nameIndex
+
 # stuff for multiple marks (edit mode / later multiepg)
 	def clearMarks(self):
 		self.l.initMarked()
@@ -366,6 +427,8 @@ class ServiceList(HTMLComponent, GUIComponent):
 #just for movemode.. only one marked entry..
 	def setCurrentMarked(self, state):
 		self.l.setCurrentMarked(state)
+		# entries are moved around while one is marked
+		self.resetNameIndex(False)
 
 	def setMode(self, mode):
 		self.mode = mode
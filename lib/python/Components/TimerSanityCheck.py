@@ -4,6 +4,38 @@ from time import  time, localtime, mktime, gmtime
 from ServiceReference import ServiceReference
 from enigma import iServiceInformation, eServiceCenter, eServiceReference, getBestPlayableServiceReference
 from timer import TimerEntry
+from Components.ServiceIndex import serviceIndex
+
+# Tuner types of services whose test recording could not be started,
+# looked up from the transponder data (service reference string -> list of types)
+serviceTunerTypes = {}
+# dropped when services or bouquets are reloaded, a service may have moved
+# to another tuner type
+serviceIndex.onInvalidate.append(serviceTunerTypes.clear)
+
+def getServiceTunerTypes(serviceHandler, ref):
+	serviceIndex.checkSignature()
+	refstr = ref.toString()
+	tunerType = serviceTunerTypes.get(refstr)
+	if tunerType is None:
+
+		def getServiceType(ref):  # helper function to get a service type of a service reference
+			serviceInfo = serviceHandler.info(ref)
+			serviceInfo = serviceInfo and serviceInfo.getInfoObject(ref, iServiceInformation.sTransponderData)
+			return serviceInfo and serviceInfo["tuner_type"] or ""
+
+		tunerType = []
+		if ref.flags & eServiceReference.isGroup:  # service group ?
+			serviceList = serviceHandler.list(ref)  # get all alternative services
+			if serviceList:
+				for ref in serviceList.getContent("R"):  # iterate over all group service references
+					type = getServiceType(ref)
+					if type not in tunerType:  # just add single time
+						tunerType.append(type)
+		else:
+			tunerType.append(getServiceType(ref))
+		serviceTunerTypes[refstr] = tunerType
+	return tunerType[:]
 
 class TimerSanityCheck:
 	def __init__(self, timerlist, newtimer=None):
@@ -53,6 +85,29 @@ class TimerSanityCheck:
 							return True
 		return False
 
+	# Return the events of the runs of overlapping timers (from a moment
+	# without any timer running to the next one) which contain the new
+	# timer. Timers outside these windows cannot clash with the new timer,
+	# so they need no test recordings.
+	def getOverlapWindows(self, eventlist):
+		windows = []
+		window = []
+		cnt = 0
+		hasNewTimer = False
+		for event in eventlist:
+			cnt += event[1]
+			window.append(event)
+			if event[2] == -1:
+				hasNewTimer = True
+			if cnt == 0:
+				if hasNewTimer:
+					windows.extend(window)
+				window = []
+				hasNewTimer = False
+		if hasNewTimer:
+			windows.extend(window)
+		return windows
+
 	def checkTimerlist(self, ext_timer=1):
 		# with special service for external plugins
 		# Entries in eventlist
@@ -171,6 +226,11 @@ class TimerSanityCheck:
 # order list chronological
 		self.nrep_eventlist.sort()
 
+################################################################################
+# only timers running together with the new timer can conflict with it
+		if self.newtimer is not None:
+			self.nrep_eventlist = self.getOverlapWindows(self.nrep_eventlist)
+
 ##################################################################################
 # detect overlapping timers and overlapping times
 		fakeRecList = []
@@ -205,22 +265,7 @@ class TimerSanityCheck:
 					feinfo = None
 
 				else:  # tune failed.. so we must go another way to get service type (DVB-S, DVB-T, DVB-C)
-
-					def getServiceType(ref):  # helper function to get a service type of a service reference
-						serviceInfo = serviceHandler.info(ref)
-						serviceInfo = serviceInfo and serviceInfo.getInfoObject(ref, iServiceInformation.sTransponderData)
-						return serviceInfo and serviceInfo["tuner_type"] or ""
-
-					ref = timer.service_ref.ref
-					if ref.flags & eServiceReference.isGroup:  # service group ?
-						serviceList = serviceHandler.list(ref)  # get all alternative services
-						if serviceList:
-							for ref in serviceList.getContent("R"):  # iterate over all group service references
-								type = getServiceType(ref)
-								if type not in tunerType:  # just add single time
-									tunerType.append(type)
-					else:
-						tunerType.append(getServiceType(ref))
+					tunerType = getServiceTunerTypes(serviceHandler, timer.service_ref.ref)
 
 				if event[2] == -1:  # new timer
 					newTimerTunerType = tunerType
@@ -246,7 +291,8 @@ class TimerSanityCheck:
 						overlaplist.remove(entry)
 			else:
 				print "[TimerSanityCheck] Bug: unknown flag!"
-			self.nrep_eventlist[idx] = (event[0], event[1], event[2], cnt, overlaplist[:])  # insert a duplicate into current overlaplist
+			# insert a copy of the current overlaplist, but only where timers overlap
+			self.nrep_eventlist[idx] = (event[0], event[1], event[2], cnt, len(overlaplist) > 1 and overlaplist[:] or [])
 			idx += 1
 
 		if ConflictTimer is None:  # no conflict found :)
@@ -173,6 +173,9 @@ class InfoBarTimeshift:
 		# Init PTS MergeRecords-Timer
 		self.pts_mergeRecords_timer = eTimer()
 		self.pts_mergeRecords_timer.callback.append(self.ptsMergeRecords)
+		self.pts_merge_index = None
+		self.pts_merge_index_path = None
+		self.pts_merged_records = set()
 
 		# Init PTS Merge Cleanup-Timer
 		self.pts_mergeCleanUp_timer = eTimer()
@@ -969,6 +972,9 @@ class InfoBarTimeshift:
 					timeshift_saved = False
 					timeshift_saveerror2 = errormsg
 
+			if timeshift_saved and mergelater and fullname is not None:
+				self.ptsAddMergeCandidate("%s.ts" % fullname)
+
 			if not timeshift_saved:
 				config.timeshift.isRecording.value = False
 				self.save_timeshift_postaction = None
@@ -1120,73 +1126,89 @@ class InfoBarTimeshift:
 		self.session.nav.RecordTimer.record(recording)
 		self.recording.append(recording)
 
+	# The recordings saved with a pts_merge tag in the default recording
+	# directory, by file name, with the event info of their meta files. The
+	# directory is read once, later saves are added by SaveTimeshift.
+	def ptsGetMergeIndex(self):
+		path = config.usage.default_path.value
+		if self.pts_merge_index is None or self.pts_merge_index_path != path:
+			self.pts_merge_index = {}
+			self.pts_merge_index_path = path
+			try:
+				filelist = os.listdir(path)
+			except OSError, errormsg:
+				print "[Timeshift] ptsGetMergeIndex: %s" % errormsg
+				filelist = []
+			for filename in filelist:
+				if filename.endswith(".meta"):
+					self.ptsAddMergeCandidate(path + filename[0:-5])
+		return self.pts_merge_index
+
+	def ptsAddMergeCandidate(self, filepath):
+		path, filename = os.path.split(filepath)
+		if self.pts_merge_index is None or os.path.join(path, "") != os.path.join(self.pts_merge_index_path, ""):
+			return
+		try:
+			meta = readMetafile(filepath + ".meta")
+		except IOError:
+			return
+		if meta[4] == "pts_merge":
+			self.pts_merge_index[filename] = meta
+
 	def ptsMergeRecords(self):
 		dprint("ptsMergeRecords")
 		if self.session.nav.RecordTimer.isRecording():
 			self.pts_mergeRecords_timer.start(120000, True)
 			return
 
-		ptsmergeSRC = ""
-		ptsmergeDEST = ""
-		ptsmergeeventname = ""
-		ptsgetnextfile = False
-		ptsfilemerged = False
+		# One merge at a time, the running one restarts the timer when done
+		if [job for job in JobManager.getPendingJobs() if isinstance(job, MergeTimeshiftJob)]:
+			return
 
-		filelist = os.listdir(config.usage.default_path.value)
+		path = config.usage.default_path.value
+		index = self.ptsGetMergeIndex()
+		filelist = sorted(index)
+		for filename in filelist[:]:
+			if not fileExists("%s%s.meta" % (path, filename)):
+				del index[filename]
+				filelist.remove(filename)
+
+		# Each recording is appended to the one before it while they belong to
+		# the same event, one per run, the merge job restarts the timer.
+		for ptsmergeDEST, ptsmergeSRC in zip(filelist, filelist[1:] + [None]):
+			(servicerefname, eventname, eventtitle, eventtime, eventtag) = index[ptsmergeDEST]
+
+			# If still recording or transfering, try again later ...
+			if fileExists("%s%s" % (path, ptsmergeDEST)):
+				statinfo = os.stat("%s%s" % (path, ptsmergeDEST))
+				if statinfo.st_mtime > (time() - 10.0):
+					self.pts_mergeRecords_timer.start(120000, True)
+					return
 
-		if filelist is not None:
-			filelist.sort()
+			if ptsmergeSRC is not None and ASCIItranslit.legacyEncode(index[ptsmergeSRC][1]) == ASCIItranslit.legacyEncode(eventname):
+				# Copy EIT File
+				if fileExists("%s%s.eit" % (path, ptsmergeSRC[0:-3])):
+					copyfile("%s%s.eit" % (path, ptsmergeSRC[0:-3]), "%s%s.eit" % (path, ptsmergeDEST[0:-3]))
 
-		for filename in filelist:
-			if filename.endswith(".meta"):
-				# Get Event Info from meta file
-				(servicerefname, eventname, eventtitle, eventtime, eventtag) = readMetafile("%s%s" % (config.usage.default_path.value, filename))
-
-				if ptsgetnextfile:
-					ptsgetnextfile = False
-					ptsmergeSRC = filename[0:-5]
-
-					if ASCIItranslit.legacyEncode(eventname) == ASCIItranslit.legacyEncode(ptsmergeeventname):
-						# Copy EIT File
-						if fileExists("%s%s.eit" % (config.usage.default_path.value, ptsmergeSRC[0:-3])):
-							copyfile("%s%s.eit" % (config.usage.default_path.value, ptsmergeSRC[0:-3]), "%s%s.eit" % (config.usage.default_path.value, ptsmergeDEST[0:-3]))
-
-						# Delete AP and SC Files
-						if os.path.exists("%s%s.ap" % (config.usage.default_path.value, ptsmergeDEST)):
-							self.BgFileEraser.erase("%s%s.ap" % (config.usage.default_path.value, ptsmergeDEST))
-						if os.path.exists("%s%s.sc" % (config.usage.default_path.value, ptsmergeDEST)):
-							self.BgFileEraser.erase("%s%s.sc" % (config.usage.default_path.value, ptsmergeDEST))
-
-						# Add Merge Job to JobManager
-						JobManager.AddJob(MergeTimeshiftJob(self, "cat \"%s%s\" >> \"%s%s\"" % (config.usage.default_path.value, ptsmergeSRC, config.usage.default_path.value, ptsmergeDEST), ptsmergeSRC, ptsmergeDEST, eventname))
-						config.timeshift.isRecording.value = True
-						ptsfilemerged = True
-					else:
-						ptsgetnextfile = True
-
-				if eventtag == "pts_merge" and not ptsgetnextfile:
-					ptsgetnextfile = True
-					ptsmergeDEST = filename[0:-5]
-					ptsmergeeventname = eventname
-					ptsfilemerged = False
-
-					# If still recording or transfering, try again later ...
-					if fileExists("%s%s" % (config.usage.default_path.value, ptsmergeDEST)):
-						statinfo = os.stat("%s%s" % (config.usage.default_path.value, ptsmergeDEST))
-						if statinfo.st_mtime > (time() - 10.0):
-							self.pts_mergeRecords_timer.start(120000, True)
-							return
-
-					# Rewrite Meta File to get rid of pts_merge tag
-					metafile = open("%s%s.meta" % (config.usage.default_path.value, ptsmergeDEST), "w")
-					metafile.write("%s\n%s\n%s\n%i\n" % (servicerefname, eventname, eventtitle, int(eventtime)))
-					metafile.close()
+				# Add Merge Job to JobManager, the source leaves the index once
+				# it has been appended
+				self.pts_merged_records.add(ptsmergeDEST)
+				JobManager.AddJob(MergeTimeshiftJob(self, ptsmergeSRC, ptsmergeDEST, eventname))
+				config.timeshift.isRecording.value = True
+				return
+
+			# Nothing more to append, rewrite Meta File to get rid of pts_merge tag
+			metafile = open("%s%s.meta" % (path, ptsmergeDEST), "w")
+			metafile.write("%s\n%s\n%s\n%i\n" % (servicerefname, eventname, eventtitle, int(eventtime)))
+			metafile.close()
+			del index[ptsmergeDEST]
 
-		# Merging failed :(
-		if not ptsfilemerged and ptsgetnextfile:
-			Notifications.AddNotification(MessageBox, _("[Timeshift] Merging records failed!"), MessageBox.TYPE_ERROR)
+			# Merging failed :(
+			if ptsmergeDEST not in self.pts_merged_records:
+				Notifications.AddNotification(MessageBox, _("[Timeshift] Merging records failed!"), MessageBox.TYPE_ERROR)
+			self.pts_merged_records.discard(ptsmergeDEST)
 
-	def ptsCreateAPSCFiles(self, filename):
+	def ptsCreateAPSCFiles(self, filename, start=0):
 		dprint("ptsCreateAPSCFiles")
 		if fileExists(filename, 'r'):
 			if fileExists(filename + ".meta", 'r'):
@@ -1194,7 +1216,7 @@ class InfoBarTimeshift:
 				(__, eventname, __, __, __) = readMetafile(filename + ".meta")
 			else:
 				eventname = ""
-			JobManager.AddJob(CreateAPSCFilesJob(self, "/usr/lib/enigma2/python/Components/createapscfiles \"%s\"" % filename, eventname))
+			JobManager.AddJob(CreateAPSCFilesJob(self, filename, eventname, start))
 		else:
 			self.ptsSaveTimeshiftFinished()
 
@@ -1221,8 +1243,10 @@ class InfoBarTimeshift:
 			# Create AP and SC Files
 			self.ptsCreateAPSCFiles(destfile)
 
-	def ptsMergeFilefinished(self, srcfile, destfile):
+	def ptsMergeFilefinished(self, srcfile, destfile, destsize=0, indexed=False):
 		dprint("ptsMergeFilefinished")
+		if self.pts_merge_index is not None:
+			self.pts_merge_index.pop(os.path.basename(srcfile), None)
 		if self.session.nav.RecordTimer.isRecording() or self.hasPendingSaveTimeshiftJobs():
 			# Rename files and delete them later ...
 			self.pts_mergeCleanUp_timer.start(120000, True)
@@ -1236,8 +1260,15 @@ class InfoBarTimeshift:
 			self.BgFileEraser.erase("%s.cuts" % srcfile)
 			self.BgFileEraser.erase("%s.eit" % (srcfile[0:-3]))
 
-		# Create AP and SC Files
-		self.ptsCreateAPSCFiles(destfile)
+		# Create AP and SC Files, only for the appended part when the files
+		# of the destination are complete, unless the merge moved the entries
+		# of the source into them
+		if indexed:
+			self.ptsSaveTimeshiftFinished()
+		elif destsize and fileExists(destfile + ".ap") and fileExists(destfile + ".sc") and not fileExists(destfile + ".reconstruct_apsc"):
+			self.ptsCreateAPSCFiles(destfile, destsize)
+		else:
+			self.ptsCreateAPSCFiles(destfile)
 
 		# Run Merge-Process one more time to check if there are more records to merge
 		self.pts_mergeRecords_timer.start(10000, True)
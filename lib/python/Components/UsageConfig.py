@@ -12,6 +12,7 @@ from config import ConfigSubsection, ConfigYesNo, config, ConfigSelection, Confi
 from Tools.Directories import resolveFilename, SCOPE_HDD, SCOPE_TIMESHIFT, defaultRecordingLocation
 from Components.NimManager import nimmanager
 from Components.ServiceList import refreshServiceList
+from Components.ServiceIndex import serviceIndex
 from SystemInfo import SystemInfo
 
 def InitUsageConfig():
@@ -40,6 +41,7 @@ def InitUsageConfig():
 
 	def alternativeNumberModeChange(configElement):
 		eDVBDB.getInstance().setNumberingMode(configElement.value)
+		serviceIndex.invalidate()
 		refreshServiceList()
 
 	config.usage.alternative_number_mode.addNotifier(alternativeNumberModeChange)
@@ -1,6 +1,5 @@
 import bisect
 from time import sleep
-from struct import unpack, Struct
 from ctypes import CDLL, c_longlong
 
 from enigma import getDesktop, iPlayableService
@@ -19,8 +18,7 @@ from Screens.HelpMenu import HelpableScreen
 from Components.Sources.List import List
 from Components.config import config, ConfigYesNo
 from Screens.MovieSelection import MovieSelection
-
-apscParser = Struct(">qq")    # big-endian, 64-bit offset and 64-bit PTS/data
+from Tools.APSCFile import AccessPoints, truncateAPSC
 
 config.usage.cutlisteditor_tutorial_seen = ConfigYesNo(default=False)
 config.usage.cutlisteditor_keep_bookmarks = ConfigYesNo(default=False)
@@ -659,28 +657,13 @@ class CutListEditor(Screen, InfoBarBase, InfoBarSeek, InfoBarCueSheetSupport, He
 
 	def trunc(self, movie, pts):
 		i = self.getAP(pts)
-		if i < len(self.ap):
+		if i < len(self.ap) - 1:
 			i += 1
-		offset = self.ap[i][1]
+		offset = self.ap.offset(i)
 		with open(movie, "r+b") as f:
 			f.truncate(offset)
-
-		def truncapsc(suffix):
-			with open(movie + suffix, "r+b") as f:
-				while True:
-					data = f.read(8192 * apscParser.size)
-					if len(data) < apscParser.size:
-						break
-					ofs = apscParser.unpack_from(data, len(data) - apscParser.size)[0]
-					if ofs >= offset:
-						apsc = unpack(">%dq" % (len(data) / 8), data)
-						for i, ofs in enumerate(apsc[::2]):
-							if ofs >= offset:
-								f.truncate(f.tell() - len(data) + i * apscParser.size)
-								return
-
-		truncapsc(".ap")
-		truncapsc(".sc")
+		truncateAPSC(movie + ".ap", offset)
+		truncateAPSC(movie + ".sc", offset)
 
 	def punch(self, movie):
 		outpts = [x[0] for x in self.cut_list if x[1] == self.CUT_TYPE_OUT]
@@ -706,42 +689,19 @@ class CutListEditor(Screen, InfoBarBase, InfoBarSeek, InfoBarCueSheetSupport, He
 				if i < 0:
 					i = 0
 				# FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE
-				fallocate64(fd, 3, c_longlong(self.ap[o][1]), c_longlong(self.ap[i][1] - self.ap[o][1]))
+				fallocate64(fd, 3, c_longlong(self.ap.offset(o)), c_longlong(self.ap.offset(i) - self.ap.offset(o)))
 
 	# Return the index of the access point at or after PTS.
 	def getAP(self, pts):
-		i = bisect.bisect_left(self.ap, (pts, 0))
-		return i if i < len(self.ap) else i - 1
+		return self.ap.getAP(pts)
 
 	def loadAP(self, movie):
-		self.ap = []
+		self.ap = None
 		try:
-			with open(movie + ".ap", "rb") as f:
-				data = f.read()
+			ap = AccessPoints(movie + ".ap")
 		except:
 			return False
-		if len(data) < 2 * apscParser.size:
+		if len(ap) < 2:
 			return False
-
-		data = unpack(">%dq" % (len(data) / 8), data)
-
-		ofs1, currentDelta = data[0], data[1]
-		if ofs1 != 0:
-			ofs2, pts2 = data[2], data[3]
-			if ofs1 < ofs2:
-				diff = ofs2 - ofs1
-				tdiff = pts2 - currentDelta
-				tdiff *= ofs1
-				tdiff /= diff
-				currentDelta -= tdiff
-		lastpts = -1
-		append = self.ap.append
-		for i in zip(data[0::2], data[1::2]):
-			current = i[1] - currentDelta
-			diff = current - lastpts
-			if diff <= 0 or diff > 90000*10:
-				currentDelta = i[1] - lastpts - 90000/25
-			lastpts = i[1] - currentDelta
-			append((lastpts, i[0]))
-
+		self.ap = ap
 		return True
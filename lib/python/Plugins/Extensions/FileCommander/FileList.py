@@ -1,6 +1,6 @@
 import os
 import re
-from Components.FileList import FileList as FileListBase, EXTENSIONS as BASE_EXTENSIONS
+from Components.FileList import FileList as FileListBase, EXTENSIONS as BASE_EXTENSIONS, listDirectory
 from Components.Harddisk import harddiskmanager
 
 from Tools.Directories import fileExists, resolveFilename, SCOPE_PLUGINS
@@ -44,22 +44,22 @@ def getPNGByExt(name):
 		ext = "rar"
 
 	if ext in EXTENSIONS:
-		return LoadPixmap(path=os.path.join(imagePath, EXTENSIONS[ext]) + ".png")
+		return LoadPixmap(cached=True, path=os.path.join(imagePath, EXTENSIONS[ext]) + ".png")
 	else:
-		return LoadPixmap(path=os.path.join(imagePath, "file.png"))
+		return LoadPixmap(cached=True, path=os.path.join(imagePath, "file.png"))
 
 def FileEntryComponent(name, absolute=None, isDir=False, isLink=False):
 	res = [(absolute, isDir, isLink)]
 	res.append((eListboxPythonMultiContent.TYPE_TEXT, 55, 1, 1175, 25, 0, RT_HALIGN_LEFT, name))
 	if isLink:
-		link_png = LoadPixmap(path=os.path.join(imagePath, "link-arrow.png"))
+		link_png = LoadPixmap(cached=True, path=os.path.join(imagePath, "link-arrow.png"))
 	else:
 		link_png = None
 	if isDir:
 		if isLink and link_png is None:
-			png = LoadPixmap(path=os.path.join(imagePath, "link.png"))
+			png = LoadPixmap(cached=True, path=os.path.join(imagePath, "link.png"))
 		else:
-			png = LoadPixmap(path=os.path.join(imagePath, "directory.png"))
+			png = LoadPixmap(cached=True, path=os.path.join(imagePath, "directory.png"))
 	else:
 		png = getPNGByExt(name)
 	if png is not None:
@@ -74,6 +74,14 @@ class FileList(FileListBase):
 		self.parent_directory = None
 		FileListBase.__init__(self, directory, showDirectories=showDirectories, showFiles=showFiles, showMountpoints=showMountpoints, matchingPattern=matchingPattern, useServiceRef=useServiceRef, inhibitDirs=inhibitDirs, inhibitMounts=inhibitMounts, isTop=isTop, enableWrapAround=enableWrapAround, additionalExtensions=additionalExtensions)
 
+	def buildEntry(self, data, name):
+		return FileEntryComponent(name=name, absolute=data[0], isDir=data[1], isLink=data[2])
+
+	def isLink(self, path, name, links):
+		if links is None:
+			return os.path.islink(path)
+		return name in links
+
 	def changeDir(self, directory, select=None):
 		self.list = []
 
@@ -87,12 +95,13 @@ class FileList(FileListBase):
 		self.parent_directory = False
 		directories = []
 		files = []
+		links = None
 
 		if directory is None and self.showMountpoints:  # present available mountpoints
 			for p in harddiskmanager.getMountedPartitions():
 				path = os.path.join(p.mountpoint, "")
 				if path not in self.inhibitMounts and not self.inParentDirs(path, self.inhibitDirs):
-					self.list.append(FileEntryComponent(name=p.description, absolute=path, isDir=True, isLink=False))
+					self.list.append(((path, True, False), p.description))
 			files = []
 			directories = []
 		elif directory is None:
@@ -119,31 +128,21 @@ class FileList(FileListBase):
 			files.sort()
 		else:
 			if fileExists(directory):
-				try:
-					files = os.listdir(directory)
-				except:
-					files = []
-				files.sort()
-				tmpfiles = files[:]
-				for x in tmpfiles:
-					if os.path.isdir(directory + x):
-						directories.append(directory + x + "/")
-						files.remove(x)
+				directories, files, links = listDirectory(directory)
 
 		if directory is not None and self.showDirectories and not self.isTop:
 			if directory == self.current_mountpoint and self.showMountpoints:
-				self.list.append(FileEntryComponent(name="<" + _("List of Storage Devices") + ">", absolute=None, isDir=True, isLink=False))
+				self.list.append(((None, True, False), "<" + _("List of Storage Devices") + ">"))
 				self.parent_directory = None
 			elif (directory != "/") and not (self.inhibitMounts and self.getMountpoint(directory) in self.inhibitMounts):
 				self.parent_directory = '/'.join(directory.split('/')[:-2]) + '/'
-				self.list.append(FileEntryComponent(name="<" + _("Parent Directory") + ">", absolute=self.parent_directory, isDir=True, isLink=False))
+				self.list.append(((self.parent_directory, True, False), "<" + _("Parent Directory") + ">"))
 
 		if self.showDirectories:
 			for x in directories:
 				if not (self.inhibitMounts and self.getMountpoint(x) in self.inhibitMounts) and not self.inParentDirs(x, self.inhibitDirs):
 					name = x.split('/')[-2]
-					testname = x[:-1]
-					self.list.append(FileEntryComponent(name=name, absolute=x, isDir=True, isLink=os.path.islink(testname)))
+					self.list.append(((x, True, self.isLink(x[:-1], name, links)), name))
 
 		if self.showFiles:
 			for x in files:
@@ -155,10 +154,10 @@ class FileList(FileListBase):
 					name = x
 
 				if (self.matchingPattern is None) or self.matchingPattern.search(path):
-					self.list.append(FileEntryComponent(name=name, absolute=x, isDir=False, isLink=os.path.islink(path)))
+					self.list.append(((x, False, self.isLink(path, name, links)), name))
 
 		if self.showMountpoints and len(self.list) == 0:
-			self.list.append(FileEntryComponent(name=_("nothing connected"), absolute=None, isDir=False, isLink=False))
+			self.list.append(((None, False, False), _("nothing connected")))
 
 		self.l.setList(self.list)
 
@@ -187,14 +186,14 @@ def MultiFileSelectEntryComponent(name, absolute=None, isDir=False, isLink=False
 	res.append((eListboxPythonMultiContent.TYPE_TEXT, 55, 1, 1175, 25, 0, RT_HALIGN_LEFT, name))
 
 	if isLink:
-		link_png = LoadPixmap(path=os.path.join(imagePath, "link-arrow.png"))
+		link_png = LoadPixmap(cached=True, path=os.path.join(imagePath, "link-arrow.png"))
 	else:
 		link_png = None
 	if isDir:
 		if isLink and link_png is None:
-			png = LoadPixmap(path=os.path.join(imagePath, "link.png"))
+			png = LoadPixmap(cached=True, path=os.path.join(imagePath, "link.png"))
 		else:
-			png = LoadPixmap(path=os.path.join(imagePath, "directory.png"))
+			png = LoadPixmap(cached=True, path=os.path.join(imagePath, "directory.png"))
 	else:
 		png = getPNGByExt(name)
 	if png is not None:
@@ -204,10 +203,10 @@ def MultiFileSelectEntryComponent(name, absolute=None, isDir=False, isLink=False
 
 	if not name.startswith('<'):
 		if selected is False:
-			icon = LoadPixmap(path=os.path.join(imagePath, "lock_off.png"))
+			icon = LoadPixmap(cached=True, path=os.path.join(imagePath, "lock_off.png"))
 			res.append((eListboxPythonMultiContent.TYPE_PIXMAP_ALPHABLEND, 4, 0, 25, 25, icon))
 		else:
-			icon = LoadPixmap(path=os.path.join(imagePath, "lock_on.png"))
+			icon = LoadPixmap(cached=True, path=os.path.join(imagePath, "lock_on.png"))
 			res.append((eListboxPythonMultiContent.TYPE_PIXMAP_ALPHABLEND, 4, 0, 25, 25, icon))
 	return res
 
@@ -224,36 +223,26 @@ class MultiFileSelectList(FileList):
 		for f in self.onSelectionChanged:
 			f()
 
+	def buildEntry(self, data):
+		return MultiFileSelectEntryComponent(name=data[4], absolute=data[0], isDir=data[1], isLink=data[2], selected=data[3])
+
 	def changeSelectionState(self):
 		idx = self.l.getCurrentSelectionIndex()
-		# os.system('echo %s >> /tmp/test1.log' % ("- xxx - "))
-		count = 0
-		newList = []
-		for x in self.list:
-			# os.system('echo %s >> /tmp/test1.log' % ("- state0 - "))
-			if idx == count:
-				if x[0][4].startswith('<'):
-					newList.append(x)
-				else:
-					if x[0][1] is True:
-						realPathname = x[0][0]
-					else:
-						realPathname = self.current_directory + x[0][0]
-					SelectState = not x[0][3]
-					if SelectState:
-						if realPathname not in self.selectedFiles:
-							self.selectedFiles.append(realPathname)
-					else:
-						if realPathname in self.selectedFiles:
-							self.selectedFiles.remove(realPathname)
-					newList.append(MultiFileSelectEntryComponent(name=x[0][4], absolute=x[0][0], isDir=x[0][1], isLink=x[0][2], selected=SelectState))
+		x = self.list[idx]
+		if not x[0][4].startswith('<'):
+			if x[0][1] is True:
+				realPathname = x[0][0]
 			else:
-				newList.append(x)
-
-			count += 1
-
-		self.list = newList
-		self.l.setList(self.list)
+				realPathname = self.current_directory + x[0][0]
+			SelectState = not x[0][3]
+			if SelectState:
+				if realPathname not in self.selectedFiles:
+					self.selectedFiles.append(realPathname)
+			else:
+				if realPathname in self.selectedFiles:
+					self.selectedFiles.remove(realPathname)
+			self.list[idx] = ((x[0][0], x[0][1], x[0][2], SelectState, x[0][4]),)
+			self.l.invalidateEntry(idx)
 
 	def getSelectedList(self):
 		return self.selectedFiles
@@ -270,12 +259,13 @@ class MultiFileSelectList(FileList):
 		self.current_directory = directory
 		directories = []
 		files = []
+		links = None
 
 		if directory is None and self.showMountpoints:  # present available mountpoints
 			for p in harddiskmanager.getMountedPartitions():
 				path = os.path.join(p.mountpoint, "")
 				if path not in self.inhibitMounts and not self.inParentDirs(path, self.inhibitDirs):
-					self.list.append(MultiFileSelectEntryComponent(name=p.description, absolute=path, isDir=True))
+					self.list.append(((path, True, False, False, p.description),))
 			files = []
 			directories = []
 		elif directory is None:
@@ -302,32 +292,22 @@ class MultiFileSelectList(FileList):
 			files.sort()
 		else:
 			if fileExists(directory):
-				try:
-					files = os.listdir(directory)
-				except:
-					files = []
-				files.sort()
-				tmpfiles = files[:]
-				for x in tmpfiles:
-					if os.path.isdir(directory + x):
-						directories.append(directory + x + "/")
-						files.remove(x)
+				directories, files, links = listDirectory(directory)
 
 		if directory is not None and self.showDirectories and not self.isTop:
 			if directory == self.current_mountpoint and self.showMountpoints:
-				self.list.append(MultiFileSelectEntryComponent(name="<" + _("List of Storage Devices") + ">", absolute=None, isDir=True))
+				self.list.append(((None, True, False, False, "<" + _("List of Storage Devices") + ">"),))
 				self.parent_directory = None
 			elif (directory != "/") and not (self.inhibitMounts and self.getMountpoint(directory) in self.inhibitMounts):
 				self.parent_directory = '/'.join(directory.split('/')[:-2]) + '/'
-				self.list.append(MultiFileSelectEntryComponent(name="<" + _("Parent Directory") + ">", absolute=self.parent_directory, isDir=True))
+				self.list.append(((self.parent_directory, True, False, False, "<" + _("Parent Directory") + ">"),))
 
 		if self.showDirectories:
 			for x in directories:
 				if not (self.inhibitMounts and self.getMountpoint(x) in self.inhibitMounts) and not self.inParentDirs(x, self.inhibitDirs):
 					name = x.split('/')[-2]
-					testname = x[:-1]
 					alreadySelected = x in self.selectedFiles
-					self.list.append(MultiFileSelectEntryComponent(name=name, absolute=x, isDir=True, isLink=os.path.islink(testname), selected=alreadySelected))
+					self.list.append(((x, True, self.isLink(x[:-1], name, links), alreadySelected, name),))
 
 		if self.showFiles:
 			for x in files:
@@ -340,7 +320,7 @@ class MultiFileSelectList(FileList):
 
 				if (self.matchingPattern is None) or self.matchingPattern.search(path):
 					alreadySelected = path in self.selectedFiles
-					self.list.append(MultiFileSelectEntryComponent(name=name, absolute=x, isDir=False, isLink=os.path.islink(path), selected=alreadySelected))
+					self.list.append(((x, False, self.isLink(path, name, links), alreadySelected, name),))
 
 		self.l.setList(self.list)
 
@@ -6,7 +6,7 @@ from Plugins.Plugin import PluginDescriptor
 # Components
 from Components.config import config, ConfigSubsection, ConfigInteger, ConfigYesNo, ConfigText, ConfigDirectory, ConfigSelection, ConfigSet, NoSave, ConfigNothing, ConfigLocations
 from Components.Label import Label
-from Components.FileTransfer import FileTransferJob, ALL_MOVIE_EXTENSIONS
+from Components.FileTransfer import FileTransferJob, FileListTransferJob, ALL_MOVIE_EXTENSIONS
 from Components.Task import job_manager
 from Components.ActionMap import ActionMap, HelpableActionMap
 from Components.Sources.Boolean import Boolean
@@ -978,12 +978,14 @@ class FileCommanderScreenFileSelect(Screen, HelpableScreen, key_actions):
 
 		self.cleanList()
 		updateDirs = [targetDir, self.SOURCELIST.getCurrentDirectory()]
+		if targetDir.endswith("/") and targetDir != "/":
+			targetDir = targetDir[:-1]
 		jobs = []
-		for file in self.selectedFiles:
-			dst_file = targetDir
-			if dst_file.endswith("/") and dst_file != "/":
-				targetDir = dst_file[:-1]
-			jobs.append(FileTransferJob(file, targetDir, False, False, "%s : %s" % (_("move file"), file)))
+		if len(self.selectedFiles) == 1:
+			jobs.append(FileTransferJob(self.selectedFiles[0], targetDir, False, False, "%s : %s" % (_("move file"), self.selectedFiles[0])))
+		elif self.selectedFiles:
+			# one job for all, so files on different disks are moved alongside each other
+			jobs.append(FileListTransferJob([(file, False) for file in self.selectedFiles], targetDir, False, "%s : %s" % (_("move files"), targetDir)))
 		self.exit(jobs, updateDirs)
 
 # ## copy select ###
@@ -994,15 +996,18 @@ class FileCommanderScreenFileSelect(Screen, HelpableScreen, key_actions):
 
 		self.cleanList()
 		updateDirs = [targetDir]
+		if targetDir.endswith("/") and targetDir != "/":
+			targetDir = targetDir[:-1]
 		jobs = []
-		for file in self.selectedFiles:
-			dst_file = targetDir
-			if dst_file.endswith("/") and dst_file != "/":
-				targetDir = dst_file[:-1]
+		if len(self.selectedFiles) == 1:
+			file = self.selectedFiles[0]
 			if file.endswith("/"):
 				jobs.append(FileTransferJob(file, targetDir, True, True, "%s : %s" % (_("copy folder"), file)))
 			else:
 				jobs.append(FileTransferJob(file, targetDir, False, True, "%s : %s" % (_("copy file"), file)))
+		elif self.selectedFiles:
+			# one job for all, so files on different disks are copied alongside each other
+			jobs.append(FileListTransferJob([(file, file.endswith("/")) for file in self.selectedFiles], targetDir, True, "%s : %s" % (_("copy files"), targetDir)))
 		self.exit(jobs, updateDirs)
 
 	def goBlue(self):
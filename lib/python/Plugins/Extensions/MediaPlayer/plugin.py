@@ -514,7 +514,7 @@ class MediaPlayer(Screen, InfoBarBase, InfoBarScreenSaver, InfoBarSeek, InfoBarA
 		if self.currList == "filelist":
 			idx = self.filelist.getSelectionIndex()
 			r = self.filelist.list[idx]
-			text = r[1][7]
+			text = r[1]
 			if r[0][1]:
 				if len(text) < 2:
 					text += " "
@@ -525,7 +525,7 @@ class MediaPlayer(Screen, InfoBarBase, InfoBarScreenSaver, InfoBarSeek, InfoBarA
 			idx += 1
 			if idx < len(self.filelist.list):
 				r = self.filelist.list[idx]
-				text = r[1][7]
+				text = r[1]
 				if r[0][1]:
 					text = "/" + text
 				self.summaries.setText(text, 3)
@@ -535,7 +535,7 @@ class MediaPlayer(Screen, InfoBarBase, InfoBarScreenSaver, InfoBarSeek, InfoBarA
 			idx += 1
 			if idx < len(self.filelist.list):
 				r = self.filelist.list[idx]
-				text = r[1][7]
+				text = r[1]
 				if r[0][1]:
 					text = "/" + text
 				self.summaries.setText(text, 4)
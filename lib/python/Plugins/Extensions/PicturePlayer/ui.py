@@ -515,14 +515,14 @@ class Pic_Full_View(Screen, HelpableScreen):
 		self.dirlistcount = 0
 
 		for x in filelist:
-			if len(filelist[0]) == 3:  # orig. filelist
+			if len(filelist[0]) == 2 and filelist[0][1] is None:  # scanlist
 				if not x[0][1]:
-					self.filelist.append(path + x[0][0])
+					self.filelist.append(x[0][0])
 				else:
 					self.dirlistcount += 1
-			elif len(filelist[0]) == 2:  # scanlist
+			elif len(filelist[0]) in (2, 3):  # orig. filelist
 				if not x[0][1]:
-					self.filelist.append(x[0][0])
+					self.filelist.append(path + x[0][0])
 				else:
 					self.dirlistcount += 1
 			else:  # thumbnaillist
@@ -12,6 +12,7 @@ from Components.About import about
 from Components.Button import Button
 from Components.Label import Label
 from Components.ServiceList import ServiceList, refreshServiceList
+from Components.ServiceIndex import serviceIndex
 from Components.ActionMap import ActionMap, HelpableActionMap, HelpableNumberActionMap
 from Components.MenuList import MenuList
 from Components.ServiceEventTracker import ServiceEventTracker, InfoBarBase
@@ -23,7 +24,7 @@ from Components.Renderer.Picon import getPiconName
 from Screens.TimerEdit import TimerSanityConflict
 profile("ChannelSelection.py 1")
 from EpgSelection import EPGSelection
-from enigma import eActionMap, eServiceReferenceDVB, eServiceReference, eEPGCache, eServiceCenter, eRCInput, eTimer, ePoint, eDVBDB, iPlayableService, iServiceInformation, getPrevAsciiCode, eEnv, loadPNG, eDVBLocalTimeHandler
+from enigma import eActionMap, eServiceReferenceDVB, eServiceReference, eEPGCache, eServiceCenter, eRCInput, eTimer, ePoint, eDVBDB, iPlayableService, iServiceInformation, getPrevAsciiCode, eEnv, eDVBLocalTimeHandler
 from Components.config import config, configfile, ConfigSubsection, ConfigText, ConfigYesNo
 from Tools.NumericalTextInput import NumericalTextInput
 profile("ChannelSelection.py 2")
@@ -52,6 +53,7 @@ from ServiceReference import ServiceReference
 from Tools.BoundFunction import boundFunction
 from Tools import Notifications
 from Tools.Alternatives import GetWithAlternative
+from Tools.LoadPixmap import pixmapCache
 from Tools.ServiceReference import service_types_tv_ref, service_types_radio_ref, serviceRefAppendPath
 from Plugins.Plugin import PluginDescriptor
 from Components.PluginComponent import plugins
@@ -346,36 +348,42 @@ class ChannelContextMenu(Screen):
 	def addDedicated3DFlag(self):
 		eDVBDB.getInstance().addFlag(eServiceReference(self.csel.getCurrentSelection().toString()), FLAG_IS_DEDICATED_3D)
 		eDVBDB.getInstance().reloadBouquets()
+		serviceIndex.invalidate()
 		self.set3DMode(True)
 		self.close()
 
 	def removeDedicated3DFlag(self):
 		eDVBDB.getInstance().removeFlag(eServiceReference(self.csel.getCurrentSelection().toString()), FLAG_IS_DEDICATED_3D)
 		eDVBDB.getInstance().reloadBouquets()
+		serviceIndex.invalidate()
 		self.set3DMode(False)
 		self.close()
 
 	def addHideVBIFlag(self):
 		eDVBDB.getInstance().addFlag(eServiceReference(self.csel.getCurrentSelection().toString()), FLAG_HIDE_VBI)
 		eDVBDB.getInstance().reloadBouquets()
+		serviceIndex.invalidate()
 		Screens.InfoBar.InfoBar.instance.showHideVBI()
 		self.close()
 
 	def removeHideVBIFlag(self):
 		eDVBDB.getInstance().removeFlag(eServiceReference(self.csel.getCurrentSelection().toString()), FLAG_HIDE_VBI)
 		eDVBDB.getInstance().reloadBouquets()
+		serviceIndex.invalidate()
 		Screens.InfoBar.InfoBar.instance.showHideVBI()
 		self.close()
 
 	def addCenterDVBSubsFlag(self):
 		eDVBDB.getInstance().addFlag(eServiceReference(self.csel.getCurrentSelection().toString()), FLAG_CENTER_DVB_SUBS)
 		eDVBDB.getInstance().reloadBouquets()
+		serviceIndex.invalidate()
 		config.subtitles.dvb_subtitles_centered.value = True
 		self.close()
 
 	def removeCenterDVBSubsFlag(self):
 		eDVBDB.getInstance().removeFlag(eServiceReference(self.csel.getCurrentSelection().toString()), FLAG_CENTER_DVB_SUBS)
 		eDVBDB.getInstance().reloadBouquets()
+		serviceIndex.invalidate()
 		config.subtitles.dvb_subtitles_centered.value = False
 		self.close()
 
@@ -432,6 +440,7 @@ class ChannelContextMenu(Screen):
 		if answer:
 			self.csel.removeBouquet()
 			eDVBDB.getInstance().reloadBouquets()
+			serviceIndex.invalidate()
 			self.close()
 
 	def purgeDeletedBouquets(self):
@@ -455,6 +464,7 @@ class ChannelContextMenu(Screen):
 		eDVBDBInstance = eDVBDB.getInstance()
 		eDVBDBInstance.setLoadUnlinkedUserbouquets(True)
 		eDVBDBInstance.reloadBouquets()
+		serviceIndex.invalidate()
 		eDVBDBInstance.setLoadUnlinkedUserbouquets(config.misc.load_unlinked_userbouquets.value)
 		refreshServiceList()
 		self.csel.showFavourites()
@@ -482,6 +492,7 @@ class ChannelContextMenu(Screen):
 	def reloadServices(self):
 		eDVBDB.getInstance().reloadBouquets()
 		eDVBDB.getInstance().reloadServicelist()
+		serviceIndex.invalidate()
 		self.session.openWithCallback(self.close, MessageBox, _("The service list has been reloaded."), MessageBox.TYPE_INFO, timeout=5)
 
 	def showServiceInformations(self):
@@ -1124,6 +1135,7 @@ class ChannelSelectionEdit:
 				mutableList.addService(current)
 				mutableList.moveService(current, index)
 				mutableList.flushChanges()
+				serviceIndex.invalidate()
 				self.servicelist.addService(current, True)
 				self.servicelist.removeCurrent()
 				if not self.servicelist.atEnd():
@@ -1140,10 +1152,12 @@ class ChannelSelectionEdit:
 				if not mutableList.addService(ref, current):
 					self.servicelist.addService(ref, True)
 					mutableList.flushChanges()
+					serviceIndex.invalidate()
 					break
 			elif not mutableList.addService(ref):
 				self.servicelist.addService(ref, True)
 				mutableList.flushChanges()
+				serviceIndex.invalidate()
 				break
 			cnt += 1
 
@@ -1166,12 +1180,14 @@ class ChannelSelectionEdit:
 				mutableBouquet.removeService(cur_service.ref)
 				mutableBouquet.flushChanges()
 				eDVBDB.getInstance().reloadBouquets()
+				serviceIndex.invalidate()
 				mutableAlternatives = new_ref.list().startEdit()
 				if mutableAlternatives:
 					mutableAlternatives.setListName(name)
 					if mutableAlternatives.addService(cur_service.ref):
 						print "[ChannelSelection] add", cur_service.ref.toString(), "to new alternatives failed"
 					mutableAlternatives.flushChanges()
+					serviceIndex.invalidate()
 					self.servicelist.addService(new_ref.ref, True)
 					self.servicelist.removeCurrent()
 					if not self.atEnd():
@@ -1202,6 +1218,7 @@ class ChannelSelectionEdit:
 			if not mutableBouquetList.addService(new_bouquet_ref):
 				mutableBouquetList.flushChanges()
 				eDVBDB.getInstance().reloadBouquets()
+				serviceIndex.invalidate()
 				mutableBouquet = serviceHandler.list(new_bouquet_ref).startEdit()
 				if mutableBouquet:
 					mutableBouquet.setListName(bName)
@@ -1210,6 +1227,7 @@ class ChannelSelectionEdit:
 							if mutableBouquet.addService(service):
 								print "[ChannelSelection] add", service.toString(), "to new bouquet failed"
 					mutableBouquet.flushChanges()
+					serviceIndex.invalidate()
 				else:
 					print "[ChannelSelection] get mutable list for new created bouquet failed"
 				# do some voodoo to check if current_root is equal to bouquet_root
@@ -1356,6 +1374,7 @@ class ChannelSelectionEdit:
 				if self.bouquet_mark_edit == EDIT_ALTERNATIVES and not new_marked and self.__marked:
 					self.mutableList.addService(eServiceReference(self.__marked[0]))
 				self.mutableList.flushChanges()
+				serviceIndex.invalidate()
 		self.__marked = []
 		self.clearMarks()
 		self.bouquet_mark_edit = OFF
@@ -1405,6 +1424,7 @@ class ChannelSelectionEdit:
 		if ref.valid() and mutableList is not None:
 			if not mutableList.removeService(ref):
 				mutableList.flushChanges()  # FIXME dont flush on each single removed service
+				serviceIndex.invalidate()
 				self.servicelist.removeCurrent()
 				self.servicelist.resetRoot()
 				curref = self.session.nav.getCurrentlyPlayingServiceOrGroup()
@@ -1418,6 +1438,7 @@ class ChannelSelectionEdit:
 				service = self.servicelist.getCurrent()
 			if not mutableList.addService(service):
 				mutableList.flushChanges()
+				serviceIndex.invalidate()
 				# do some voodoo to check if current_root is equal to dest
 				cur_root = self.getRoot()
 				str1 = cur_root and cur_root.toString() or -1
@@ -1439,6 +1460,7 @@ class ChannelSelectionEdit:
 				self.toggleMoveMarked()  # unmark current entry
 			self.movemode = False
 			self.mutableList.flushChanges()  # FIXME add check if changes was made
+			serviceIndex.invalidate()
 			self.mutableList = None
 			self.setTitle(self.saved_title)
 			self.saved_title = None
@@ -1574,21 +1596,9 @@ class ChannelSelectionBase(Screen, HelpableScreen):
 	def getBouquetNumOffset(self, bouquet):
 		if not config.usage.multibouquet.value:
 			return 0
-		str = bouquet.toString()
-		offset = 0
 		if 'userbouquet.' in bouquet.toCompareString():
-			serviceHandler = eServiceCenter.getInstance()
-			servicelist = serviceHandler.list(bouquet)
-			if servicelist is not None:
-				while True:
-					serviceIterator = servicelist.getNext()
-					if not serviceIterator.valid():  # check if end of list
-						break
-					number = serviceIterator.getChannelNum()
-					if number > 0:
-						offset = number - 1
-						break
-		return offset
+			return serviceIndex.getNumberOffset(bouquet)
+		return 0
 
 	def recallBouquetMode(self):
 		if self.mode == MODE_TV:
@@ -2330,43 +2340,35 @@ class ChannelSelection(ChannelSelectionBase, ChannelSelectionEdit, ChannelSelect
 
 	def findServiceBouquet(self, matchFunc):
 
-		def matchService(bouquet, serviceHandler, matchFunc):
-			servicelist = serviceHandler.list(bouquet)
-			if servicelist is not None:
-				serviceIterator = servicelist.getNext()
-				while serviceIterator.valid():
-					if matchFunc(serviceIterator):
-						return eServiceReference(serviceIterator)
-					serviceIterator = servicelist.getNext()
+		def matchService(bouquet, matchFunc):
+			for service in serviceIndex.getServices(bouquet):
+				if matchFunc(service):
+					return eServiceReference(service)
 			return eServiceReference()
 
 		service_types_ref = service_types_tv_ref
 		foundService = eServiceReference()
-		serviceHandler = eServiceCenter.getInstance()
 		if config.usage.multibouquet.value:
 			bqroot = eServiceReference(service_types_ref)
 			bqroot.setPath('FROM BOUQUET "bouquets.tv" ORDER BY bouquet')
 			rootbouquet = bqroot
 			currentBouquet = self.getRoot()
 			for searchCurrent in (True, False):
-				bouquet = eServiceReference(bqroot)
-				bouquetlist = serviceHandler.list(bouquet)
-				if bouquetlist is not None:
-					bouquet = bouquetlist.getNext()
-					while bouquet.valid():
-						if bouquet.flags & eServiceReference.isDirectory and (currentBouquet is None or (currentBouquet == bouquet) == searchCurrent):
-							foundService = matchService(bouquet, serviceHandler, matchFunc)
-							if foundService.valid():
-								break
-						bouquet = bouquetlist.getNext()
-					if foundService.valid():
-						break
+				for bouquet in serviceIndex.getBouquets(bqroot):
+					if currentBouquet is None or (currentBouquet == bouquet) == searchCurrent:
+						foundService = matchService(bouquet, matchFunc)
+						if foundService.valid():
+							break
+				if foundService.valid():
+					break
+			if not foundService.valid():
+				bouquet = eServiceReference()
 		else:
 			bqroot = serviceRefAppendPath(service_types_ref, ' FROM BOUQUET "userbouquet.favourites.tv" ORDER BY bouquet')
 			rootbouquet = bqroot
 			bouquet = eServiceReference(bqroot)
 			if bouquet.valid() and bouquet.flags & eServiceReference.isDirectory:
-				foundService = matchService(bouquet, serviceHandler, matchFunc)
+				foundService = matchService(bouquet, matchFunc)
 		return foundService, bouquet, rootbouquet
 
 	def channelSelected(self):
@@ -3168,7 +3170,7 @@ class HistoryZapSelector(Screen):
 			png = None
 			picon = getPiconName(str(ServiceReference(x[1])))
 			if picon != "":
-				png = loadPNG(picon)
+				png = pixmapCache.load(picon)
 			if self.invertItems:
 				self.list.insert(0, (x[1], cnt == mark_item and "»" or "", x[0], eventName, descriptionName, durationTime, png, orbpos))
 			else:
@@ -511,6 +511,7 @@ class EPGSelection(Screen, HelpableScreen):
 			self['bouquetlist'].moveToService(self.StartBouquet)
 			self['bouquetlist'].setCurrentBouquet(self.StartBouquet)
 			self.setTitle(self['bouquetlist'].getCurrentBouquet())
+			self.prefetchBouquetEPG()
 			if self.type == EPG_TYPE_GRAPH:
 				self.moveTimeLines()
 				if config.epgselection.graph_channel1.value:
@@ -643,6 +644,18 @@ class EPGSelection(Screen, HelpableScreen):
 		else:
 			return self.servicelist.getRoot()
 
+	# Lets the graphical EPG look up the bouquets before and after the
+	# current one in the background
+	def prefetchBouquetEPG(self):
+		bouquets = [bouquet[1] for bouquet in self.bouquets or []]
+		current = self.getCurrentBouquet()
+		if len(bouquets) < 2 or current not in bouquets:
+			return
+		idx = bouquets.index(current)
+		services = self.getBouquetServices(bouquets[(idx + 1) % len(bouquets)])
+		services += self.getBouquetServices(bouquets[idx - 1])
+		self['list'].prefetchGraphEPG(services)
+
 	def BouquetOK(self):
 		self.BouquetRoot = False
 		self.services = self.getBouquetServices(self.getCurrentBouquet())
@@ -653,6 +666,7 @@ class EPGSelection(Screen, HelpableScreen):
 				self.ask_time = calculateEpgStartTime(config.epgselection.infobar_roundto, config.epgselection.infobar_prevtimeperiod, config.epgselection.infobar_visiblehistory)
 			self['list'].fillGraphEPG(self.services, self.ask_time)
 			self.moveTimeLines(True)
+			self.prefetchBouquetEPG()
 		elif self.type == EPG_TYPE_MULTI:
 			self['list'].fillMultiEPG(self.services, self.ask_time)
 		self['list'].instance.moveSelectionTo(0)
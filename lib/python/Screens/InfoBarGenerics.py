@@ -10,6 +10,7 @@ from Components.Label import Label
 from Components.MovieList import AUDIO_EXTENSIONS, MOVIE_EXTENSIONS, DVD_EXTENSIONS
 from Components.PluginComponent import plugins
 from Components.ServiceEventTracker import ServiceEventTracker
+from Components.ServiceIndex import serviceIndex
 from Components.Sources.Boolean import Boolean
 from Components.config import config, configfile, ConfigBoolean, ConfigDateTime, ConfigClockTime, ConfigClockDuration
 from Components.SystemInfo import SystemInfo
@@ -50,6 +51,7 @@ from Screens.TimerEntry import TimerEntry as TimerEntry
 from Tools import Notifications
 from Tools.Directories import pathExists, fileExists, resolveFilename, SCOPE_CONFIG
 from Tools.KeyBindings import getKeyDescription, getKeyBindingKeys
+from Tools.ResumePoints import ResumePointStore
 from Tools.ServiceReference import hdmiInServiceRef, service_types_tv_ref
 
 import NavigationInstance
@@ -61,11 +63,8 @@ from keyids import KEYFLAGS, KEYIDS, invertKeyIds
 from time import time, localtime, strftime
 from bisect import insort
 from sys import maxint
-from heapq import nsmallest
-from operator import itemgetter
 
 import os
-import cPickle
 
 # hack alert!
 from Screens.Menu import MainMenu, Menu, mdom
@@ -79,14 +78,12 @@ def isMoviePlayerInfoBar(self):
 	return self.__class__.__name__ == "MoviePlayer"
 
 resumePointCacheLast = int(time())
-__resumePointsFile = resolveFilename(SCOPE_CONFIG, "resumepoints.pkl")
-__resumePointsSaveTime = 0
+resumePointCache = ResumePointStore(resolveFilename(SCOPE_CONFIG, "resumepoints.log"), resolveFilename(SCOPE_CONFIG, "resumepoints.pkl"))
 
 def setResumePoint(session):
-	global resumePointCache
+	global resumePointCacheLast
 	if int(config.usage.movielist_resume_cache_max.value) == 0:
-		if len(resumePointCache):
-			resumePointCache = {}
+		resumePointCache.clear()
 	service = session.nav.getCurrentService()
 	ref = session.nav.getCurrentlyPlayingServiceOrGroup()
 	if (service is not None) and (ref is not None):
@@ -96,122 +93,54 @@ def setResumePoint(session):
 			pos = seek.getPlayPosition()
 			if not pos[0]:
 				key = ref.toString()
-				lru = int(time())
 				l = seek.getLength()
 				if l:
 					l = l[1]
 				else:
 					l = None
-				resumePointCache[key] = [lru, pos[1], l]
-
-				if len(resumePointCache) > int(config.usage.movielist_resume_cache_max.value):
-					for k, v in nsmallest(2, resumePointCache.items(), key=itemgetter(1)):
-						del resumePointCache[k]
-
-				# Save resume points to non-volatile storage
-				saveResumePoints()
+				# Evicts the least recently used entries and appends the
+				# change to the resume points file
+				resumePointCache.set(key, pos[1], l, int(config.usage.movielist_resume_cache_max.value))
+				resumePointCacheLast = int(time())
 
 def delResumePoint(ref):
-	global resumePointCache
 	del_k = ref.toString()
-	needSave = False
 	if ref.flags & eServiceReference.mustDescent:
-		path_k = ':' + del_k.split(":")[10]
+		path_k = del_k.split(":")[10]
 		if not path_k.endswith('/'):
 			path_k += '/'
-		for k in [k for k in resumePointCache.iterkeys() if path_k in k]:
-			del resumePointCache[k]
-			needSave = True
+		resumePointCache.removeDirectory(path_k)
 	else:
-		try:
-			del resumePointCache[del_k]
-			needSave = True
-		except KeyError:
-			pass
-	if needSave:
-		saveResumePoints()
+		resumePointCache.remove(del_k)
 
 def renameResumePoint(ref, dest, copy=False):
-	global resumePointCache
 	old_k = ref.toString()
-	needSave = False
 	path_k = old_k.split(":")[10]
 	if ref.flags & eServiceReference.mustDescent:
 		dest = os.path.join(dest, "")
-		dest = ':' + dest
 		path_k = os.path.join(path_k, "")
-		path_k = ':' + path_k
-		for k in [k for k in resumePointCache.iterkeys() if path_k in k]:
-			new_k = k.replace(path_k, dest, 1)
-			if copy:
-				resumePointCache[new_k] = resumePointCache[k][:]
-			else:
-				resumePointCache[new_k] = resumePointCache.pop(k)
-			needSave = True
+		keys = resumePointCache.keysInDirectory(path_k)
+		resumePointCache.rename([(k, k.replace(':' + path_k, ':' + dest, 1)) for k in keys], copy)
 	else:
-		dest = ':' + dest
-		path_k = ':' + path_k
-		try:
-			new_k = old_k.replace(path_k, dest, 1)
-			if copy:
-				resumePointCache[new_k] = resumePointCache[old_k][:]
-			else:
-				resumePointCache[new_k] = resumePointCache.pop(old_k)
-			needSave = True
-		except KeyError:
-			pass
-	if needSave:
-		saveResumePoints()
+		resumePointCache.rename([(old_k, old_k.replace(':' + path_k, ':' + dest, 1))], copy)
 
 def getResumePoint(session):
-	global resumePointCache
 	if int(config.usage.movielist_resume_cache_max.value) == 0:
 		return None
 	ref = session.nav.getCurrentlyPlayingServiceOrGroup()
 	if ref is not None:
-		try:
-			entry = resumePointCache[ref.toString()]
-			entry[0] = int(time())  # update LRU timestamp
+		entry = resumePointCache.touch(ref.toString())  # update LRU timestamp
+		if entry is not None:
 			return entry[1]
-		except KeyError:
-			return None
+	return None
 
 def saveResumePoints():
-	global resumePointCache, resumePointCacheLast, __resumePointsFile, __resumePointsSaveTime
-	try:
-		f = open(__resumePointsFile, 'wb')
-		cPickle.dump(resumePointCache, f, cPickle.HIGHEST_PROTOCOL)
-		# Set the load time, because it's the cache that saved the data
-		__resumePointsSaveTime = os.fstat(f.fileno()).st_mtime
-		f.close()
-	except Exception, ex:
-		__resumePointsSaveTime = 0
-		print "[InfoBarGenerics] Failed to write resumepoints:", ex
+	global resumePointCacheLast
+	resumePointCache.compact()
 	resumePointCacheLast = int(time())
 
-def loadResumePoints():
-	global __resumePointsFile, __resumePointsSaveTime
-	try:
-		file = open(__resumePointsFile, 'rb')
-		__resumePointsSaveTime = os.fstat(file.fileno()).st_mtime
-		PickleFile = cPickle.load(file)
-		file.close()
-		return PickleFile
-	except Exception, ex:
-		__resumePointsSaveTime = 0
-		print "[InfoBarGenerics] Failed to load resumepoints:", ex
-		return {}
-
-resumePointCache = loadResumePoints()
-
 def updateresumePointCache():
-	global resumePointCache, __resumePointsFile, __resumePointsSaveTime
-	try:
-		if os.stat(__resumePointsFile).st_mtime == __resumePointsSaveTime:
-			return
-	except:
-		pass
-	resumePointCache = loadResumePoints()
+	resumePointCache.reloadIfChanged()
 
 def notifyChannelSelectionUpDown(setting):
 	from Screens.InfoBar import InfoBar
@@ -969,53 +898,33 @@ class InfoBarNumberZap:
 			self.selectAndStartService(service, bouquet)
 
 	def searchNumberHelper(self, serviceHandler, num, bouquet):
-		servicelist = serviceHandler.list(bouquet)
-		if servicelist:
-			serviceIterator = servicelist.getNext()
-			while serviceIterator.valid():
-				if num == serviceIterator.getChannelNum():
-					if serviceIterator.flags & eServiceReference.isInvisible:
-						break
-					return serviceIterator
-				serviceIterator = servicelist.getNext()
-		return None
+		return serviceIndex.getServiceByNumber(bouquet, num)
 
 	def searchNumber(self, number, firstBouquetOnly=False, bouquet=None):
 		current_bouquet = self.servicelist.getRoot()
 		bouquet = bouquet or current_bouquet
 		service = None
-		serviceHandler = eServiceCenter.getInstance()
 		if not firstBouquetOnly:
-			service = self.searchNumberHelper(serviceHandler, number, bouquet)
+			service = serviceIndex.getServiceByNumber(bouquet, number)
 		if config.usage.multibouquet.value and not service:
-			bouquet = self.servicelist.bouquet_root
-			bouquetlist = serviceHandler.list(bouquet)
-			if bouquetlist:
-				bouquet = bouquetlist.getNext()
-				if bouquet == current_bouquet and firstBouquetOnly:
-					bouquet = bouquetlist.getNext()
-				while bouquet.valid():
-					if bouquet.flags & eServiceReference.isDirectory:
-						service = self.searchNumberHelper(serviceHandler, number, bouquet)
-						if service:
-							playable = not (service.flags & (eServiceReference.isMarker | eServiceReference.isDirectory)) or (service.flags & eServiceReference.isNumberedMarker)
-							if not playable:
-								service = None
-							break
-						if config.usage.alternative_number_mode.value or firstBouquetOnly:
-							break
-					bouquet = bouquetlist.getNext()
+			bouquets = serviceIndex.getBouquets(self.servicelist.bouquet_root)
+			if firstBouquetOnly and bouquets and bouquets[0] == current_bouquet:
+				bouquets = bouquets[1:]
+			for bouquet in bouquets:
+				service = serviceIndex.getServiceByNumber(bouquet, number)
+				if service:
+					playable = not (service.flags & (eServiceReference.isMarker | eServiceReference.isDirectory)) or (service.flags & eServiceReference.isNumberedMarker)
+					if not playable:
+						service = None
+					break
+				if config.usage.alternative_number_mode.value or firstBouquetOnly:
+					break
 		if service is not None and bouquet != current_bouquet:
-			servicelist = serviceHandler.list(current_bouquet)
-			if servicelist:
-				svc = service.toCompareString()
-				serviceIterator = servicelist.getNext()
-				while serviceIterator.valid():
-					if svc == serviceIterator.toCompareString():
-						service = serviceIterator
-						bouquet = current_bouquet
-						break
-					serviceIterator = servicelist.getNext()
+			# prefer the entry in the current bouquet when it has the service
+			found = serviceIndex.findService(current_bouquet, service)
+			if found is not None:
+				service = found
+				bouquet = current_bouquet
 		return service, bouquet
 
 	def selectAndStartService(self, service, bouquet, checkTimeshift=True):
@@ -4,6 +4,7 @@ from Components.Sources.StaticText import StaticText
 from Components.config import config, ConfigSubsection, ConfigBoolean, getConfigListEntry, ConfigSelection, ConfigYesNo, ConfigIP
 from Components.Network import iNetwork
 from Components.Ipkg import IpkgComponent
+from Components.ServiceIndex import serviceIndex
 from enigma import eDVBDB
 
 config.misc.installwizard = ConfigSubsection()
@@ -137,4 +138,5 @@ class InstallWizardIpkgUpdater(Screen):
 					config.misc.installwizard.channellistdownloaded.value = True
 					eDVBDB.getInstance().reloadBouquets()
 					eDVBDB.getInstance().reloadServicelist()
+					serviceIndex.invalidate()
 			self.close()
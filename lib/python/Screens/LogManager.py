@@ -8,6 +8,7 @@ from Components.FileList import FileList
 from Components.ScrollLabel import ScrollLabel
 from Components.config import config, configfile
 from Components.FileList import MultiFileSelectList
+from Components.DirectoryStats import directoryStats
 from Screens.MessageBox import MessageBox
 from os import path, remove, walk, stat, rmdir
 from time import time
@@ -426,11 +427,16 @@ class LogInfo(VariableText, GUIComponent):
 			self.update(path)
 
 	def update(self, path):
-		try:
-			total_size = get_size(path)
-		except OSError:
-			return -1
+		# show the size known so far, the walk is done in the background
+		stats = directoryStats.get(path)
+		if stats is not None:
+			self.showSize(stats[0])
+		directoryStats.refresh(path, self.sizeRefreshed)
+
+	def sizeRefreshed(self, path, stats):
+		self.showSize(stats[0])
 
+	def showSize(self, total_size):
 		if self.type == self.USED:
 			try:
 				if total_size < 10000000:
@@ -13,6 +13,7 @@ from Components.ActionMap import ActionMap
 from Components.config import config
 from Components.Console import Console
 from Components.Ipkg import IpkgComponent
+from Components.ServiceIndex import serviceIndex
 from Components.Sources.StaticText import StaticText
 from Components.Slider import Slider
 from Tools.BoundFunction import boundFunction
@@ -170,6 +171,7 @@ class UpdatePlugin(Screen, ProtectedScreen):
 					self.showUpdateCompletedMessage()
 					eDVBDB.getInstance().reloadBouquets()
 					eDVBDB.getInstance().reloadServicelist()
+					serviceIndex.invalidate()
 			elif self.error == 0:
 				self.showUpdateCompletedMessage()
 			else:
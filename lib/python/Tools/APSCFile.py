@@ -0,0 +1,270 @@
+import os
+from mmap import mmap, ACCESS_COPY
+from ctypes import c_int64
+from bisect import bisect_left
+from operator import sub
+import struct
+
+# Access point (.ap) and structure (.sc) files of a recording are arrays of
+# big-endian 64-bit (file offset, PTS or data) pairs. They are mapped into
+# memory and read through a big-endian ctypes array, so entries are only
+# converted when they are accessed or sliced.
+
+ENTRY_SIZE = 16
+
+# PTS steps outside (0, MAX_PTS_STEP] are treated as discontinuities
+MAX_PTS_STEP = 90000 * 10
+# the PTS step assumed across a discontinuity, one frame at 25 fps
+DISCONTINUITY_STEP = 90000 / 25
+
+class _Column:
+	def __init__(self, data, column):
+		self.data = data
+		self.column = column
+
+	def __len__(self):
+		return len(self.data) // 2
+
+	def __getitem__(self, index):
+		return self.data[2 * index + self.column]
+
+class APSCFile:
+	def __init__(self, filename):
+		self.filename = filename
+		self.map = None
+		f = open(filename, "rb")
+		try:
+			size = os.fstat(f.fileno()).st_size
+			count = size // ENTRY_SIZE
+			if count:
+				self.map = mmap(f.fileno(), count * ENTRY_SIZE, access=ACCESS_COPY)
+				self.data = (c_int64.__ctype_be__ * (2 * count)).from_buffer(self.map)
+			else:
+				self.data = ()
+		finally:
+			f.close()
+		self.offsets = _Column(self.data, 0)
+		self.values = _Column(self.data, 1)
+
+	def __len__(self):
+		return len(self.data) // 2
+
+	def close(self):
+		self.data = self.offsets.data = self.values.data = ()
+		if self.map is not None:
+			self.map.close()
+			self.map = None
+
+	def offset(self, index):
+		return self.data[2 * index]
+
+	def value(self, index):
+		return self.data[2 * index + 1]
+
+	# Returns the index of the first entry at or after the file offset
+	def findOffset(self, offset):
+		return bisect_left(self.offsets, offset)
+
+# The access points of a recording with PTS values made continuous the way
+# enigma does it: a PTS step that goes backwards or is longer than
+# MAX_PTS_STEP starts a new segment, which continues one frame after the
+# end of the previous one.
+class AccessPoints(APSCFile):
+	def __init__(self, filename):
+		APSCFile.__init__(self, filename)
+		self.pts = self.correctedPTS()
+		# Keep the offsets and unmap the file, accessing a mapping after the
+		# file has been truncated (see truncateAPSC) would fault.
+		self.offsetList = self.data[0::2]
+		self.close()
+
+	def offset(self, index):
+		return self.offsetList[index]
+
+	def __len__(self):
+		return len(self.pts)
+
+	def correctedPTS(self):
+		data = self.data
+		if len(data) < 4:
+			return list(data[1::2])
+		pts = data[1::2]
+		ofs1, currentDelta = data[0], data[1]
+		if ofs1 != 0:
+			ofs2, pts2 = data[2], data[3]
+			if ofs1 < ofs2:
+				# extrapolate the PTS back to the start of the file
+				currentDelta -= (pts2 - currentDelta) * ofs1 / (ofs2 - ofs1)
+		# Within a segment the corrected steps equal the raw steps, so the
+		# segment starts can be found from the raw differences.
+		steps = map(sub, pts[1:], pts[:-1])
+		starts = [i + 1 for i, step in enumerate(steps) if step <= 0 or step > MAX_PTS_STEP]
+		first = pts[0] - currentDelta + 1
+		if first <= 0 or first > MAX_PTS_STEP:
+			currentDelta = pts[0] + 1 - DISCONTINUITY_STEP
+		corrected = []
+		begin = 0
+		for end in starts + [len(pts)]:
+			if begin:
+				currentDelta = pts[begin] - corrected[-1] - DISCONTINUITY_STEP
+			corrected += [x - currentDelta for x in pts[begin:end]]
+			begin = end
+		return corrected
+
+	# Returns the index of the access point at or after pts, or the last one
+	def getAP(self, pts):
+		i = bisect_left(self.pts, pts)
+		return i if i < len(self.pts) else i - 1
+
+# Removes the entries at or after the file offset from an .ap or .sc file
+def truncateAPSC(filename, offset):
+	apsc = APSCFile(filename)
+	try:
+		index = apsc.findOffset(offset)
+		count = len(apsc)
+	finally:
+		apsc.close()
+	if index < count:
+		f = open(filename, "r+b")
+		try:
+			f.truncate(index * ENTRY_SIZE)
+		finally:
+			f.close()
+
+# Appends the entries of the .ap or .sc file srcname to destname with their
+# offsets moved by base, for a recording that was appended to another one
+# at the file offset base
+def appendAPSC(destname, srcname, base):
+	truncateAPSC(destname, base)
+	apsc = APSCFile(srcname)
+	try:
+		data = list(apsc.data[:])
+	finally:
+		apsc.close()
+	data[0::2] = [x + base for x in data[0::2]]
+	entries = (c_int64.__ctype_be__ * len(data))(*data)
+	f = open(destname, "ab")
+	try:
+		f.write(entries)
+	finally:
+		f.close()
+
+TS_PACKET_SIZE = 188
+# bytes read from the transport stream at once, a multiple of the packet size
+READ_SIZE = TS_PACKET_SIZE * 4096
+
+apscEntry = struct.Struct(">qq")
+
+def _framePID(buf, ind):
+	return ((buf[ind + 1] & 0x1f) << 8) + buf[ind + 2]
+
+# Returns the PTS of the PES packet starting in the TS packet at ind, or -1
+def _framePTS(buf, ind):
+	tmp = ind + (buf[ind + 4] + 5 if buf[ind + 3] & 0x20 else 4)
+	if tmp + 13 >= len(buf):
+		return -1
+	if buf[ind + 1] & 0x40 and buf[ind + 3] & 0x10 and buf[tmp] == 0 and buf[tmp + 1] == 0 and buf[tmp + 2] == 1 and buf[tmp + 7] & 0x80:
+		return ((buf[tmp + 9] & 0x0e) << 29) | (buf[tmp + 10] << 22) | ((buf[tmp + 11] & 0xfe) << 14) | (buf[tmp + 12] << 7) | (buf[tmp + 13] >> 1)
+	return -1
+
+# Writes the .ap and .sc files of a recording by scanning its transport
+# stream for MPEG-2 sequence and picture start codes and H.264 access unit
+# delimiters, the way the createapscfiles tool does. With a start offset
+# only the data from there on is scanned, and its entries are appended to
+# the existing files, e.g. after another recording was appended to it.
+class APSCGenerator:
+	def __init__(self, filename, start=0):
+		self.filename = filename
+		self.start = start - start % TS_PACKET_SIZE
+		self.progress = 0
+		self.aborted = False
+		self.pid = -1
+
+	def run(self):
+		sentry = self.filename + ".reconstruct_apsc"
+		open(sentry, "wb").close()
+		mode = "ab" if self.start else "wb"
+		fts = open(self.filename, "rb")
+		fap = open(self.filename + ".ap", mode)
+		fsc = open(self.filename + ".sc", mode)
+		try:
+			if self.start:
+				# drop entries a previous run wrote past the start offset
+				fap.truncate(self.validEntries(self.filename + ".ap") * ENTRY_SIZE)
+				fsc.truncate(self.validEntries(self.filename + ".sc") * ENTRY_SIZE)
+			self.scan(fts, fap, fsc)
+		except:
+			fap.close()
+			fsc.close()
+			if not self.start:
+				os.unlink(self.filename + ".ap")
+				os.unlink(self.filename + ".sc")
+			raise
+		finally:
+			fts.close()
+		fap.close()
+		fsc.close()
+		if self.aborted:
+			# the files are incomplete, keep the marker so they are rebuilt
+			return False
+		os.unlink(sentry)
+		return True
+
+	def validEntries(self, filename):
+		apsc = APSCFile(filename)
+		try:
+			return apsc.findOffset(self.start)
+		finally:
+			apsc.close()
+
+	def scan(self, fts, fap, fsc):
+		size = os.fstat(fts.fileno()).st_size - self.start
+		fts.seek(self.start)
+		pos = self.start
+		buf = bytearray(READ_SIZE)
+		pack = apscEntry.pack
+		while not self.aborted:
+			num = fts.readinto(buf)
+			if not num:
+				break
+			if num < READ_SIZE:
+				del buf[num:]
+			ap, sc = self.scanBuffer(buf, pos, pack)
+			fap.write(''.join(ap))
+			fsc.write(''.join(sc))
+			pos += num
+			if size > 0:
+				self.progress = min(100, 100 * (pos - self.start) / size)
+
+	def scanBuffer(self, buf, pos, pack):
+		ap = []
+		sc = []
+		pid = self.pid
+		sdflag = False
+		end = len(buf) - 6
+		find = buf.find
+		p = find('\x00\x00\x01', 0, end + 2)
+		while 0 <= p < end:
+			ind = p - p % TS_PACKET_SIZE
+			code = buf[p + 3]
+			if (code & 0xf0) == 0xe0 and buf[ind + 1] & 0x40 and p - ind == (buf[ind + 4] + 5 if buf[ind + 3] & 0x20 else 4):
+				pid = _framePID(buf, ind)
+			elif pid != -1 and pid != _framePID(buf, ind):
+				p = find('\x00\x00\x01', p + 1, end + 2)
+				continue
+			if code == 0 or code == 0xb3 or code == 0xb8: # MPEG2
+				if code == 0xb3:
+					pts = _framePTS(buf, ind)
+					if pts >= 0:
+						ap.append(pack(pos + ind, pts))
+				sc.append(pack(pos + p, code | (buf[p + 4] << 8) | (buf[p + 5] << 16) | (buf[p + 6] << 24)))
+				sdflag = True
+			elif not sdflag and code == 0x09 and buf[ind + 1] & 0x40: # H264
+				if buf[p + 4] >> 5 == 0:
+					pts = _framePTS(buf, ind)
+					if pts >= 0:
+						ap.append(pack(pos + ind, pts))
+				sc.append(pack(pos + p, code | (buf[p + 4] << 8)))
+			p = find('\x00\x00\x01', p + 1, end + 2)
+		self.pid = pid
+		return ap, sc
@@ -1,8 +1,11 @@
 from Components.Task import PythonTask, Task, Job, job_manager as JobManager, Condition
-from Tools.Directories import fileExists
-from enigma import eTimer
-from os import path
-from shutil import rmtree, copy2, move
+from Tools.FileCopy import FileCopier
+from errno import EXDEV, EEXIST, ENOTEMPTY
+from shutil import rmtree, copystat
+from time import time
+import os
+import stat
+import threading
 
 class DeleteFolderTask(PythonTask):
 	def openFiles(self, fileList):
@@ -18,51 +21,204 @@ class DeleteFolderTask(PythonTask):
 		if errors:
 			raise errors[0]
 
-class CopyFileJob(Job):
-	def __init__(self, srcfile, destfile, name):
-		Job.__init__(self, _("Copying files"))
-		cmdline = ('cp', '-Rf', srcfile, destfile)
-		AddFileProcessTask(self, cmdline, srcfile, destfile, name)
+# The transfers of a task on the same disk are done one after the other,
+# those between different disks run in parallel, up to MAX_TRANSFERS at a
+# time. The job manager runs one job at a time, so files that may be spread
+# over several disks have to be queued in one task, as the file commander
+# does with a selection.
+MAX_TRANSFERS = 2
+# Niceness of the transfer threads, so playback and recordings come first
+TRANSFER_NICE = 10
 
-class MoveFileJob(Job):
-	def __init__(self, srcfile, destfile, name):
-		Job.__init__(self, _("Moving files"))
-		cmdline = ('mv', '-f', srcfile, destfile)
-		AddFileProcessTask(self, cmdline, srcfile, destfile, name)
+_spindles = {}
 
-class AddFileProcessTask(Task):
+# Returns the disk holding path, so transfers between partitions of one disk
+# share it. File systems without a block device are told apart by device.
+def getSpindle(path):
+	while path and not os.path.exists(path):
+		path = os.path.dirname(path.rstrip("/"))
+	try:
+		dev = os.stat(path or "/").st_dev
+	except OSError:
+		return None
+	spindle = _spindles.get(dev)
+	if spindle is None:
+		sysfs = os.path.realpath("/sys/dev/block/%d:%d" % (os.major(dev), os.minor(dev)))
+		if os.path.exists(os.path.join(sysfs, "partition")):
+			sysfs = os.path.dirname(sysfs)
+		if os.path.isdir(sysfs):
+			spindle = os.path.basename(sysfs)
+		else:
+			spindle = dev
+		_spindles[dev] = spindle
+	return spindle
 
-	# cmdline may be either a string (executed using sh -c <str>) or
-	# a list/tuple of strings (executed without the shell using execvp())
+# Splits the transfers into lanes that share no disk, each in the given order
+def transferLanes(transfers):
+	lanes = []
+	for src, dst in transfers:
+		spindles = set((getSpindle(src), getSpindle(dst)))
+		lane = [spindles, [(src, dst)]]
+		for other in [other for other in lanes if other[0] & spindles]:
+			lanes.remove(other)
+			lane[0] |= other[0]
+			lane[1] = other[1] + lane[1]
+		lanes.append(lane)
+	return [lane[1] for lane in lanes]
 
-	def __init__(self, job, cmdline, srcfile, destfile, name):
-		Task.__init__(self, job, name)
-		if isinstance(cmdline, (list, tuple)):
-			self.setCommandline(cmdline[0], cmdline)
-		else:
-			self.setCmdline(cmdline)
-		self.srcfile = srcfile
-		self.destfile = destfile
+# Returns the bytes that copying src writes, links are recreated for free
+def treeSize(src):
+	if os.path.islink(src):
+		return 0
+	if not os.path.isdir(src):
+		return os.stat(src).st_size
+	size = 0
+	for root, dirs, files in os.walk(src):
+		for name in files:
+			try:
+				st = os.lstat(os.path.join(root, name))
+				if stat.S_ISREG(st.st_mode):
+					size += st.st_size
+			except OSError:
+				pass
+	return size
 
-		self.ProgressTimer = eTimer()
-		self.ProgressTimer.callback.append(self.ProgressUpdate)
+# Copies or moves files and directory trees in Python, without cp and mv.
+# Transfers are (source, destination) pairs of full paths, a directory
+# that exists at the destination is merged with the source tree.
+# Moves on one file system are renames, everything else is copied with
+# FileCopier. Progress is counted in bytes.
+class TransferTask(PythonTask):
+	def __init__(self, job, name, transfers, move=False):
+		PythonTask.__init__(self, job, name)
+		self.title = name
+		self.transfers = transfers
+		self.move = move
+		self.copiers = []
+		self.total = 0
+		self.startTime = None
+		self.lastUpdate = 0
 
-	def ProgressUpdate(self):
-		if self.srcsize <= 0 or not fileExists(self.destfile, 'r'):
+	def _run(self):
+		PythonTask._run(self)
+		self.timer.start(500)
+
+	def abort(self):
+		for copier in self.copiers:
+			copier.aborted = True
+		PythonTask.abort(self)
+
+	def onComplete(self, result):
+		if not self.aborted:
+			PythonTask.onComplete(self, result)
 			return
+		self.timer.stop()
+		del self.timer
+		self.finish(aborted=True)
 
-		self.setProgress(int((path.getsize(self.destfile) / float(self.srcsize)) * 100))
-		self.ProgressTimer.start(5000, True)
+	def onTimer(self):
+		if not self.total or self.startTime is None:
+			return
+		done = sum([copier.done for copier in self.copiers])
+		self.setProgress(int(100 * done / self.total))
+		now = time()
+		if now - self.lastUpdate >= 2 and now > self.startTime:
+			self.lastUpdate = now
+			self.name = "%s (%.1f MB/s)" % (self.title, done / (now - self.startTime) / 1048576)
 
-	def prepare(self):
-		if fileExists(self.srcfile, 'r'):
-			self.srcsize = path.getsize(self.srcfile)
-			self.ProgressTimer.start(5000, True)
+	def work(self):
+		transfers = []
+		for src, dst in self.transfers:
+			if self.move:
+				try:
+					os.rename(src, dst)
+					continue
+				except OSError, e:
+					# other file system, or a directory that is merged
+					if e.errno not in (EXDEV, EEXIST, ENOTEMPTY):
+						raise
+			transfers.append((src, dst))
+		if not transfers:
+			return
+		lanes = [(FileCopier(), lane) for lane in transferLanes(transfers)]
+		for copier, lane in lanes:
+			copier.total = sum([treeSize(src) for src, dst in lane])
+		self.copiers = [copier for copier, lane in lanes]
+		self.total = sum([copier.total for copier in self.copiers])
+		self.startTime = time()
+		self.errors = []
+		pending = lanes[:]
+		lock = threading.Lock()
+		threads = [threading.Thread(target=self.runLanes, args=(pending, lock)) for i in range(min(MAX_TRANSFERS, len(lanes)))]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		if self.errors:
+			raise self.errors[0]
+		print "[CopyFiles] %s %d bytes in %.1f s" % (self.move and "moved" or "copied", self.total, time() - self.startTime)
 
-	def afterRun(self):
-		self.setProgress(100)
-		self.ProgressTimer.stop()
+	def runLanes(self, pending, lock):
+		try:
+			os.nice(TRANSFER_NICE)
+		except OSError:
+			pass
+		while not self.aborted:
+			with lock:
+				if not pending:
+					return
+				copier, lane = pending.pop(0)
+			try:
+				for src, dst in lane:
+					if self.aborted or not self.transfer(copier, src, dst):
+						break
+			except Exception, e:
+				print "[CopyFiles] Failed to transfer %s:" % src, e
+				self.errors.append(e)
+
+	# Returns False when the transfer was aborted
+	def transfer(self, copier, src, dst):
+		if os.path.islink(src):
+			if os.path.lexists(dst):
+				os.unlink(dst)
+			os.symlink(os.readlink(src), dst)
+		elif os.path.isdir(src):
+			if not self.copyTree(copier, src, dst):
+				return False
+		elif not copier.copyFile(src, dst):
+			return False
+		if self.move:
+			if os.path.isdir(src) and not os.path.islink(src):
+				rmtree(src)
+			else:
+				os.unlink(src)
+		return True
 
+	def copyTree(self, copier, src, dst):
+		for root, dirs, files in os.walk(src):
+			target = os.path.join(dst, os.path.relpath(root, src))
+			if not os.path.isdir(target):
+				os.makedirs(target)
+			for name in dirs + files:
+				source = os.path.join(root, name)
+				if os.path.islink(source):
+					if os.path.lexists(os.path.join(target, name)):
+						os.unlink(os.path.join(target, name))
+					os.symlink(os.readlink(source), os.path.join(target, name))
+				elif name in files and not copier.copyFile(source, os.path.join(target, name)):
+					return False
+			copystat(root, target)
+		return True
+
+class CopyFileJob(Job):
+	def __init__(self, fileList, name):
+		Job.__init__(self, _("Copying files"))
+		TransferTask(self, name, fileList)
+
+class MoveFileJob(Job):
+	def __init__(self, fileList, name):
+		Job.__init__(self, _("Moving files"))
+		TransferTask(self, name, fileList, move=True)
 
 class DownloadProcessTask(Job):
 	def __init__(self, url, filename, file):
@@ -129,18 +285,10 @@ class DownloadTask(Task):
 			Task.processFinished(self, 0)
 
 def copyFiles(fileList, name):
-	for src, dst in fileList:
-		if path.isdir(src) or int(path.getsize(src)) / 1000 / 1000 > 100:
-			JobManager.AddJob(CopyFileJob(src, dst, name))
-		else:
-			copy2(src, dst)
+	JobManager.AddJob(CopyFileJob(fileList, name))
 
 def moveFiles(fileList, name):
-	for src, dst in fileList:
-		if path.isdir(src) or int(path.getsize(src)) / 1000 / 1000 > 100:
-			JobManager.AddJob(MoveFileJob(src, dst, name))
-		else:
-			move(src, dst)
+	JobManager.AddJob(MoveFileJob(fileList, name))
 
 def deleteFiles(fileList, name):
 	job = Job(_("Deleting files"))
@@ -363,22 +363,12 @@ def crawlDirectory(directory, pattern):
 	return list
 
 def copyfile(src, dst):
+	from Tools.FileCopy import FileCopier
 	try:
-		f1 = open(src, "rb")
 		if os.path.isdir(dst):
 			dst = os.path.join(dst, os.path.basename(src))
-		f2 = open(dst, "w+b")
-		while True:
-			buf = f1.read(16 * 1024)
-			if not buf:
-				break
-			f2.write(buf)
-		st = os.stat(src)
-		mode = os.stat.S_IMODE(st.st_mode)
-		if have_chmod:
-			chmod(dst, mode)
-		if have_utime:
-			utime(dst, (st.st_atime, st.st_mtime))
+		# copies with sendfile or in large blocks, and sets mode and times
+		FileCopier().copyFile(src, dst)
 	except:
 		print "copy", src, "to", dst, "failed!"
 		return -1
@@ -428,7 +418,7 @@ def moveFiles(fileList):
 			if e.errno == 18:
 				print "[Directories] cannot rename across devices, trying slow move"
 				import Tools.CopyFiles
-				Tools.CopyFiles.moveFiles(fileList, item[0])
+				Tools.CopyFiles.moveFiles(fileList[len(movedList):], item[0])
 				print "[Directories] Moving in background..."
 			else:
 				raise
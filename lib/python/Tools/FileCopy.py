@@ -0,0 +1,113 @@
+import os
+import shutil
+from errno import EINTR, EAGAIN, EINVAL, ENOSYS
+from ctypes import CDLL, c_int, c_size_t, c_ssize_t, c_void_p, get_errno
+
+# Copies file data with sendfile(2), so it stays in the kernel, and falls
+# back to reading and writing large blocks where sendfile is not available
+# or does not support the files involved.
+
+BLOCK_SIZE = 4 * 1024 * 1024
+
+try:
+	_libc = CDLL("libc.so.6", use_errno=True)
+	_sendfile = _libc.sendfile64
+	_sendfile.argtypes = (c_int, c_int, c_void_p, c_size_t)
+	_sendfile.restype = c_ssize_t
+except (OSError, AttributeError):
+	_sendfile = None
+
+class FileCopier:
+	def __init__(self):
+		self.total = 0
+		self.done = 0
+		self.aborted = False
+
+	def getProgress(self):
+		if self.total <= 0:
+			return 0
+		return min(100, 100 * self.done / self.total)
+
+	# Copies count bytes, or everything up to the end, from the current
+	# position of fin to the current position of fout. Both files must be
+	# unbuffered. Returns False when the copy was aborted.
+	def copyData(self, fin, fout, count=None):
+		if count is None:
+			count = os.fstat(fin.fileno()).st_size - fin.tell()
+		if _sendfile is not None:
+			count = self.sendData(fin.fileno(), fout.fileno(), count)
+		buf = bytearray(min(BLOCK_SIZE, max(count, 0)))
+		view = memoryview(buf)
+		while count > 0 and not self.aborted:
+			num = fin.readinto(view[:min(count, BLOCK_SIZE)])
+			if not num:
+				break
+			fout.write(view[:num])
+			count -= num
+			self.done += num
+		return not self.aborted
+
+	# Returns the number of bytes left for the block copy
+	def sendData(self, fdin, fdout, count):
+		sent = 0
+		while count > 0 and not self.aborted:
+			num = _sendfile(fdout, fdin, None, min(count, BLOCK_SIZE))
+			if num < 0:
+				err = get_errno()
+				if err in (EINTR, EAGAIN):
+					continue
+				if err in (EINVAL, ENOSYS) and not sent:
+					break
+				raise OSError(err, os.strerror(err))
+			if not num:
+				break
+			sent += num
+			count -= num
+			self.done += num
+		return count
+
+	# Copies the file src to dst, with its permissions and times, and counts
+	# the bytes in done; total is up to the caller. A failed or aborted copy
+	# removes dst again. Returns False when the copy was aborted.
+	def copyFile(self, src, dst):
+		fin = open(src, "rb", 0)
+		try:
+			fout = open(dst, "wb", 0)
+			try:
+				copied = self.copyData(fin, fout)
+			except:
+				fout.close()
+				os.unlink(dst)
+				raise
+			fout.close()
+		finally:
+			fin.close()
+		if not copied:
+			os.unlink(dst)
+			return False
+		shutil.copystat(src, dst)
+		return True
+
+	# Appends the file src to the file dst and returns the size dst had
+	# before. A failed or aborted append leaves dst as it was.
+	def appendFile(self, src, dst):
+		fin = open(src, "rb", 0)
+		try:
+			# sendfile does not support files opened for appending
+			fout = open(dst, "r+b", 0)
+			try:
+				fout.seek(0, os.SEEK_END)
+				start = fout.tell()
+				self.total += os.fstat(fin.fileno()).st_size
+				try:
+					if self.copyData(fin, fout):
+						return start
+				except:
+					fout.truncate(start)
+					raise
+				fout.truncate(start)
+				return None
+			finally:
+				fout.close()
+		finally:
+			fin.close()
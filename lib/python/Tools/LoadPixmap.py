@@ -1,20 +1,22 @@
-from enigma import loadPNG, loadJPG
-from Tools.LRUCache import lru_cache
+from os import stat
+from time import time
+from collections import namedtuple, OrderedDict
+from enigma import loadPNG, loadJPG, getDesktop
 
 def LoadPixmap(path, desktop=None, cached=None):
 	if cached is None or cached:
-		ret = _cached_load(path, desktop)
-		return ret
+		return pixmapCache.load(path, desktop)
 	else:
 		return _load(path, desktop)
 
-@lru_cache(maxsize=256)
-def _cached_load(path, desktop):
-	return _load(path, desktop)
+# Loads a picon the way ePixmap.setPixmapFromFile does with scaling on, into
+# accelerated memory and converted for the screen, through the pixmap cache
+def LoadPicon(path):
+	return pixmapCache.load(path, getDesktop(0), True)
 
-def _load(path, desktop):
+def _load(path, desktop, accel=False):
 	if path[-4:] == ".png":
-		ptr = loadPNG(path)
+		ptr = loadPNG(path, accel and 1 or 0)
 	elif path[-4:] == ".jpg":
 		ptr = loadJPG(path)
 	elif path[-1:] == ".":
@@ -25,3 +27,97 @@ def _load(path, desktop):
 	if ptr and desktop:
 		desktop.makeCompatiblePixmap(ptr)
 	return ptr
+
+_PixmapCacheInfo = namedtuple("PixmapCacheInfo", ["hits", "misses", "maxbytes", "currbytes", "entries"])
+
+# Decoded pixmaps of skin images and picons, shared by the skin, the EPG,
+# the channel list and the picon renderers. Entries are keyed by path and
+# variant, e.g. the desktop the pixmap was made compatible with or the size
+# it was scaled to, and remember the file mtime, so a replaced file is
+# decoded again. The mtime is checked at most every STAT_INTERVAL seconds.
+# Files that are missing or fail to decode are cached as None, so they are
+# not tried again on every repaint, and count MISS_BYTES. The least recently
+# used pixmaps are dropped once the decoded size exceeds maxbytes.
+STAT_INTERVAL = 60
+MISS_BYTES = 1024
+
+class PixmapCache:
+	def __init__(self, maxbytes):
+		self.maxbytes = maxbytes
+		self.currbytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.entries = OrderedDict() # (path, variant) -> [mtime, ptr, bytes, checked]
+
+	# Returns the cached entry of path in the variant, or None
+	def lookup(self, path, variant):
+		key = (path, variant)
+		entry = self.entries.pop(key, None)
+		if entry is not None:
+			now = time()
+			if now - entry[3] < STAT_INTERVAL:
+				self.entries[key] = entry
+				self.hits += 1
+				return entry
+			try:
+				mtime = stat(path).st_mtime
+			except OSError:
+				mtime = None
+			if entry[0] == mtime:
+				entry[3] = now
+				self.entries[key] = entry
+				self.hits += 1
+				return entry
+			self.currbytes -= entry[2]
+		self.misses += 1
+		return None
+
+	# Returns the cached pixmap of path in the variant, or None
+	def get(self, path, variant=None):
+		entry = self.lookup(path, variant)
+		return entry and entry[1]
+
+	# Stores a pixmap decoded elsewhere, e.g. scaled by ePicLoad, or None
+	# for a file that could not be loaded
+	def put(self, path, variant, ptr):
+		try:
+			mtime = stat(path).st_mtime
+		except OSError:
+			if ptr is not None:
+				return
+			mtime = None
+		if ptr is None:
+			nbytes = MISS_BYTES
+		else:
+			size = ptr.size()
+			nbytes = size.width() * size.height() * 4
+		key = (path, variant)
+		entry = self.entries.pop(key, None)
+		if entry is not None:
+			self.currbytes -= entry[2]
+		if nbytes > self.maxbytes:
+			return
+		self.entries[key] = [mtime, ptr, nbytes, time()]
+		self.currbytes += nbytes
+		while self.currbytes > self.maxbytes:
+			self.currbytes -= self.entries.popitem(last=False)[1][2]
+
+	# Returns the pixmap of path, decoding it on a cache miss, made
+	# compatible with desktop and in accelerated memory if asked for
+	def load(self, path, desktop=None, accel=False):
+		variant = (desktop, accel)
+		entry = self.lookup(path, variant)
+		if entry is not None:
+			return entry[1]
+		ptr = _load(path, desktop, accel)
+		self.put(path, variant, ptr)
+		return ptr
+
+	def clear(self):
+		self.entries.clear()
+		self.currbytes = 0
+
+	def info(self):
+		return _PixmapCacheInfo(self.hits, self.misses, self.maxbytes, self.currbytes, len(self.entries))
+
+pixmapCache = PixmapCache(16 * 1024 * 1024)
@@ -0,0 +1,241 @@
+import os
+import cPickle
+from collections import OrderedDict
+from UserDict import DictMixin
+from time import time
+
+# Resume points of played services, by service reference string, as
+# [last use, position, length] entries kept in least recently used order.
+# The entries are also indexed by the directory of their file, so moving or
+# deleting a directory does not have to look at every key.
+#
+# Changes are appended to a log of pickled records. The log is rewritten
+# with only the current entries when it has more than COMPACT_FACTOR
+# records per entry. The pickled dictionary used before is only read once,
+# to take over its entries, and is no longer written.
+#
+# The store can be used like the dictionary it replaces. Entries that are
+# set or deleted by key are written at once, entries that are changed in
+# place are written by the next compact().
+
+COMPACT_FACTOR = 4
+COMPACT_MIN = 256
+
+def _directory(key):
+	try:
+		path = key.split(":")[10]
+	except IndexError:
+		return ""
+	return path[:path.rfind("/") + 1]
+
+class ResumePointStore(DictMixin):
+	def __init__(self, filename, legacyfile=None):
+		self.filename = filename
+		self.legacyfile = legacyfile
+		self.saveTime = 0
+		self.load()
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __contains__(self, key):
+		return key in self.entries
+
+	def __getitem__(self, key):
+		return self.entries[key]
+
+	def __setitem__(self, key, entry):
+		self._add(key, entry)
+		self.append([("s", key, entry)])
+
+	def __delitem__(self, key):
+		if not self.remove(key):
+			raise KeyError(key)
+
+	def __iter__(self):
+		return iter(self.entries)
+
+	def keys(self):
+		return self.entries.keys()
+
+	def iteritems(self):
+		return self.entries.iteritems()
+
+	def get(self, key, default=None):
+		return self.entries.get(key, default)
+
+	def _add(self, key, entry):
+		if key in self.entries:
+			del self.entries[key]
+		else:
+			self.directories.setdefault(_directory(key), set()).add(key)
+		self.entries[key] = entry
+
+	def _remove(self, key):
+		del self.entries[key]
+		directory = _directory(key)
+		keys = self.directories[directory]
+		keys.discard(key)
+		if not keys:
+			del self.directories[directory]
+		self.touched.discard(key)
+
+	def set(self, key, position, length, maxentries):
+		self._add(key, [int(time()), position, length])
+		records = [("s", key, self.entries[key])]
+		while len(self.entries) > maxentries:
+			oldest = next(iter(self.entries))
+			self._remove(oldest)
+			records.append(("d", oldest))
+		self.append(records)
+
+	# Marks the entry as used, without writing it until the next change
+	def touch(self, key):
+		entry = self.entries.get(key)
+		if entry is not None:
+			entry[0] = int(time())
+			self._add(key, entry)
+			self.touched.add(key)
+		return entry
+
+	def remove(self, key):
+		if key not in self.entries:
+			return False
+		self._remove(key)
+		self.append([("d", key)])
+		return True
+
+	# Returns the keys of the files in the directory and its subdirectories
+	def keysInDirectory(self, directory):
+		return [key for path, keys in self.directories.iteritems() if path.startswith(directory) for key in keys]
+
+	def removeDirectory(self, directory):
+		keys = self.keysInDirectory(directory)
+		for key in keys:
+			self._remove(key)
+		if keys:
+			self.append([("d", key) for key in keys])
+		return bool(keys)
+
+	# Moves or copies entries to new keys, renames is a list of (old, new)
+	def rename(self, renames, copy=False):
+		records = []
+		for old, new in renames:
+			entry = self.entries.get(old)
+			if entry is None or old == new:
+				continue
+			if copy:
+				entry = entry[:]
+			else:
+				self._remove(old)
+				records.append(("d", old))
+			self._add(new, entry)
+			records.append(("s", new, entry))
+		if records:
+			self.sortEntries()
+			self.append(records)
+		return bool(records)
+
+	def clear(self):
+		if self.entries:
+			self.reset()
+			self.compact()
+
+	def reset(self):
+		self.entries = OrderedDict()
+		self.directories = {}
+		self.touched = set()
+		self.records = 0
+
+	def sortEntries(self):
+		self.entries = OrderedDict(sorted(self.entries.iteritems(), key=lambda item: item[1][0]))
+
+	def append(self, records):
+		records += [("s", key, self.entries[key]) for key in self.touched]
+		self.touched = set()
+		if self.records + len(records) > max(COMPACT_MIN, COMPACT_FACTOR * len(self.entries)):
+			self.compact()
+			return
+		try:
+			f = open(self.filename, "ab")
+			for record in records:
+				cPickle.dump(record, f, cPickle.HIGHEST_PROTOCOL)
+			f.close()
+			self.records += len(records)
+			self.saveTime = os.stat(self.filename).st_mtime
+		except Exception, ex:
+			print "[ResumePoints] Failed to write resume points:", ex
+			self.saveTime = 0
+
+	def compact(self):
+		self.touched = set()
+		try:
+			f = open(self.filename + ".tmp", "wb")
+			for key, entry in self.entries.iteritems():
+				cPickle.dump(("s", key, entry), f, cPickle.HIGHEST_PROTOCOL)
+			f.flush()
+			os.fsync(f.fileno())
+			f.close()
+			os.rename(self.filename + ".tmp", self.filename)
+			self.records = len(self.entries)
+			self.saveTime = os.stat(self.filename).st_mtime
+		except Exception, ex:
+			print "[ResumePoints] Failed to write resume points:", ex
+			self.saveTime = 0
+
+	def load(self):
+		self.reset()
+		try:
+			f = open(self.filename, "rb")
+		except IOError:
+			self.loadLegacy()
+			return
+		damaged = False
+		try:
+			self.saveTime = os.fstat(f.fileno()).st_mtime
+			while True:
+				try:
+					record = cPickle.load(f)
+				except EOFError:
+					break
+				except Exception, ex:
+					# a record that was not completely written
+					print "[ResumePoints] Failed to load resume points:", ex
+					damaged = True
+					break
+				if record[0] == "s":
+					self._add(record[1], record[2])
+				elif record[1] in self.entries:
+					self._remove(record[1])
+				self.records += 1
+		finally:
+			f.close()
+		self.sortEntries()
+		if damaged:
+			self.compact()
+
+	# Takes over the resume points of the pickled dictionary used before
+	def loadLegacy(self):
+		if self.legacyfile is None or not os.path.exists(self.legacyfile):
+			return
+		try:
+			f = open(self.legacyfile, "rb")
+			entries = cPickle.load(f)
+			f.close()
+		except Exception, ex:
+			print "[ResumePoints] Failed to load resume points:", ex
+			return
+		for key, entry in entries.iteritems():
+			self._add(key, entry)
+		self.sortEntries()
+		self.compact()
+
+	# Reloads the log when it was written by someone else
+	def reloadIfChanged(self):
+		try:
+			if os.stat(self.filename).st_mtime == self.saveTime:
+				return
+		except OSError:
+			if not self.saveTime:
+				return
+		self.load()
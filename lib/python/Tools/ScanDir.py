@@ -0,0 +1,91 @@
+import os
+import stat
+
+# Lists a directory together with the entry types the file system reports
+# with the names (d_type), so an entry only needs a stat when its type is
+# unknown or it is a symbolic link. Uses the scandir module when it is
+# installed, else readdir through ctypes, else listdir with lstat.
+
+try:
+	from scandir import scandir
+except ImportError:
+	scandir = None
+
+DT_UNKNOWN = 0
+DT_DIR = 4
+DT_LNK = 10
+
+_readdir = None
+if scandir is None:
+	try:
+		from ctypes import CDLL, Structure, POINTER, c_char, c_char_p, c_int, c_int64, c_ubyte, c_uint64, c_ushort, c_void_p, get_errno
+
+		class _Dirent64(Structure):
+			_fields_ = [("d_ino", c_uint64), ("d_off", c_int64), ("d_reclen", c_ushort), ("d_type", c_ubyte), ("d_name", c_char * 256)]
+
+		_libc = CDLL("libc.so.6", use_errno=True)
+		_opendir = _libc.opendir
+		_opendir.argtypes = (c_char_p,)
+		_opendir.restype = c_void_p
+		_readdir = _libc.readdir64
+		_readdir.argtypes = (c_void_p,)
+		_readdir.restype = POINTER(_Dirent64)
+		_closedir = _libc.closedir
+		_closedir.argtypes = (c_void_p,)
+		_closedir.restype = c_int
+	except (ImportError, OSError, AttributeError):
+		_readdir = None
+
+def _isDir(path):
+	try:
+		return stat.S_ISDIR(os.stat(path).st_mode)
+	except OSError:
+		return False
+
+def _entryTypes(path, name, isDir, isLink):
+	# Resolves the entries readdir could not classify
+	if isLink:
+		return name, _isDir(os.path.join(path, name)), True
+	try:
+		mode = os.lstat(os.path.join(path, name)).st_mode
+	except OSError:
+		return name, False, False
+	if stat.S_ISLNK(mode):
+		return name, _isDir(os.path.join(path, name)), True
+	return name, stat.S_ISDIR(mode), False
+
+def _readDirectory(path):
+	if isinstance(path, unicode):
+		path = path.encode("utf-8")
+	handle = _opendir(path)
+	if not handle:
+		err = get_errno()
+		raise OSError(err, os.strerror(err), path)
+	entries = []
+	try:
+		while True:
+			entry = _readdir(handle)
+			if not entry:
+				break
+			entry = entry.contents
+			name = entry.d_name
+			if name == "." or name == "..":
+				continue
+			if entry.d_type == DT_DIR:
+				entries.append((name, True, False))
+			elif entry.d_type == DT_LNK or entry.d_type == DT_UNKNOWN:
+				entries.append(_entryTypes(path, name, False, entry.d_type == DT_LNK))
+			else:
+				entries.append((name, False, False))
+	finally:
+		_closedir(handle)
+	return entries
+
+# Returns the entries of a directory as (name, isDir, isLink), where isDir
+# follows symbolic links like os.path.isdir does. Raises OSError.
+def scanDirectory(path):
+	if scandir is not None:
+		return [(entry.name, entry.is_dir(), entry.is_symlink()) for entry in scandir(path)]
+	if _readdir is not None:
+		return _readDirectory(path)
+	return [_entryTypes(path, name, False, False) for name in os.listdir(path)]
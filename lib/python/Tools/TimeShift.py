@@ -1,8 +1,24 @@
-from Components.Task import Task, Job
+from Components.Task import Task, PythonTask, Job
 from Components.config import config
 from Tools.Directories import fileExists
+from Tools.APSCFile import APSCGenerator, AccessPoints, appendAPSC
+from Tools.FileCopy import FileCopier
 from enigma import eTimer
 from os import path
+from bisect import bisect_left
+import struct
+
+cutsEntry = struct.Struct(">QI") # big-endian, 64-bit PTS and 32-bit type
+
+def writeCuts(filename, cuts):
+	f = open(filename, "wb")
+	try:
+		f.write(''.join([cutsEntry.pack(pts, what) for pts, what in cuts]))
+	finally:
+		f.close()
+
+def hasAPSCFiles(filename):
+	return fileExists(filename + ".ap") and fileExists(filename + ".sc") and not fileExists(filename + ".reconstruct_apsc")
 
 class CopyTimeshiftJob(Job):
 	def __init__(self, toolbox, cmdline, srcfile, destfile, eventname):
@@ -42,60 +58,96 @@ class AddCopyTimeshiftTask(Task):
 		config.timeshift.isRecording.value = True
 
 class MergeTimeshiftJob(Job):
-	def __init__(self, toolbox, cmdline, srcfile, destfile, eventname):
+	def __init__(self, toolbox, srcfile, destfile, eventname):
 		Job.__init__(self, _("Merging Timeshift files"))
 		self.toolbox = toolbox
-		AddMergeTimeshiftTask(self, cmdline, srcfile, destfile, eventname)
-
-class AddMergeTimeshiftTask(Task):
-	def __init__(self, job, cmdline, srcfile, destfile, eventname):
-		Task.__init__(self, job, eventname)
+		MergeTimeshiftTask(self, srcfile, destfile, eventname)
+
+# Appends a timeshift recording to the one before it, and moves its .ap, .sc
+# and .cuts entries behind those of the destination when both recordings
+# have complete access point files.
+class MergeTimeshiftTask(PythonTask):
+	def __init__(self, job, srcfile, destfile, eventname):
+		PythonTask.__init__(self, job, eventname)
 		self.toolbox = job.toolbox
-		self.setCmdline(cmdline)
 		self.srcfile = config.usage.default_path.value + srcfile
 		self.destfile = config.usage.default_path.value + destfile
+		self.copier = FileCopier()
+		self.destsize = None
+		self.indexed = False
 
-		self.ProgressTimer = eTimer()
-		self.ProgressTimer.callback.append(self.ProgressUpdate)
+	def prepare(self):
+		self.toolbox.ptsFrontpanelActions("start")
 
-	def ProgressUpdate(self):
-		if self.srcsize <= 0 or not fileExists(self.destfile, 'r'):
+	def work(self):
+		self.destsize = self.copier.appendFile(self.srcfile, self.destfile)
+		if self.destsize and hasAPSCFiles(self.srcfile) and hasAPSCFiles(self.destfile):
+			appendAPSC(self.destfile + ".ap", self.srcfile + ".ap", self.destsize)
+			appendAPSC(self.destfile + ".sc", self.srcfile + ".sc", self.destsize)
+			self.mergeCuts()
+			self.indexed = True
+
+	# Moves the marks of the source behind those of the destination, by the
+	# corrected PTS the source starts with in the merged recording
+	def mergeCuts(self):
+		if not fileExists(self.srcfile + ".cuts"):
+			return
+		srcap = AccessPoints(self.srcfile + ".ap")
+		mergedap = AccessPoints(self.destfile + ".ap")
+		first = bisect_left(mergedap.offsetList, self.destsize)
+		if not srcap.pts or first >= len(mergedap):
 			return
+		from Components.MovieList import readCutsFile
+		shift = mergedap.pts[first] - srcap.pts[0]
+		cuts = readCutsFile(self.destfile + ".cuts") if fileExists(self.destfile + ".cuts") else []
+		# the resume point of the destination stays where it is
+		cuts += [(max(0, pts + shift), what) for pts, what in readCutsFile(self.srcfile + ".cuts") if what != 3]
+		writeCuts(self.destfile + ".cuts", sorted(cuts))
 
-		self.setProgress(int((path.getsize(self.destfile)/float(self.srcsize))*100))
-		self.ProgressTimer.start(7500, True)
+	def abort(self):
+		self.copier.aborted = True
+		PythonTask.abort(self)
 
-	def prepare(self):
-		if fileExists(self.srcfile, 'r') and fileExists(self.destfile, 'r'):
-			fsize1 = path.getsize(self.srcfile)
-			fsize2 = path.getsize(self.destfile)
-			self.srcsize = fsize1 + fsize2
-			self.ProgressTimer.start(7500, True)
-
-		self.toolbox.ptsFrontpanelActions("start")
+	def onTimer(self):
+		self.setProgress(self.copier.getProgress())
 
 	def afterRun(self):
 		self.setProgress(100)
-		self.ProgressTimer.stop()
+		if self.destsize is None:
+			# nothing was appended, the source is kept
+			self.toolbox.ptsFrontpanelActions("stop")
+			config.timeshift.isRecording.value = False
+			return
 		config.timeshift.isRecording.value = True
-		self.toolbox.ptsMergeFilefinished(self.srcfile, self.destfile)
+		self.toolbox.ptsMergeFilefinished(self.srcfile, self.destfile, self.destsize, self.indexed)
 
 class CreateAPSCFilesJob(Job):
-	def __init__(self, toolbox, cmdline, eventname):
+	def __init__(self, toolbox, filename, eventname, start=0):
 		Job.__init__(self, _("Creating AP and SC Files"))
 		self.toolbox = toolbox
-		CreateAPSCFilesTask(self, cmdline, eventname)
+		CreateAPSCFilesTask(self, filename, eventname, start)
 
-class CreateAPSCFilesTask(Task):
-	def __init__(self, job, cmdline, eventname):
-		Task.__init__(self, job, eventname)
+class CreateAPSCFilesTask(PythonTask):
+	def __init__(self, job, filename, eventname, start=0):
+		PythonTask.__init__(self, job, eventname)
 		self.toolbox = job.toolbox
-		self.setCmdline(cmdline)
+		self.generator = APSCGenerator(filename, start)
 
 	def prepare(self):
 		self.toolbox.ptsFrontpanelActions("start")
 		config.timeshift.isRecording.value = True
 
+	def work(self):
+		if not self.generator.run():
+			raise Exception(_("Creating the AP and SC files was aborted"))
+
+	def abort(self):
+		self.generator.aborted = True
+		PythonTask.abort(self)
+
+	def onTimer(self):
+		self.setProgress(self.generator.progress)
+
 	def afterRun(self):
 		self.setProgress(100)
 		self.toolbox.ptsSaveTimeshiftFinished()
@@ -3,11 +3,14 @@ from Components.config import config
 from Components import Harddisk
 from Components.GUIComponent import GUIComponent
 from Components.VariableText import VariableText
+from Components.DirectoryStats import directoryStats
 from Tools.UnitConversions import UnitScaler
 import time
 import os
 import stat
 import enigma
+import threading
+from heapq import heapify, heappop
 
 def getTrashFolder(path=None):
 	# Returns trash folder without symlinks
@@ -59,6 +62,86 @@ def get_size(start_path='.'):
 					pass
 	return total_size
 
+# How often a trash can is walked to bring its ledger up to date when its
+# directory did not change
+RECONCILE_INTERVAL = 12 * 3600
+
+# The files in a trash can with their ctime (the time they were moved to the
+# trash) and size, and a heap of them by ctime for the cleaner. The cleaner,
+# which runs in a thread, walks the trash again whenever the modification
+# time of its directory changed since the last walk, i.e. whenever something
+# was moved into the trash or deleted from it, including by the cleaner
+# itself. The ledger only saves that walk while the trash is unchanged, and
+# files deleted from its subdirectories are dropped after RECONCILE_INTERVAL.
+class TrashLedger:
+	def __init__(self, trash):
+		self.trash = trash
+		self.files = {}
+		self.heap = []
+		self.size = 0
+		self.reconciled = 0
+		self.mtime = None
+		self.lock = threading.Lock()
+
+	def reconcileIfDue(self):
+		try:
+			mtime = os.stat(self.trash).st_mtime
+		except OSError:
+			mtime = None
+		if mtime != self.mtime or time.time() - self.reconciled > RECONCILE_INTERVAL:
+			self.reconcile()
+
+	def reconcile(self):
+		files = {}
+		for root, dirs, names in os.walk(self.trash, topdown=False):
+			for name in names:
+				fn = os.path.join(root, name)
+				try:
+					st = os.stat(fn)
+					files[fn] = (st.st_ctime, st.st_size)
+				except:
+					pass
+			# Remove empty directories if possible
+			for name in dirs:
+				try:
+					os.rmdir(os.path.join(root, name))
+				except:
+					pass
+		with self.lock:
+			self.files = files
+			self.size = sum(size for ctime, size in files.itervalues())
+			self.heap = [(ctime, fn) for fn, (ctime, size) in files.iteritems()]
+			heapify(self.heap)
+			self.reconciled = time.time()
+			# taken after the walk, which may have removed empty directories
+			try:
+				self.mtime = os.stat(self.trash).st_mtime
+			except OSError:
+				self.mtime = None
+
+	# Removes the file that has been in the trash longest from the ledger and
+	# returns (path, size), or None when there is none older than before
+	def popOldest(self, before=None):
+		with self.lock:
+			if not self.heap:
+				return None
+			ctime, path = self.heap[0]
+			if before is not None and ctime >= before:
+				return None
+			heappop(self.heap)
+			size = self.files.pop(path)[1]
+			self.size -= size
+			return path, size
+
+ledgers = {}
+
+def getTrashLedger(trash):
+	trash = os.path.realpath(trash)
+	ledger = ledgers.get(trash)
+	if ledger is None:
+		ledger = ledgers[trash] = TrashLedger(trash)
+	return ledger
+
 class Trashcan:
 	def __init__(self, session):
 		self.session = session
@@ -119,6 +202,7 @@ def cleanAll(path=None):
 	if not os.path.isdir(trash):
 		print "[Trashcan] No trash.", trash
 		return 0
+	ledgers.pop(os.path.realpath(trash), None)
 	for root, dirs, files in os.walk(trash, topdown=False):
 		for name in files:
 			fn = os.path.join(root, name)
@@ -166,56 +250,50 @@ class CleanTrashTask(Components.Task.PythonTask):
 				matches.append(os.path.join(mount, 'movie/.Trash'))
 
 		print "[Trashcan] found following trashcan's:", matches
-		if len(matches):
-			for trashfolder in matches:
-				print "[Trashcan] looking in trashcan", trashfolder
-				trashsize = get_size(trashfolder)
-				diskstat = os.statvfs(trashfolder)
-				free = diskstat.f_bfree * diskstat.f_bsize
-				bytesToRemove = self.reserveBytes - free
-				print "[Trashcan] " + str(trashfolder) + ": Size:", trashsize
-				candidates = []
-				size = 0
-				for root, dirs, files in os.walk(trashfolder, topdown=False):
-					from Screens.InfoBarGenerics import delResumePoint
-					from Screens.MovieSelection import findMatchingServiceRefs
-					serviceRefMap = findMatchingServiceRefs(root, files)
-
-					for name in files:
-						try:
-							fn = os.path.join(root, name)
-							st = os.stat(fn)
-							if st.st_ctime < self.ctimeLimit:
-								enigma.eBackgroundFileEraser.getInstance().erase(fn)
-								if fn in serviceRefMap:
-									delResumePoint(serviceRefMap[fn])
-								bytesToRemove -= st.st_size
-							else:
-								candidates.append((st.st_ctime, fn, st.st_size))
-								size += st.st_size
-						except Exception, e:
-							print "[Trashcan] Failed to stat %s:" % name, e
-					# Remove empty directories if possible
-					for name in dirs:
-						try:
-							os.rmdir(os.path.join(root, name))
-						except:
-							pass
-					candidates.sort()
-					# Now we have a list of ctime, candidates, size. Sorted by ctime (=deletion time)
-					for st_ctime, fn, st_size in candidates:
-						if bytesToRemove < 0:
-							break
-						try:
-							# somtimes the file does not exist, can happen if trashcan is on a network, the main box could also be emptying trash at same time.
-							enigma.eBackgroundFileEraser.getInstance().erase(fn)
-							if fn in serviceRefMap:
-								delResumePoint(serviceRefMap[fn])
-						except:
-							pass
-						bytesToRemove -= st_size
-						size -= st_size
-					print "[Trashcan] " + str(trashfolder) + ": Size now:", size
+		for trashfolder in matches:
+			print "[Trashcan] looking in trashcan", trashfolder
+			ledger = getTrashLedger(trashfolder)
+			ledger.reconcileIfDue()
+			diskstat = os.statvfs(trashfolder)
+			free = diskstat.f_bfree * diskstat.f_bsize
+			bytesToRemove = self.reserveBytes - free
+			print "[Trashcan] " + str(trashfolder) + ": Size:", ledger.size
+			# Files older than the limit go first, then the files that have
+			# been in the trash longest until there is enough free space.
+			erase = []
+			while True:
+				entry = ledger.popOldest(self.ctimeLimit)
+				if entry is None:
+					break
+				erase.append(entry[0])
+				bytesToRemove -= entry[1]
+			while bytesToRemove >= 0:
+				entry = ledger.popOldest()
+				if entry is None:
+					break
+				erase.append(entry[0])
+				bytesToRemove -= entry[1]
+			self.eraseFiles(erase)
+			print "[Trashcan] " + str(trashfolder) + ": Size now:", ledger.size
+
+	def eraseFiles(self, files):
+		from Screens.InfoBarGenerics import delResumePoint
+		from Screens.MovieSelection import findMatchingServiceRefs
+		folders = {}
+		for fn in files:
+			root, name = os.path.split(fn)
+			folders.setdefault(root, []).append(name)
+		for root, names in folders.iteritems():
+			serviceRefMap = findMatchingServiceRefs(root, names)
+			for name in names:
+				fn = os.path.join(root, name)
+				try:
+					# somtimes the file does not exist, can happen if trashcan is on a network, the main box could also be emptying trash at same time.
+					enigma.eBackgroundFileEraser.getInstance().erase(fn)
+					if fn in serviceRefMap:
+						delResumePoint(serviceRefMap[fn])
+				except Exception, e:
+					print "[Trashcan] Failed to erase %s:" % name, e
 
 class TrashInfo(VariableText, GUIComponent):
 	FREE = 0
@@ -226,17 +304,37 @@ class TrashInfo(VariableText, GUIComponent):
 		GUIComponent.__init__(self)
 		VariableText.__init__(self)
 		self.type = type
+		self.trash = None
 		if update and path != '/media/autofs/':
 			self.update(path)
 
 	def update(self, path):
 		if self.type == self.USED:
-			try:
-				total_size = get_size(getTrashFolder(path))
-				total_size = _("%s %sB") % UnitScaler()(total_size)
-			except:
-				# occurs when f_blocks is 0 or a similar error
-				total_size = " -?-"
-			self.setText(_("Trash:") + " " + total_size)
+			trash = getTrashFolder(path)
+			if trash is None:
+				self.trash = None
+				self.setText(_("Trash:") + " -?-")
+			elif not trash or not os.path.isdir(trash):
+				self.trash = None
+				self.showSize(0)
+			else:
+				# show the size known so far, the walk is done in the background
+				self.trash = os.path.normpath(trash)
+				stats = directoryStats.get(self.trash)
+				if stats is not None:
+					self.showSize(stats[0])
+				directoryStats.refresh(self.trash, self.sizeRefreshed)
+
+	def sizeRefreshed(self, path, stats):
+		if path == self.trash:
+			self.showSize(stats[0])
+
+	def showSize(self, total_size):
+		try:
+			total_size = _("%s %sB") % UnitScaler()(total_size)
+		except:
+			# occurs when f_blocks is 0 or a similar error
+			total_size = " -?-"
+		self.setText(_("Trash:") + " " + total_size)
 
 	GUI_WIDGET = enigma.eLabel
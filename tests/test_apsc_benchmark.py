@@ -0,0 +1,117 @@
+import os
+import random
+import struct
+import tempfile
+import time
+
+import tests
+from Tools.APSCFile import APSCGenerator, APSCFile, appendAPSC
+from Tools.FileCopy import FileCopier
+
+# Creates .ap/.sc files for synthetic MPEG-2 and H.264 transport streams
+# with APSCGenerator, checks the access points against the I-frames that
+# were written, checks that indexing an appended part and merging two
+# indexed parts give the same files as indexing everything, and reports the
+# throughput.
+#
+# Start this test with
+# PYTHONPATH=.:..:../lib/python/ python test_apsc_benchmark.py
+
+VIDEO_PID = 0x100
+AUDIO_PID = 0x101
+FRAMES = 1500
+PACKETS_PER_FRAME = 100
+GOP = 12
+
+random.seed(4711)
+noise = ''.join(chr(random.randint(1, 255)) for x in range(65536))
+
+def packet(pid, payload, cc, start=False):
+	header = struct.pack(">BHB", 0x47, (0x4000 if start else 0) | pid, 0x10 | (cc & 0x0f))
+	payload = payload[:184]
+	if len(payload) < 184:
+		payload += noise[:184 - len(payload)]
+	return header + payload
+
+def pesHeader(stream_id, pts):
+	return "\x00\x00\x01" + chr(stream_id) + "\x00\x00\x80\x80\x05" + struct.pack(">BHH",
+		0x21 | ((pts >> 29) & 0x0e), (((pts >> 15) & 0x7fff) << 1) | 1, ((pts & 0x7fff) << 1) | 1)
+
+def writeStream(filename, codec):
+	iframes = []
+	f = open(filename, "wb")
+	pts = 0x1ffff0000 # wraps around during the stream
+	cc = 0
+	for frame in xrange(FRAMES):
+		framepts = (pts + frame * 3600) & 0x1ffffffff
+		intra = frame % GOP == 0
+		if codec == "h264":
+			es = "\x00\x00\x00\x01\x09" + ("\x10" if intra else "\x30")
+		else:
+			es = ("\x00\x00\x01\xb3\x2d\x02\x40\x33" if intra else "") + "\x00\x00\x01\x00\x00" + ("\x08" if intra else "\x10") + "\xff\xf8"
+		if intra:
+			iframes.append((f.tell(), framepts))
+		f.write(packet(VIDEO_PID, pesHeader(0xe0, framepts) + es, cc, True))
+		cc += 1
+		for x in xrange(PACKETS_PER_FRAME - 1):
+			if x % 20 == 10:
+				f.write(packet(AUDIO_PID, pesHeader(0xc0, framepts), x, True))
+			ofs = random.randint(0, len(noise) - 184)
+			payload = noise[ofs:ofs + 184]
+			if x % 4 == 0:
+				# a slice or NAL unit start inside the frame
+				ofs = random.randint(0, 170)
+				payload = payload[:ofs] + ("\x00\x00\x01\x01" if codec == "mpeg2" else "\x00\x00\x01\x41") + payload[ofs + 4:]
+			f.write(packet(VIDEO_PID, payload, cc))
+			cc += 1
+	f.close()
+	return iframes
+
+def readEntries(filename):
+	apsc = APSCFile(filename)
+	entries = [(apsc.offset(i), apsc.value(i)) for i in range(len(apsc))]
+	apsc.close()
+	return entries
+
+def check_stream(codec):
+	directory = tempfile.mkdtemp()
+	filename = os.path.join(directory, "synthetic.ts")
+	try:
+		iframes = writeStream(filename, codec)
+		size = os.path.getsize(filename)
+		start = time.time()
+		if not APSCGenerator(filename).run():
+			raise tests.TestError("%s: generator aborted" % codec)
+		elapsed = time.time() - start
+		ap = readEntries(filename + ".ap")
+		sc = readEntries(filename + ".sc")
+		if ap != iframes:
+			raise tests.TestError("%s: %d access points, expected %d" % (codec, len(ap), len(iframes)))
+		if len(sc) < FRAMES:
+			raise tests.TestError("%s: %d structure entries for %d frames" % (codec, len(sc), FRAMES))
+
+		# index the second half as if it had been appended later
+		half = iframes[len(iframes) / 2][0]
+		f = open(filename + ".ap", "r+b")
+		f.truncate(len(iframes) / 2 * 16 + 32) # with two entries to be replaced
+		f.close()
+		APSCGenerator(filename, half).run()
+		if readEntries(filename + ".ap") != ap or readEntries(filename + ".sc") != sc:
+			raise tests.TestError("%s: appended index differs" % codec)
+		if os.path.exists(filename + ".reconstruct_apsc"):
+			raise tests.TestError("%s: marker left after a complete run" % codec)
+
+		# an aborted run must leave the marker, the files are incomplete
+		generator = APSCGenerator(filename, half)
+		generator.aborted = True
+		if generator.run() or not os.path.exists(filename + ".reconstruct_apsc"):
+			raise tests.TestError("%s: aborted run not marked as incomplete" % codec)
+
+		print "%s: %d access points, %.1f MB in %.2f s, %.1f MB/s" % (codec, len(ap), size / 1048576.0, elapsed, size / 1048576.0 / elapsed)
+	finally:
+		for name in os.listdir(directory):
+			os.unlink(os.path.join(directory, name))
+		os.rmdir(directory)
+
+check_stream("h264")
+check_stream("mpeg2")
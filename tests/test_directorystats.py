@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+
+import tests
+from Components.DirectoryStats import DirectoryStats
+
+# Checks the cached directory sizes and counts against os.walk after files
+# and directories were added and removed.
+#
+# Start this test with
+# PYTHONPATH=.:..:../lib/python/ python test_directorystats.py
+
+def walkStats(path):
+	size = files = dirs = 0
+	for root, dirnames, filenames in os.walk(path):
+		dirs += len(dirnames)
+		for name in filenames:
+			size += os.path.getsize(os.path.join(root, name))
+			files += 1
+	return size, files, dirs
+
+def write(path, size):
+	f = open(path, "wb")
+	f.write("x" * size)
+	f.close()
+
+def check(stats, path, step):
+	expected = walkStats(path)
+	got = stats.getStats(path)
+	if got != expected:
+		raise tests.TestError("%s: %s, expected %s" % (step, got, expected))
+
+directory = tempfile.mkdtemp()
+try:
+	stats = DirectoryStats()
+	for d in ("a", "a/b", "c"):
+		os.mkdir(os.path.join(directory, d))
+	for i, name in enumerate(("1.ts", "a/2.ts", "a/b/3.ts", "c/4.ts")):
+		write(os.path.join(directory, name), 1000 * (i + 1))
+	if stats.get(directory) is not None:
+		raise tests.TestError("stats known before the first walk")
+	check(stats, directory, "first walk")
+	write(os.path.join(directory, "a/b/5.ts"), 77)
+	check(stats, directory, "file added")
+	shutil.rmtree(os.path.join(directory, "a"))
+	check(stats, directory, "directory removed")
+	if os.path.join(directory, "a/b") in stats.entries:
+		raise tests.TestError("removed directory still cached")
+	print "directory stats ok:", stats.get(directory)
+finally:
+	shutil.rmtree(directory)
@@ -0,0 +1,73 @@
+import os
+import cPickle
+import tempfile
+import time
+
+import tests
+from Tools.ResumePoints import ResumePointStore
+
+# Checks that the resume point store evicts the least recently used
+# entries, can be used as a dictionary, moves and deletes directories,
+# survives a reload from its log, a damaged last record and compaction,
+# and takes over the pickled dictionary used before. Reports the time per
+# update.
+#
+# Start this test with
+# PYTHONPATH=.:..:../lib/python/ python test_resumepoints.py
+
+def ref(path):
+	return "1:0:0:0:0:0:0:0:0:0:%s:" % path
+
+def check(condition, message):
+	if not condition:
+		raise tests.TestError(message)
+
+directory = tempfile.mkdtemp()
+filename = os.path.join(directory, "resumepoints.log")
+legacy = os.path.join(directory, "resumepoints.pkl")
+try:
+	f = open(legacy, "wb")
+	cPickle.dump({ref("/hdd/movie/old.ts"): [1, 900000, 1800000]}, f, cPickle.HIGHEST_PROTOCOL)
+	f.close()
+	store = ResumePointStore(filename, legacy)
+	check(store.get(ref("/hdd/movie/old.ts")) == [1, 900000, 1800000], "legacy resume point not taken over")
+
+	for i in range(10):
+		store.set(ref("/hdd/movie/a/%d.ts" % i), i * 90000, 3600 * 90000, 10)
+	check(ref("/hdd/movie/old.ts") not in store and len(store) == 10, "least recently used entry not evicted")
+	store.touch(ref("/hdd/movie/a/0.ts"))
+	store.set(ref("/hdd/movie/b/x.ts"), 1, 2, 10)
+	check(ref("/hdd/movie/a/0.ts") in store and ref("/hdd/movie/a/1.ts") not in store, "touched entry evicted")
+
+	store.rename([(k, k.replace(":/hdd/movie/a/", ":/hdd/archive/a/", 1)) for k in store.keysInDirectory("/hdd/movie/a/")])
+	check(len(store.keysInDirectory("/hdd/archive/")) == 9 and not store.keysInDirectory("/hdd/movie/a/"), "directory not moved")
+	store.removeDirectory("/hdd/movie/")
+	check(len(store) == 9, "directory not deleted")
+
+	store[ref("/hdd/movie/d.ts")] = [2, 3, 4]
+	del store[ref("/hdd/movie/d.ts")]
+	store[ref("/hdd/movie/e.ts")] = [5, 6, 7]
+	check(store.pop(ref("/hdd/movie/e.ts")) == [5, 6, 7] and ref("/hdd/movie/e.ts") not in store.keys(), "entry not set or deleted by key")
+	check(dict(store.items()) == dict(store.entries), "items differ from the entries")
+
+	reloaded = ResumePointStore(filename)
+	check(reloaded.entries == store.entries, "reloaded entries differ")
+
+	f = open(filename, "ab")
+	f.write(cPickle.dumps(("s", ref("/hdd/half.ts"), [1, 2, 3]), cPickle.HIGHEST_PROTOCOL)[:-3])
+	f.close()
+	reloaded = ResumePointStore(filename)
+	check(reloaded.entries == store.entries, "damaged record not dropped")
+
+	count = 5000
+	start = time.time()
+	for i in range(count):
+		store.set(ref("/hdd/movie/c/%d.ts" % (i % 500)), i, count, 1000)
+	elapsed = time.time() - start
+	check(store.records <= max(256, 4 * len(store)), "log not compacted")
+	check(ResumePointStore(filename).entries == store.entries, "compacted entries differ")
+	print "%d resume points, %.3f ms per update" % (len(store), elapsed * 1000 / count)
+finally:
+	for name in os.listdir(directory):
+		os.unlink(os.path.join(directory, name))
+	os.rmdir(directory)
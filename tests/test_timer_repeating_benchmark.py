@@ -0,0 +1,85 @@
+import enigma
+import time
+import os
+import re
+
+import tests
+import timer
+
+# Checks TimerEntry.nextRepeatTime against the timer start times recorded
+# in the test_timer_repeating*.results files, and compares its speed with
+# stepping one day at a time through TimerEntry.addOneDay.
+#
+# Start this test with
+# PYTHONPATH=.:..:../lib/python/ python test_timer_repeating_benchmark.py
+
+# we are operating in CET/CEST
+os.environ['TZ'] = 'CET'
+time.tzset()
+
+ALL_DAYS = [True] * 7
+
+def stepRepeatTime(entry, begin, end, repeatedbegindate, day, now):
+	# The day by day search nextRepeatTime used before
+	localbegin = time.localtime(begin)
+	localend = time.localtime(end)
+	localnow = time.localtime(now)
+	repeatedbegindate = int(time.mktime(time.localtime(repeatedbegindate)))
+	while not (
+		day[localbegin.tm_wday] and
+		int(time.mktime(localbegin)) >= repeatedbegindate and
+		localnow < localend
+	):
+		localbegin = entry.addOneDay(localbegin)
+		localend = entry.addOneDay(localend)
+	begin = int(time.mktime(localbegin))
+	end = int(time.mktime(localend))
+	if begin == end:
+		end += 1
+	return begin, end
+
+def readStartTimes(test_name):
+	f = open(test_name + ".results", "rb")
+	results = f.read()
+	f.close()
+	return [int(begin) for begin in re.findall(r"::prepare\(.*?, \*\('[^']*', (\d+), \d+", results)]
+
+def check_results(test_name, duration=1000):
+	begins = readStartTimes(test_name)
+	if len(begins) < 2:
+		raise tests.TestError("no start times in %s.results" % test_name)
+	entry = timer.TimerEntry(begins[0], begins[0] + duration)
+	for begin, expected in zip(begins, begins[1:]):
+		next_begin, next_end = entry.nextRepeatTime(begin, begin + duration, begins[0], ALL_DAYS, findNextEvent=True)
+		if next_begin != expected:
+			raise tests.TestError("%s: next start after %s is %s, expected %s" % (test_name, time.ctime(begin), time.ctime(next_begin), time.ctime(expected)))
+	print "%s: %d start times ok" % (test_name, len(begins))
+
+def benchmark(name, begin, end, repeatedbegindate, day, now, count=200):
+	entry = timer.TimerEntry(begin, end)
+	real_time = timer.time
+	timer.time = lambda: now - 1
+	try:
+		start = time.clock()
+		for x in range(count):
+			result = entry.nextRepeatTime(begin, end, repeatedbegindate, day)
+		direct = time.clock() - start
+		start = time.clock()
+		for x in range(count):
+			expected = stepRepeatTime(entry, begin, end, repeatedbegindate, day, now)
+		stepped = time.clock() - start
+	finally:
+		timer.time = real_time
+	if result != expected:
+		raise tests.TestError("%s: nextRepeatTime %s, day by day %s" % (name, result, expected))
+	print "%s: direct %.3f ms, day by day %.3f ms per call" % (name, direct * 1000 / count, stepped * 1000 / count)
+
+check_results("test_timer_repeating")
+check_results("test_timer_repeating_dst_skip")
+check_results("test_timer_repeating_dst_start")
+
+begin = 1174417200  # Tue Mar 20 20:00:00 2007 CET, the day the dst tests start
+mondays = [True, False, False, False, False, False, False]
+benchmark("next day", begin, begin + 3600, begin, ALL_DAYS, begin + 7200)
+benchmark("begin date half a year ahead", begin, begin + 3600, begin + 183 * 86400, mondays, begin)
+benchmark("resume after a year in standby", begin, begin + 3600, begin, mondays, begin + 365 * 86400)
@@ -1,8 +1,48 @@
-from bisect import insort
 from time import time, localtime, mktime
 from enigma import eTimer, eActionMap
 import datetime
 
+# The timer lists are kept sorted by the next activation time of the
+# entries. The activation time is cached in the entry when it is sorted
+# into a list (it only changes when the entry is re-sorted anyway), so
+# inserting and removing cost O(log n) attribute lookups instead of
+# getNextActivation() calls for every comparison.
+
+def insortTimer(timers, entry):
+	key = entry.activation_key = entry.getNextActivation()
+	lo = 0
+	hi = len(timers)
+	while lo < hi:
+		mid = (lo + hi) // 2
+		if key < timers[mid].activation_key:
+			hi = mid
+		else:
+			lo = mid + 1
+	timers.insert(lo, entry)
+
+def removeTimer(timers, entry):
+	key = entry.activation_key
+	lo = 0
+	hi = len(timers)
+	while lo < hi:
+		mid = (lo + hi) // 2
+		if timers[mid].activation_key < key:
+			lo = mid + 1
+		else:
+			hi = mid
+	for idx in xrange(lo, len(timers)):
+		if timers[idx] is entry:
+			del timers[idx]
+			return
+		if timers[idx].activation_key > key:
+			break
+	timers.remove(entry)  # Not where expected, raises ValueError if it isn't in the list
+
+def sortTimers(timers):
+	for entry in timers:
+		entry.activation_key = entry.getNextActivation()
+	timers.sort(key=lambda entry: entry.activation_key)
+
 class TimerEntry:
 	StateWaiting = 0
 	StatePrepared = 1
@@ -22,6 +62,7 @@ class TimerEntry:
 		# newdate = datetime.datetime(begindate.tm_year, begindate.tm_mon, begindate.tm_mday 0, 0, 0);
 		self.repeatedbegindate = begin
 		self.backoff = 0
+		self.activation_key = begin  # Next activation when sorted into a timer list
 
 		self.disabled = False
 		self.failed = False
@@ -56,6 +97,12 @@ class TimerEntry:
 	def isFindNextEvent(self):
 		return self.findNextEvent
 
+	# Return the local time of day of timedatestruct on the day offset
+	# days after date, in seconds since epoch.
+	def localDayTime(self, date, offset, timedatestruct):
+		date += datetime.timedelta(days=offset)
+		return int(mktime((date.year, date.month, date.day, timedatestruct.tm_hour, timedatestruct.tm_min, timedatestruct.tm_sec, 0, 0, -1)))
+
 	# Return the start and end time for the next time a repeat timer runs
 	# from the current begin, end, repeatbegin and day flags
 	# (as an 7-element array day[0] for Monday, day[6] for Sunday).
@@ -65,20 +112,18 @@ class TimerEntry:
 			now = int(time()) + 1
 			if findNextEvent:
 				now = end + 120
-			# To avoid problems with daylight saving,
-			# we need to calculate with localtime,
-			# in struct_time representation
+			# To avoid problems with daylight saving, the candidate
+			# days are built from the local time of day of begin
+			# and end, and converted back with one mktime each
 			localbegin = localtime(begin)
 			localend = localtime(end)
-			localnow = localtime(now)
-
-			# The begin date is constant in the loop, so precaculate
-			# its conversion back from local time
-			localrepeatedbegindate = localtime(repeatedbegindate)
-			repeatedbegindate = int(mktime(localrepeatedbegindate))
+			begindate = datetime.date(localbegin.tm_year, localbegin.tm_mon, localbegin.tm_mday)
+			enddays = (datetime.date(localend.tm_year, localend.tm_mon, localend.tm_mday) - begindate).days
+			repeatedbegindate = int(mktime(localtime(repeatedbegindate)))
+			begin = int(begin)
+			end = int(end)
 
-			# Step through the days until the day for the new timer
-			# start/end is:
+			# The new timer start/end is on the first day that is:
 			#     a day on which the timer repeats (day[localbegin.tm_wday])
 			#  and
 			#     the start is on or after the initial start time for the repeat timer
@@ -87,20 +132,31 @@ class TimerEntry:
 			#        the new timer end has not passed
 			#     otherwise
 			#        the new timer start has not passed
-
-			while not (
-				day[localbegin.tm_wday] and
-				int(mktime(localbegin)) >= repeatedbegindate and
-				localnow < localend if findRunningEvent else localnow < localbegin
-			):
-				localbegin = self.addOneDay(localbegin)
-				localend = self.addOneDay(localend)
-
-			# We now have a struct_time representation of
-			# begin and end in localtime,
-			# but we have to calculate back to (gmt) seconds since epoch
-			begin = int(mktime(localbegin))
-			end = int(mktime(localend))
+			#
+			# Days that are more than a day (so also more than any
+			# daylight saving change) before the initial start time
+			# or now can't match, so go straight past them
+			if findRunningEvent:
+				passed = now - end
+			else:
+				passed = now - begin
+			offset = max(0, (repeatedbegindate - begin) // 86400 - 1, passed // 86400 - 1)
+			while True:
+				if day[(localbegin.tm_wday + offset) % 7]:
+					if offset:
+						newbegin = self.localDayTime(begindate, offset, localbegin)
+						newend = self.localDayTime(begindate, offset + enddays, localend)
+						# Skip the day if the start time doesn't exist on it (daylight saving change)
+						skip = localtime(newbegin).tm_hour != localbegin.tm_hour
+					else:
+						newbegin = begin
+						newend = end
+						skip = False
+					if not skip and newbegin >= repeatedbegindate and (now < newend if findRunningEvent else now < newbegin):
+						break
+				offset += 1
+			begin = newbegin
+			end = newend
 			if begin == end:
 				end += 1
 		return begin, end
@@ -217,13 +273,28 @@ class Timer:
 		# waiting/running/end-states, but sort it straight into
 		# the processedTimers.
 		if entry.shouldSkip() or entry.state == TimerEntry.StateEnded or (entry.state == TimerEntry.StateWaiting and entry.disabled):
-			insort(self.processed_timers, entry)
+			insortTimer(self.processed_timers, entry)
 			entry.state = TimerEntry.StateEnded
 		else:
-			insort(self.timer_list, entry)
+			insortTimer(self.timer_list, entry)
 			if not noRecalc:
 				self.calcNextActivation()
 
+	# Add a batch of entries, e.g. when loading the timers from file.
+	# The entries are sorted into the lists in one go instead of an
+	# insort per entry, and the next activation is calculated once.
+	def addTimerEntries(self, entries):
+		for entry in entries:
+			entry.processRepeated()
+			if entry.shouldSkip() or entry.state == TimerEntry.StateEnded or (entry.state == TimerEntry.StateWaiting and entry.disabled):
+				entry.state = TimerEntry.StateEnded
+				self.processed_timers.append(entry)
+			else:
+				self.timer_list.append(entry)
+		sortTimers(self.processed_timers)
+		sortTimers(self.timer_list)
+		self.calcNextActivation()
+
 # Small piece of example code to demonstrate how to use record simulation
 # 		if NavigationInstance.instance:
 # 			lst = [ ]
@@ -281,10 +352,10 @@ class Timer:
 	def timeChanged(self, timer):
 		timer.timeChanged()
 		if timer.state == TimerEntry.StateEnded:
-			self.processed_timers.remove(timer)
+			removeTimer(self.processed_timers, timer)
 		else:
 			try:
-				self.timer_list.remove(timer)
+				removeTimer(self.timer_list, timer)
 			except:
 				print "[timer] Failed to remove, not in list"
 				return
@@ -299,7 +370,7 @@ class Timer:
 		self.addTimerEntry(timer)
 
 	def doActivate(self, w):
-		self.timer_list.remove(w)
+		removeTimer(self.timer_list, w)
 
 		# If the timer should be skipped (e.g. disabled or
 		# its end time has past), simply abort the timer.
@@ -316,7 +387,7 @@ class Timer:
 		# Did this timer reached the final state?
 		if w.state < TimerEntry.StateEnded:
 			# No, sort it into active list
-			insort(self.timer_list, w)
+			insortTimer(self.timer_list, w)
 		else:
 			# Yes. Process repeat if necessary, and re-add.
 			if w.repeated:
@@ -324,7 +395,7 @@ class Timer:
 				w.state = TimerEntry.StateWaiting
 				self.addTimerEntry(w)
 			else:
-				insort(self.processed_timers, w)
+				insortTimer(self.processed_timers, w)
 
 		self.stateChanged(w)
 